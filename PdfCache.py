@@ -0,0 +1,505 @@
+"""Content-addressed on-disk cache of parsed PDF pages."""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import threading
+import uuid
+import warnings
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Set, Tuple
+
+import PdfMetrics
+from PdfPages import parse_page_selection, select_pages
+
+_CHUNK_SIZE = 1 << 20
+_FORMAT_VERSION = 5
+# Page attributes that change what a page shows. Annotations are left out,
+# none of the parsers read them.
+_PAGE_KEYS = ("Resources", "Contents", "MediaBox", "CropBox", "Rotate", "UserUnit")
+# Back references, which would pull the whole page tree into every page.
+_SKIPPED_KEYS = frozenset({"Parent", "P"})
+
+
+def _describe(value: Any) -> str:
+    """Stable description of a parser option, used in cache keys.
+
+    Unlike ``repr`` it never includes memory addresses, so the same
+    configuration gives the same key in every process.
+    """
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return repr(value)
+    if isinstance(value, Mapping):
+        items = sorted((str(k), _describe(v)) for k, v in value.items())
+        return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+    if isinstance(value, (list, tuple, set, frozenset, range)):
+        items = [_describe(v) for v in value]
+        if isinstance(value, (set, frozenset)):
+            items.sort()
+        return "[" + ", ".join(items) + "]"
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', type(value).__qualname__)}"
+    if hasattr(value, "__dict__"):
+        options = getattr(type(value), "output_options", None)
+        if options is not None:
+            # Only the attributes that change the output, e.g. not how many
+            # workers produce it.
+            state = {name: getattr(value, name) for name in options}
+        elif any("__getstate__" in vars(base) for base in type(value).__mro__[:-1]):
+            # Objects that pickle only part of their state, e.g. leaving out
+            # threads and counters, are described by that part.
+            state = value.__getstate__()
+        else:
+            state = vars(value)
+        return f"{type(value).__module__}.{type(value).__qualname__}({_describe(state)})"
+    return f"{type(value).__module__}.{type(value).__qualname__}"
+
+
+def parser_fingerprint(parser: Any) -> str:
+    """Describe the parser class and every option that can change its output.
+
+    Classes list those options in an ``output_options`` tuple of attribute
+    names; objects of other classes are described by all of their state.
+    """
+    return _describe(parser)
+
+
+def page_fingerprints(blob: Any) -> List[str]:
+    """SHA-256 of every page's content streams, resources and geometry.
+
+    The PDF objects are read with pdfminer but no page is interpreted, and
+    streams are hashed still encoded. Objects shared by many pages, such as
+    fonts, are hashed once.
+    """
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    fingerprints = []
+    with blob.as_bytes_io() as f:
+        document = PDFDocument(PDFParser(f))
+        digests: Dict[int, bytes] = {}
+        for page in PDFPage.create_pages(document):
+            digest = hashlib.sha256()
+            for key in _PAGE_KEYS:
+                if key in page.attrs:
+                    digest.update(key.encode("ascii"))
+                    _feed(digest, page.attrs[key], digests, set())
+            fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def _feed(digest: Any, value: Any, digests: Dict[int, bytes], active: Set[int]) -> None:
+    """Add a canonical encoding of a pdfminer object to ``digest``.
+
+    Indirect objects are hashed by content, not by object number, and their
+    digests are kept in ``digests``; ``active`` holds the objects being hashed,
+    to cut reference cycles.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    from pdfminer.psparser import PSLiteral
+
+    if isinstance(value, PDFObjRef):
+        objid = value.objid
+        if objid not in digests:
+            if objid in active:
+                digest.update(b"C")
+                return
+            active.add(objid)
+            referenced = hashlib.sha256()
+            _feed(referenced, value.resolve(), digests, active)
+            active.discard(objid)
+            digests[objid] = referenced.digest()
+        digest.update(b"R" + digests[objid])
+    elif isinstance(value, PDFStream):
+        digest.update(b"S")
+        _feed(digest, value.attrs, digests, active)
+        raw = value.rawdata if value.rawdata is not None else value.get_data()
+        digest.update(b"%d:" % len(raw) + raw)
+    elif isinstance(value, dict):
+        digest.update(b"D%d" % len(value))
+        for key in sorted(value, key=str):
+            if key not in _SKIPPED_KEYS:
+                digest.update(str(key).encode("utf-8") + b"\0")
+                _feed(digest, value[key], digests, active)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"A%d" % len(value))
+        for item in value:
+            _feed(digest, item, digests, active)
+    elif isinstance(value, PSLiteral):
+        digest.update(b"N" + str(value.name).encode("utf-8") + b"\0")
+    elif isinstance(value, bytes):
+        digest.update(b"B%d:" % len(value) + value)
+    else:
+        digest.update(b"V" + repr(value).encode("utf-8") + b"\0")
+
+
+def blob_digest(blob: Any) -> str:
+    """SHA-256 of the blob's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with blob.as_bytes_io() as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _image_paths(document: Any) -> List[str]:
+    """Files of the images saved for a Document, from its ``images`` metadata."""
+    images = getattr(document, "metadata", {}).get("images")
+    if not isinstance(images, (list, tuple)):
+        return []
+    return [path for path in images if isinstance(path, str)]
+
+
+def _touch_images(paths: List[str]) -> bool:
+    """Mark image files as just used, so an image store keeps them as long as
+    the cache entries that refer to them. False when one of them is gone."""
+    for path in paths:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+    return True
+
+
+class ParseCache:
+    """Cache of per-page Documents keyed by PDF content and parser configuration.
+
+    Every entry is one file holding a pickled Document per page, so hits are
+    streamed back page by page. Entries are evicted least recently used first
+    once the directory grows past ``max_bytes``.
+
+    The image files the pages refer to are listed next to the entry. A hit
+    refreshes them, and an entry whose images were evicted meanwhile is
+    dropped and parsed again.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30) -> None:
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries, created with the
+                       first one.
+            max_bytes: Total size of the entries kept on disk.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def key(self, parser: Any, blob: Any) -> str:
+        """Cache key of ``blob`` parsed by ``parser``."""
+        config = hashlib.sha256(parser_fingerprint(parser).encode("utf-8")).hexdigest()
+        return hashlib.sha256(
+            f"{_FORMAT_VERSION}:{blob_digest(blob)}:{config}".encode("ascii")
+        ).hexdigest()
+
+    def lazy_parse(self, parser: Any, blob: Any) -> Iterator[Any]:
+        """Yield the Documents of ``parser.lazy_parse(blob)``, from the cache when
+        this content was already parsed with the same configuration."""
+        name = type(parser).__name__
+        with PdfMetrics.stage("cache_lookup", name):
+            path = os.path.join(self.cache_dir, self.key(parser, blob) + ".pkl")
+            if not self._images_present(path):
+                self._remove(path)
+            cached = self._load(path)
+        if cached is not None:
+            self._count("hits")
+            PdfMetrics.count("cache_hits", 1, name)
+            for document in cached:
+                yield self._retarget(document, blob)
+            return
+
+        self._count("misses")
+        PdfMetrics.count("cache_misses", 1, name)
+        yield from self._store(path, parser.lazy_parse(blob))
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and the current size on disk."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats["bytes"] = sum(size for _, size, _ in self._entries())
+        return stats
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _load(self, path: str) -> Any:
+        """Open an entry and return an iterator over its Documents, or ``None``
+        when there is no usable entry."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            first = pickle.load(f)
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Written by an incompatible version of the parser; parse again.
+            f.close()
+            self._remove(path)
+            return None
+        os.utime(path)  # mark as recently used
+
+        def documents() -> Iterator[Any]:
+            with f:
+                yield first
+                while True:
+                    try:
+                        yield pickle.load(f)
+                    except EOFError:
+                        return
+
+        return documents()
+
+    def _store(self, path: str, documents: Iterator[Any]) -> Iterator[Any]:
+        """Pass ``documents`` through while writing them to a new entry.
+
+        The entry only becomes visible once every page has been written, so an
+        abandoned or failed parse leaves nothing behind.
+        """
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        images: List[str] = []
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with open(tmp_path, "wb") as f:
+                for document in documents:
+                    pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    images.extend(_image_paths(document))
+                    yield document
+            if images:
+                # Listed before the entry appears, so no hit misses the list.
+                self._write_images(path, images)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict()
+
+    @staticmethod
+    def _images_path(path: str) -> str:
+        return path[: -len(".pkl")] + ".images.json"
+
+    def _write_images(self, path: str, images: List[str]) -> None:
+        images_path = self._images_path(path)
+        tmp_path = f"{images_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(sorted(set(images)), f)
+            os.replace(tmp_path, images_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _images_present(self, path: str) -> bool:
+        """Refresh the images listed for an entry; False when one is missing."""
+        try:
+            with open(self._images_path(path), encoding="utf-8") as f:
+                images = json.load(f)
+        except FileNotFoundError:
+            return True  # an entry without images, or no entry at all
+        except ValueError:
+            return False
+        return _touch_images(images)
+
+    def _remove(self, path: str) -> None:
+        """Remove an entry and its list of images."""
+        for entry_path in (path, self._images_path(path)):
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self) -> list:
+        """``(path, size, last_used)`` of every complete entry."""
+        entries = []
+        try:
+            scan = os.scandir(self.cache_dir)
+        except FileNotFoundError:
+            return entries  # nothing stored yet
+        for entry in scan:
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self._counters["evictions"] += 1
+
+    @staticmethod
+    def _retarget(document: Any, blob: Any) -> Any:
+        """Point a cached Document at the blob it is served for, since the same
+        content may have been uploaded under another name."""
+        for field in ("source", "file_path"):
+            if field in document.metadata:
+                document.metadata[field] = blob.source
+        return document
+
+
+class PageIndex(ParseCache):
+    """Cache of single parsed pages keyed by page content and parser configuration.
+
+    Revisions of a document usually change a few pages only. Pages whose
+    fingerprint, see `page_fingerprints`, was parsed before come from the
+    index, wherever they now are in the document; only the others are parsed,
+    through the parser's ``pages`` option. Every entry is one file.
+    """
+
+    def lazy_parse(self, parser: Any, blob: Any) -> Iterator[Any]:
+        """Yield the Documents of ``parser.lazy_parse(blob)``, one per page, each
+        with a ``reused`` metadata flag telling whether it came from the index.
+
+        Parsers without a ``pages`` option, or in a mode without one Document
+        per page, parse the whole blob, without the flag.
+        """
+        if (
+            not hasattr(parser, "pages")
+            or getattr(parser, "metadata_only", False)
+            or getattr(parser, "concatenate_pages", False)
+        ):
+            yield from parser.lazy_parse(blob)
+            return
+        try:
+            with PdfMetrics.stage("fingerprint", type(parser).__name__):
+                fingerprints = page_fingerprints(blob)
+        except Exception as e:
+            # The parser may cope with damage that stops pdfminer.
+            warnings.warn(f"Cannot fingerprint the pages of {blob.source}: {e}")
+            yield from parser.lazy_parse(blob)
+            return
+
+        page_count = len(fingerprints)
+        if parser.pages is None:
+            page_numbers = list(range(page_count))
+        else:
+            page_numbers = select_pages(parser.pages, page_count)
+        unpaged = copy.copy(parser)
+        unpaged.pages = None
+        config = hashlib.sha256(parser_fingerprint(unpaged).encode("utf-8")).hexdigest()
+        paths = {
+            page_number: os.path.join(self.cache_dir, self._page_key(config, fingerprints[page_number]) + ".pkl")
+            for page_number in page_numbers
+        }
+
+        cached: Dict[int, Tuple[int, Any]] = {}
+        for page_number in page_numbers:
+            entry = self._load(paths[page_number])
+            if entry is not None:
+                stored = next(entry)
+                entry.close()
+                if _touch_images(_image_paths(stored[1])):
+                    cached[page_number] = stored
+                else:
+                    # The image store evicted this page's images; parse it again.
+                    self._remove(paths[page_number])
+        missing = [page_number for page_number in page_numbers if page_number not in cached]
+        with self._lock:
+            self._counters["hits"] += len(cached)
+            self._counters["misses"] += len(missing)
+        PdfMetrics.count("pages_reused", len(cached), type(parser).__name__)
+
+        parsed: Iterator[Any] = iter(())
+        if missing:
+            partial = copy.copy(parser)
+            partial.pages = parse_page_selection(missing)
+            parsed = iter(partial.lazy_parse(blob))
+        document_info = _lazy_document_info(parser, blob)
+        for position, page_number in enumerate(page_numbers):
+            if page_number in cached:
+                stored_number, document = cached[page_number]
+                yield self._reuse(document, stored_number, page_number, page_count, document_info, blob)
+                continue
+            document = next(parsed, None)
+            if document is None:
+                # The parser sees fewer pages than pdfminer did, e.g. because
+                # of a wrong /Count, so the page numbers do not line up.
+                warnings.warn(
+                    f"{type(parser).__name__} parsed fewer pages of {blob.source} than "
+                    f"were fingerprinted; parsing it whole"
+                )
+                for document in itertools.islice(parser.lazy_parse(blob), position, None):
+                    document.metadata["reused"] = False
+                    yield document
+                break
+            self._store_page(paths[page_number], page_number, document)
+            document.metadata["reused"] = False
+            yield document
+        # Let the partial parse finish, e.g. have its images on disk.
+        for _ in parsed:
+            pass
+        if missing:
+            self._evict()
+
+    @staticmethod
+    def _page_key(config: str, fingerprint: str) -> str:
+        return hashlib.sha256(
+            f"{_FORMAT_VERSION}:page:{fingerprint}:{config}".encode("ascii")
+        ).hexdigest()
+
+    @staticmethod
+    def _store_page(path: str, page_number: int, document: Any) -> None:
+        """Write an entry: the page number the Document was parsed at, then the
+        Document."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((page_number, document), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _reuse(
+        self,
+        document: Any,
+        stored_number: int,
+        page_number: int,
+        page_count: int,
+        document_info: Callable[[], Dict[str, Any]],
+        blob: Any,
+    ) -> Any:
+        """Update a stored page's metadata for the revision it is served for:
+        its page number, the page count and the document metadata."""
+        metadata = document.metadata
+        page = metadata.get("page")
+        if page is not None:
+            # Parsers number pages from 0 or 1, as int or str; keep the same.
+            metadata["page"] = type(page)(int(page) - stored_number + page_number)
+        if "total_pages" in metadata:
+            metadata["total_pages"] = page_count
+        for key, value in document_info().items():
+            if key in metadata:
+                metadata[key] = value
+        metadata["reused"] = True
+        return self._retarget(document, blob)
+
+
+def _lazy_document_info(parser: Any, blob: Any) -> Callable[[], Dict[str, Any]]:
+    """Function returning the parser's document metadata of the blob, read on
+    first use only."""
+    info: List[Dict[str, Any]] = []
+
+    def document_info() -> Dict[str, Any]:
+        if not info:
+            read = getattr(parser, "_document_info", None)
+            info.append(read(blob)[1] if read is not None else {})
+        return info[0]
+
+    return document_info
@@ -0,0 +1,249 @@
+"""Content-addressed store of the images extracted from PDFs."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ImageNamespace:
+    """The images of one parse, kept in a directory of their own.
+
+    Files are named after the SHA-256 of their content, so an image drawn on
+    many pages is written once and concurrent parses never overwrite each
+    other's files.
+    """
+
+    def __init__(self, store: ImageStore, name: str) -> None:
+        self.store = store
+        self.name = name
+        self.directory = os.path.join(store.root, name)
+        self._writes: List[Future] = []
+
+    def save(self, data: bytes, extension: str) -> str:
+        """Queue ``data`` to be written and return the path it will have.
+
+        The file may not exist yet when this returns, see `wait`.
+        """
+        return self.save_lazily(hashlib.sha256(data).hexdigest(), extension, lambda: data)
+
+    def save_lazily(self, digest: str, extension: str, encode: Callable[[], bytes]) -> str:
+        """Like `save`, for content that is costly to produce, e.g. a PNG.
+
+        The file is named after ``digest``, which must identify the content,
+        and ``encode`` runs on the writer threads, only if no such file exists.
+        """
+        path = os.path.join(self.directory, digest + extension)
+        write = self.store._write(path, encode)
+        if write is not None:
+            self._writes.append(write)
+        return path
+
+    def wait(self) -> None:
+        """Block until every image saved so far is on disk.
+
+        Raises:
+            OSError: A write failed.
+        """
+        writes, self._writes = self._writes, []
+        for write in writes:
+            write.result()
+        self.store._maybe_evict()
+
+
+class ImageStore:
+    """Directory of extracted images, written by a pool of I/O threads.
+
+    Images older than ``max_age`` seconds are removed, then the least recently
+    written ones until the store fits ``max_bytes``. Eviction runs in the
+    background at most every ``evict_interval`` seconds.
+    """
+
+    #: The only attribute that changes the image paths in parsed Documents.
+    output_options = ("root",)
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        workers: int = 4,
+        evict_interval: float = 60.0,
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            root: Directory holding one subdirectory per namespace, created
+                  with the first image.
+            max_bytes: Total size of the images kept on disk, unbounded by default.
+            max_age: Seconds an image is kept after it was last written or
+                     reused, forever by default.
+            workers: Number of threads writing images.
+            evict_interval: Minimum seconds between two eviction runs.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.workers = workers
+        self.evict_interval = evict_interval
+        self._start()
+
+    def _start(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="image-store"
+        )
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._counters: Dict[str, float] = {
+            "written": 0, "skipped": 0, "evicted": 0, "write_seconds": 0.0
+        }
+        self._last_eviction = time.monotonic()
+        self._evicting = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Only the configuration travels to worker processes and into cache
+        # keys; every process runs its own writer threads.
+        return {
+            "root": self.root,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            "workers": self.workers,
+            "evict_interval": self.evict_interval,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._start()
+
+    def namespace(self, name: Optional[str] = None) -> ImageNamespace:
+        """A new namespace, named at random unless ``name`` is given."""
+        return ImageNamespace(self, name or uuid.uuid4().hex)
+
+    def stats(self) -> Dict[str, float]:
+        """Write/skip/eviction counters, time spent encoding and writing, and
+        the current size on disk."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+        files = self._files()
+        stats["files"] = len(files)
+        stats["bytes"] = sum(size for _, size, _ in files)
+        return stats
+
+    def _write(self, path: str, encode: Callable[[], bytes]) -> Optional[Future]:
+        """Write ``path`` in the background unless it exists or is being written."""
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is not None:
+                return pending
+            if os.path.exists(path):
+                self._counters["skipped"] += 1
+                try:
+                    os.utime(path)  # reused, keep it as long as a new image
+                except FileNotFoundError:
+                    pass
+                else:
+                    return None
+            future = self._executor.submit(self._write_file, path, encode)
+            self._pending[path] = future
+        return future
+
+    def _write_file(self, path: str, encode: Callable[[], bytes]) -> None:
+        try:
+            self._write_data(path, encode)
+        finally:
+            # Before the future is done, so a file is never still pending
+            # once `ImageNamespace.wait` has returned.
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def _write_data(self, path: str, encode: Callable[[], bytes]) -> None:
+        start = time.perf_counter()
+        data = encode()
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        for attempt in range(2):
+            # The namespace directory may be removed by a concurrent eviction.
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._counters["written"] += 1
+            self._counters["write_seconds"] += time.perf_counter() - start
+
+    def _files(self) -> list:
+        """``(path, size, last_written)`` of every stored image."""
+        files = []
+        for namespace in self._namespaces():
+            if not namespace.is_dir():
+                continue
+            for entry in os.scandir(namespace.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _namespaces(self) -> List[os.DirEntry]:
+        """Entries of the root directory, none before the first image is written."""
+        try:
+            with os.scandir(self.root) as entries:
+                return list(entries)
+        except FileNotFoundError:
+            return []
+
+    def _maybe_evict(self) -> None:
+        """Start an eviction run in the background when one is due."""
+        if self.max_bytes is None and self.max_age is None:
+            return
+        with self._lock:
+            if self._evicting or time.monotonic() - self._last_eviction < self.evict_interval:
+                return
+            self._evicting = True
+        self._executor.submit(self.evict)
+
+    def evict(self) -> None:
+        """Remove expired images, then the oldest until the store fits ``max_bytes``,
+        and the namespaces left empty."""
+        try:
+            now = time.time()
+            files = sorted(self._files(), key=lambda file: file[2])
+            total = sum(size for _, size, _ in files)
+            for path, size, last_written in files:
+                expired = self.max_age is not None and last_written < now - self.max_age
+                too_large = self.max_bytes is not None and total > self.max_bytes
+                if not (expired or too_large):
+                    break
+                with self._lock:
+                    if path in self._pending:
+                        continue
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    self._counters["evicted"] += 1
+                total -= size
+            for namespace in self._namespaces():
+                # Leave new namespaces alone, their first write may be under way.
+                if namespace.is_dir() and namespace.stat().st_mtime < now - self.evict_interval:
+                    try:
+                        os.rmdir(namespace.path)
+                    except OSError:
+                        pass  # not empty
+        finally:
+            with self._lock:
+                self._evicting = False
+                self._last_eviction = time.monotonic()
@@ -0,0 +1,487 @@
+"""Decoding of PDF image XObjects into pixels, and PNG encoding of the result.
+
+Every parser backend exposes image streams differently; the ``from_*``
+functions turn them into a `DecodedImage`: 8-bit Gray or RGB pixels, with an
+alpha channel when the image has a soft mask. JPEG and JPEG 2000 images are
+kept encoded, their bytes are usable as they are.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+import warnings
+import zlib
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+# numpy and the thread pool are imported where they are used, like the parser
+# backends, as PdfParser.py imports this module for every parser.
+if TYPE_CHECKING:
+    import numpy as np
+
+#: Filters whose output is a complete image file, with its extension.
+ENCODED_FILTERS = {"DCTDecode": ".jpg", "JPXDecode": ".jp2"}
+#: Filters whose output not every backend turns into samples.
+UNSUPPORTED_FILTERS = frozenset({"CCITTFaxDecode", "JBIG2Decode"})
+
+# Inline images may use abbreviated names.
+_FILTER_ABBREVIATIONS = {
+    "AHx": "ASCIIHexDecode",
+    "A85": "ASCII85Decode",
+    "LZW": "LZWDecode",
+    "Fl": "FlateDecode",
+    "RL": "RunLengthDecode",
+    "CCF": "CCITTFaxDecode",
+    "DCT": "DCTDecode",
+}
+_COLORSPACE_ABBREVIATIONS = {
+    "G": "DeviceGray",
+    "RGB": "DeviceRGB",
+    "CMYK": "DeviceCMYK",
+    "I": "Indexed",
+}
+_COMPONENTS = {
+    "DeviceGray": 1,
+    "CalGray": 1,
+    "Separation": 1,
+    "DeviceRGB": 3,
+    "CalRGB": 3,
+    "Lab": 3,
+    "DeviceCMYK": 4,
+}
+_ICC_COLORSPACES = {1: "DeviceGray", 3: "DeviceRGB", 4: "DeviceCMYK"}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}  # by channels: Gray, Gray+alpha, RGB, RGBA
+
+
+class ColorSpace(NamedTuple):
+    """A PDF color space, reduced to what decoding needs."""
+
+    #: Family, e.g. ``"DeviceRGB"`` or ``"Indexed"``; ICC-based color spaces are
+    #: named after the device color space with as many components.
+    name: str
+    #: Components per sample, 0 when unknown.
+    components: int
+    #: Color space of the palette of an ``Indexed`` color space.
+    base: Optional["ColorSpace"] = None
+    #: Highest index of an ``Indexed`` color space.
+    hival: int = 0
+    #: Palette of an ``Indexed`` color space, ``base`` components per index.
+    lookup: bytes = b""
+
+
+class RawImage(NamedTuple):
+    """An image XObject with its lossless filters undone."""
+
+    width: int
+    height: int
+    bits: int
+    colorspace: ColorSpace
+    #: Filters of the stream, abbreviations expanded.
+    filters: Tuple[str, ...]
+    #: Samples, or the encoded image when the last filter is in `ENCODED_FILTERS`.
+    data: bytes
+    #: The ``/Decode`` array, ``None`` for the default.
+    decode: Optional[Tuple[float, ...]] = None
+    #: Whether the image is a stencil mask, painted where samples are 0.
+    image_mask: bool = False
+    smask: Optional["RawImage"] = None
+
+
+class DecodedImage(NamedTuple):
+    """Pixels of an image, or its encoded bytes when it was kept encoded."""
+
+    #: ``(height, width)`` Gray, or ``(height, width, channels)`` Gray+alpha,
+    #: RGB or RGBA 8-bit samples.
+    pixels: Optional[np.ndarray]
+    encoded: Optional[bytes]
+    #: Extension of the image as a file, ``.png`` for pixels.
+    extension: str
+
+    def for_ocr(self) -> Any:
+        """The encoded bytes, or the pixels composited onto a white page."""
+        if self.pixels is None:
+            return self.encoded
+        return flatten_alpha(self.pixels)
+
+    def digest(self) -> str:
+        """SHA-256 identifying the image, computed without encoding the pixels."""
+        if self.pixels is None:
+            return hashlib.sha256(self.encoded).hexdigest()  # type: ignore[arg-type]
+        digest = hashlib.sha256(repr(self.pixels.shape).encode("ascii"))
+        digest.update(self.pixels)
+        return digest.hexdigest()
+
+    def to_bytes(self) -> bytes:
+        """The image as a file: the encoded bytes, or the pixels as a PNG."""
+        if self.pixels is None:
+            return self.encoded  # type: ignore[return-value]
+        return encode_png(self.pixels)
+
+
+def decode_image(image: RawImage) -> Optional[DecodedImage]:
+    """Decode an image, ``None`` with a warning when its filter is unsupported.
+
+    Raises:
+        ValueError: The image is empty or has an unsupported bit depth.
+    """
+    last_filter = image.filters[-1] if image.filters else ""
+    if last_filter in ENCODED_FILTERS:
+        return DecodedImage(None, image.data, ENCODED_FILTERS[last_filter])
+    if last_filter in UNSUPPORTED_FILTERS:
+        warnings.warn(f"Unsupported image filter {last_filter}")
+        return None
+    pixels = decode_pixels(image)
+    if image.smask is not None:
+        alpha = _decode_alpha(image.smask, image.height, image.width)
+        if alpha is not None:
+            pixels = add_alpha(pixels, alpha)
+    return DecodedImage(pixels, None, ".png")
+
+
+def decode_pixels(image: RawImage) -> np.ndarray:
+    """Gray or RGB pixels of an image whose data are samples, its mask aside.
+
+    Raises:
+        ValueError: The image is empty or has an unsupported bit depth.
+    """
+    import numpy as np
+
+    if image.width <= 0 or image.height <= 0:
+        raise ValueError(f"invalid image size {image.width}x{image.height}")
+    colorspace = ColorSpace("DeviceGray", 1) if image.image_mask else image.colorspace
+    bits = 1 if image.image_mask else image.bits
+    components = colorspace.components or _guess_components(image, bits)
+    samples = unpack_samples(image.data, image.width, image.height, bits, components)
+    if colorspace.name == "Indexed":
+        pixels = _apply_palette(samples[..., 0], colorspace)
+    else:
+        decode = None if colorspace.name == "Lab" else image.decode
+        pixels = _to_display(_scale(samples, bits, decode), colorspace)
+    return np.ascontiguousarray(pixels)
+
+
+def unpack_samples(
+    data: bytes, width: int, height: int, bits: int, components: int
+) -> np.ndarray:
+    """``(height, width, components)`` samples of packed image data.
+
+    Samples of 1, 2 and 4 bits are unpacked to a byte each, 16-bit samples
+    become ``uint16``. Rows are padded to whole bytes as in PDF, and short
+    data, as left by truncated streams, is padded with zeros.
+
+    Raises:
+        ValueError: ``bits`` is not a PDF bit depth.
+    """
+    import numpy as np
+
+    if bits not in (1, 2, 4, 8, 16):
+        raise ValueError(f"unsupported bits per component {bits}")
+    row_bytes = (width * components * bits + 7) // 8
+    size = row_bytes * height
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size < size:
+        buffer = np.concatenate([buffer, np.zeros(size - buffer.size, dtype=np.uint8)])
+    rows = buffer[:size].reshape(height, row_bytes)
+    count = width * components
+    if bits == 8:
+        samples = rows[:, :count]
+    elif bits == 16:
+        samples = np.ascontiguousarray(rows[:, : count * 2]).view(">u2")
+    else:
+        # Every byte holds 8 // bits samples, the first in the high bits.
+        shifts = np.arange(8 - bits, -1, -bits, dtype=np.uint8)
+        samples = (rows[:, :, np.newaxis] >> shifts) & ((1 << bits) - 1)
+        samples = samples.reshape(height, -1)[:, :count]
+    return samples.reshape(height, width, components)
+
+
+def add_alpha(pixels: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """Gray+alpha or RGBA pixels from Gray or RGB ``pixels``."""
+    import numpy as np
+
+    if pixels.ndim == 2:
+        pixels = pixels[..., np.newaxis]
+    return np.concatenate([pixels, alpha[..., np.newaxis]], axis=2)
+
+
+def flatten_alpha(pixels: np.ndarray) -> np.ndarray:
+    """Gray or RGB pixels, composited onto white when they have an alpha channel."""
+    import numpy as np
+
+    if pixels.ndim == 2 or pixels.shape[2] in (1, 3):
+        return pixels
+    color = pixels[..., :-1].astype(np.uint16)
+    alpha = pixels[..., -1:].astype(np.uint16)
+    flat = ((color * alpha + 255 * (255 - alpha) + 127) // 255).astype(np.uint8)
+    return flat[..., 0] if flat.shape[2] == 1 else flat
+
+
+def encode_png(pixels: np.ndarray, level: int = 1) -> bytes:
+    """8-bit Gray, Gray+alpha, RGB or RGBA pixels as a PNG file.
+
+    Args:
+        pixels: ``(height, width)`` or ``(height, width, channels)`` samples.
+        level: zlib compression level. The fastest level is several times
+               faster than the default of 6 on scans, for files about a tenth
+               larger.
+    """
+    import numpy as np
+
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+    rows = pixels.reshape(height, width * channels)
+    # Every row uses the Up filter, the difference to the row above: it suits
+    # scans and drawings and is computed for the whole image at once.
+    filtered = np.empty((height, width * channels + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    filtered[:1, 1:] = rows[:1]
+    np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+    header = struct.pack(">IIBBBBB", width, height, 8, _PNG_COLOR_TYPES[channels], 0, 0, 0)
+    return b"".join(
+        [
+            _PNG_SIGNATURE,
+            _png_chunk(b"IHDR", header),
+            _png_chunk(b"IDAT", zlib.compress(filtered.tobytes(), level)),
+            _png_chunk(b"IEND", b""),
+        ]
+    )
+
+
+def encode_pngs(images: Iterable[np.ndarray], workers: int = 4) -> Iterator[bytes]:
+    """`encode_png` every image on ``workers`` threads, in order.
+
+    zlib releases the GIL while it compresses, so the threads run in parallel.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="png-encode") as executor:
+        yield from executor.map(encode_png, images)
+
+
+def from_pdfminer(stream: Any) -> Optional[DecodedImage]:
+    """Decode a pdfminer image stream, e.g. ``LTImage.stream`` or the
+    ``"stream"`` of a pdfplumber image, see `decode_image`."""
+    from pdfminer.pdftypes import resolve1
+
+    def get(obj: Any, *keys: str) -> Any:
+        for key in keys:
+            value = obj.get(key)
+            if value is not None:
+                return resolve1(value)
+        return None
+
+    return decode_image(_raw_image(stream, get, resolve1))
+
+
+def from_pypdf(xobject: Any) -> Optional[DecodedImage]:
+    """Decode a pypdf image XObject, see `decode_image`."""
+
+    def resolve(value: Any) -> Any:
+        return value.get_object() if hasattr(value, "get_object") else value
+
+    def get(obj: Any, *keys: str) -> Any:
+        for key in keys:
+            value = obj.get("/" + key)
+            if value is not None:
+                return resolve(value)
+        return None
+
+    return decode_image(_raw_image(xobject, get, resolve))
+
+
+def from_bitmap(pixels: np.ndarray, mode: str) -> DecodedImage:
+    """Image from the pixels of a pdfium bitmap, stored in ``mode`` channel order."""
+    import numpy as np
+
+    # Every branch copies, the bitmap may be closed before the pixels are used.
+    if mode in ("BGR", "BGRX"):
+        pixels = pixels[..., [2, 1, 0]]
+    elif mode == "BGRA":
+        pixels = pixels[..., [2, 1, 0, 3]]
+    elif mode == "RGBX":
+        pixels = pixels[..., :3].copy()
+    elif pixels.ndim == 3 and pixels.shape[2] == 1:
+        pixels = pixels[..., 0].copy()
+    else:
+        pixels = pixels.copy()
+    return DecodedImage(np.ascontiguousarray(pixels), None, ".png")
+
+
+def _raw_image(
+    stream: Any, get: Callable[..., Any], resolve: Callable[[Any], Any]
+) -> RawImage:
+    """`RawImage` of a stream whose entries are read with ``get(obj, *keys)``."""
+    filters = get(stream, "Filter", "F")
+    if filters is None:
+        filters = []
+    elif not isinstance(filters, (list, tuple)):
+        filters = [filters]
+    names = tuple(
+        _FILTER_ABBREVIATIONS.get(name, name)
+        for name in (_name(resolve(f)) for f in filters)
+    )
+    image_mask = bool(get(stream, "ImageMask", "IM"))
+    decode = get(stream, "Decode", "D")
+    smask = get(stream, "SMask")
+    return RawImage(
+        width=int(get(stream, "Width", "W") or 0),
+        height=int(get(stream, "Height", "H") or 0),
+        bits=1 if image_mask else int(get(stream, "BitsPerComponent", "BPC") or 8),
+        colorspace=_colorspace(get(stream, "ColorSpace", "CS"), get, resolve),
+        filters=names,
+        data=b"" if names[-1:] and names[-1] in UNSUPPORTED_FILTERS else stream.get_data(),
+        decode=tuple(float(resolve(value)) for value in decode) if decode else None,
+        image_mask=image_mask,
+        smask=_raw_image(smask, get, resolve) if hasattr(smask, "get_data") else None,
+    )
+
+
+def _colorspace(value: Any, get: Callable[..., Any], resolve: Callable[[Any], Any]) -> ColorSpace:
+    value = resolve(value)
+    if value is None:
+        return ColorSpace("", 0)
+    if not isinstance(value, (list, tuple)):
+        name = _name(value)
+        name = _COLORSPACE_ABBREVIATIONS.get(name, name)
+        return ColorSpace(name, _COMPONENTS.get(name, 0))
+    if not value:
+        return ColorSpace("", 0)
+    family = _name(resolve(value[0]))
+    family = _COLORSPACE_ABBREVIATIONS.get(family, family)
+    if family == "Indexed" and len(value) >= 4:
+        return ColorSpace(
+            "Indexed",
+            1,
+            _colorspace(value[1], get, resolve),
+            int(resolve(value[2])),
+            _as_bytes(resolve(value[3])),
+        )
+    if family == "ICCBased" and len(value) >= 2:
+        components = int(get(resolve(value[1]), "N") or 0)
+        return ColorSpace(_ICC_COLORSPACES.get(components, "ICCBased"), components)
+    if family == "DeviceN" and len(value) >= 2:
+        return ColorSpace("DeviceN", len(resolve(value[1])))
+    return ColorSpace(family, _COMPONENTS.get(family, 0))
+
+
+def _name(value: Any) -> str:
+    """A PDF name without its slash, from a pdfminer literal or a pypdf name."""
+    name = getattr(value, "name", value)
+    if isinstance(name, bytes):
+        name = name.decode("latin-1")
+    return str(name).lstrip("/")
+
+
+def _as_bytes(value: Any) -> bytes:
+    """Bytes of a PDF string or stream."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    original = getattr(value, "original_bytes", None)  # pypdf text strings
+    if original is not None:
+        return bytes(original)
+    if hasattr(value, "get_data"):
+        return value.get_data()
+    if isinstance(value, str):
+        return value.encode("latin-1")
+    return b""
+
+
+def _guess_components(image: RawImage, bits: int) -> int:
+    """Components per sample of an image whose color space is unknown, e.g. a
+    named resource: the most that its data holds."""
+    for components in (4, 3, 1):
+        row_bytes = (image.width * components * bits + 7) // 8
+        if len(image.data) >= row_bytes * image.height:
+            return components
+    return 1
+
+
+def _scale(
+    samples: np.ndarray, bits: int, decode: Optional[Tuple[float, ...]]
+) -> np.ndarray:
+    """Samples scaled to 8 bits, through the ``/Decode`` ranges if any."""
+    import numpy as np
+
+    maximum = (1 << bits) - 1
+    components = samples.shape[2]
+    if decode is not None and len(decode) >= 2 * components:
+        low = np.array(decode[0 : 2 * components : 2], dtype=np.float32)
+        high = np.array(decode[1 : 2 * components : 2], dtype=np.float32)
+        if (low != 0).any() or (high != 1).any():
+            values = low + samples * ((high - low) / maximum)
+            return np.clip(values * 255 + 0.5, 0, 255).astype(np.uint8)
+    if bits == 8:
+        return samples
+    if bits == 16:
+        return (samples >> 8).astype(np.uint8)
+    return samples * np.uint8(255 // maximum)
+
+
+def _to_display(samples: np.ndarray, colorspace: ColorSpace) -> np.ndarray:
+    """Gray or RGB pixels of 8-bit samples in ``colorspace``."""
+    import numpy as np
+
+    components = samples.shape[2]
+    if colorspace.name == "Lab":
+        return samples[..., 0]  # the lightness
+    if colorspace.name in ("Separation", "DeviceN") or components not in (1, 3, 4):
+        return 255 - samples[..., 0]  # the amount of the first colorant
+    if components == 1:
+        return samples[..., 0]
+    if components == 3:
+        return samples
+    cmy = samples[..., :3].astype(np.uint16)
+    black = samples[..., 3:].astype(np.uint16)
+    return ((255 - cmy) * (255 - black) // 255).astype(np.uint8)
+
+
+def _apply_palette(indices: np.ndarray, colorspace: ColorSpace) -> np.ndarray:
+    """Pixels of an ``Indexed`` image, every index looked up at once."""
+    import numpy as np
+
+    base = colorspace.base if colorspace.base and colorspace.base.components else ColorSpace("DeviceRGB", 3)
+    entries = colorspace.hival + 1
+    size = entries * base.components
+    palette = np.frombuffer(colorspace.lookup, dtype=np.uint8)
+    if palette.size < size:
+        palette = np.concatenate([palette, np.zeros(size - palette.size, dtype=np.uint8)])
+    palette = palette[:size].reshape(entries, base.components)
+    # Out-of-range indices get the last color.
+    return _to_display(np.take(palette, indices, axis=0, mode="clip"), base)
+
+
+def _decode_alpha(smask: RawImage, height: int, width: int) -> Optional[np.ndarray]:
+    """``(height, width)`` alpha channel of a soft mask, resized to the image
+    with nearest-neighbor sampling; ``None`` when the mask is kept encoded."""
+    if smask.filters[-1:] and (
+        smask.filters[-1] in ENCODED_FILTERS or smask.filters[-1] in UNSUPPORTED_FILTERS
+    ):
+        return None
+    alpha = decode_pixels(smask._replace(colorspace=ColorSpace("DeviceGray", 1)))
+    if alpha.shape != (height, width):
+        import numpy as np
+
+        rows = np.arange(height) * alpha.shape[0] // height
+        columns = np.arange(width) * alpha.shape[1] // width
+        alpha = alpha[rows[:, np.newaxis], columns]
+    return alpha
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
@@ -0,0 +1,270 @@
+"""Per-stage timings and counters for the PDF parsers.
+
+Every measurement goes to the process-wide registry, rendered for Prometheus
+by `render_prometheus`, and to the request being collected with
+`collect_request`, if any, so a single response can carry its own breakdown.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+# cProfile can only profile one thread of the process at a time.
+_profile_lock = threading.Lock()
+
+
+class MetricsRegistry:
+    """Thread-safe totals of stage durations and event counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[Tuple[str, _Labels], List[float]] = {}
+        self._counters: Dict[Tuple[str, _Labels], float] = {}
+
+    def observe(self, stage: str, seconds: float, labels: _Labels) -> None:
+        with self._lock:
+            totals = self._stages.setdefault((stage, labels), [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def count(self, event: str, value: float, labels: _Labels) -> None:
+        with self._lock:
+            key = (event, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+        lines = [
+            "# HELP pdf_stage_seconds Time spent in each parsing stage.",
+            "# TYPE pdf_stage_seconds summary",
+        ]
+        for (stage, labels), (seconds, count) in stages:
+            label_text = _format_labels((("stage", stage),) + labels)
+            lines.append(f"pdf_stage_seconds_sum{label_text} {seconds:.6f}")
+            lines.append(f"pdf_stage_seconds_count{label_text} {count}")
+        lines += [
+            "# HELP pdf_events_total Pages, bytes, images and OCR calls processed.",
+            "# TYPE pdf_events_total counter",
+        ]
+        for (event, labels), value in counters:
+            label_text = _format_labels((("event", event),) + labels)
+            lines.append(f"pdf_events_total{label_text} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """Stage durations and counters of one request.
+
+    Measurements are recorded while the request is `active`; a streamed
+    response activates it around every step, see `iterate`.
+    """
+
+    def __init__(self, profile: bool = False) -> None:
+        """Initialize the collection.
+
+        Args:
+            profile: Also run cProfile while the request is active; its top
+                     functions end up in ``profile`` once `close` is called.
+        """
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.profile: Optional[str] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        if profile:
+            if _profile_lock.acquire(blocking=False):
+                self._profiler = cProfile.Profile()
+            else:
+                self.profile = "not captured: another request is being profiled"
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+            totals["seconds"] += seconds
+            totals["count"] += 1
+
+    def count(self, event: str, value: float) -> None:
+        with self._lock:
+            self.counters[event] = self.counters.get(event, 0) + value
+
+    @contextlib.contextmanager
+    def active(self) -> Iterator[None]:
+        """Record the measurements made in the enclosed block."""
+        token = _current_request.set(self)
+        if self._profiler is not None:
+            self._profiler.enable()
+        try:
+            yield
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+            _current_request.reset(token)
+
+    def iterate(self, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Pass items through, recording the work of producing each one."""
+        iterator = iter(iterable)
+        while True:
+            with self.active():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def close(self) -> None:
+        """Stop profiling and render the profile."""
+        if self._profiler is None:
+            return
+        profiler, self._profiler = self._profiler, None
+        _profile_lock.release()
+        report = io.StringIO()
+        try:
+            stats = pstats.Stats(profiler, stream=report)
+        except TypeError:
+            # Never enabled, e.g. the response was closed before it was read.
+            self.profile = "not captured: nothing was parsed"
+            return
+        stats.sort_stats("cumulative").print_stats(30)
+        self.profile = report.getvalue()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            breakdown: Dict[str, Any] = {
+                "stages": {name: dict(totals) for name, totals in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+        if self.profile is not None:
+            breakdown["profile"] = self.profile
+        return breakdown
+
+
+REGISTRY = MetricsRegistry()
+_current_request: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar(
+    "pdf_request_metrics", default=None
+)
+
+
+def _format_labels(labels: _Labels) -> str:
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+        if value
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def observe(stage: str, seconds: float, parser: str = "") -> None:
+    """Record ``seconds`` spent in ``stage``."""
+    REGISTRY.observe(stage, seconds, (("parser", parser),))
+    request = _current_request.get()
+    if request is not None:
+        request.observe(stage, seconds)
+
+
+def count(event: str, value: float = 1, parser: str = "") -> None:
+    """Add ``value`` to the ``event`` counter, e.g. pages, bytes_read, ocr_calls."""
+    REGISTRY.count(event, value, (("parser", parser),))
+    request = _current_request.get()
+    if request is not None:
+        request.count(event, value)
+
+
+@contextlib.contextmanager
+def stage(name: str, parser: str = "") -> Iterator[None]:
+    """Time the enclosed block as stage ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, parser)
+
+
+def timed_pages(pages: Iterable[Any], parser: str) -> Iterator[Any]:
+    """Pass pages through, timing how long each one took to produce."""
+    iterator = iter(pages)
+    while True:
+        start = time.perf_counter()
+        try:
+            page = next(iterator)
+        except StopIteration:
+            return
+        observe("page", time.perf_counter() - start, parser)
+        count("pages", 1, parser)
+        yield page
+
+
+def blob_size(blob: Any) -> int:
+    """Size in bytes of a langchain or app.py Blob, without reading it."""
+    data = getattr(blob, "data", None)
+    if isinstance(data, (bytes, bytearray, str)):
+        return len(data)
+    stream = getattr(blob, "stream", None)
+    if stream is not None:
+        position = stream.tell()
+        size = stream.seek(0, io.SEEK_END)
+        stream.seek(position)
+        return size
+    path = getattr(blob, "path", None) or getattr(blob, "source", None)
+    try:
+        return os.path.getsize(str(path))
+    except (OSError, TypeError):
+        return 0
+
+
+def in_request(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``function`` so calls made from worker threads are also recorded in
+    the request being collected by the calling thread."""
+    request = _current_request.get()
+    if request is None:
+        return function
+
+    @functools.wraps(function)
+    def call(*args: Any, **kwargs: Any) -> Any:
+        token = _current_request.set(request)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_request.reset(token)
+
+    return call
+
+
+@contextlib.contextmanager
+def collect_request(profile: bool = False) -> Iterator[RequestMetrics]:
+    """Collect the measurements made in this context, see `RequestMetrics`."""
+    metrics = RequestMetrics(profile)
+    try:
+        with metrics.active():
+            yield metrics
+    finally:
+        metrics.close()
+
+
+def render_prometheus() -> str:
+    """All stage timings and counters of this process, for a /metrics endpoint."""
+    return REGISTRY.render()
+
+
+def render_values(prefix: str, values: Mapping[str, Any]) -> str:
+    """The numeric entries of ``values`` as untyped samples named
+    ``<prefix>_<key>``, e.g. to export the counters of a stats endpoint."""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {prefix}_{key} untyped")
+            lines.append(f"{prefix}_{key} {value:g}")
+    return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,61 @@
+"""Page selections such as ``"0-4,9,20-"`` for the PDF parsers.
+
+Page numbers are zero-based, like the ``page`` metadata of the parsed
+Documents. Ranges are inclusive and a range without an end runs to the last
+page.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple, Union
+
+#: Inclusive ``(first, last)`` ranges, ``last`` is ``None`` for open ranges.
+PageRanges = Tuple[Tuple[int, Optional[int]], ...]
+PageSelection = Union[str, Iterable[int]]
+
+
+def parse_page_selection(selection: PageSelection) -> PageRanges:
+    """Normalize a selection string or an iterable of page numbers.
+
+    Raises:
+        ValueError: The selection is malformed or has negative page numbers.
+    """
+    if isinstance(selection, range) and selection.step == 1:
+        if not len(selection):
+            return ()
+        if selection.start < 0:
+            raise ValueError(f"negative page number {selection.start}")
+        return ((selection.start, selection.stop - 1),)
+    if not isinstance(selection, str):
+        pages = sorted(set(selection))
+        if pages and pages[0] < 0:
+            raise ValueError(f"negative page number {pages[0]}")
+        return tuple((page, page) for page in pages)
+
+    ranges = []
+    for part in selection.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        try:
+            start = int(first)
+            stop = (int(last) if last.strip() else None) if dash else start
+        except ValueError:
+            raise ValueError(f"invalid page selection {part!r}") from None
+        if start < 0 or (stop is not None and stop < start):
+            raise ValueError(f"invalid page range {part!r}")
+        ranges.append((start, stop))
+    if not ranges:
+        raise ValueError("empty page selection")
+    return tuple(ranges)
+
+
+def select_pages(ranges: PageRanges, page_count: int) -> List[int]:
+    """Sorted page numbers of a document with ``page_count`` pages that fall
+    in ``ranges``; pages past the end are left out."""
+    selected = set()
+    for start, stop in ranges:
+        last = page_count - 1 if stop is None else min(stop, page_count - 1)
+        selected.update(range(start, last + 1))
+    return sorted(selected)
@@ -2,51 +2,165 @@
 
 from __future__ import annotations
 
+import collections
+import contextlib
+import functools
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
 import warnings
 from typing import (
     TYPE_CHECKING,
     Any,
+    Callable,
+    Deque,
     Dict,
+    Hashable,
     Iterable,
     Iterator,
+    List,
     Mapping,
+    NamedTuple,
     Optional,
     Sequence,
+    Tuple,
     Union,
 )
 from urllib.parse import urlparse
 
-import numpy as np
+from langchain_core.document_loaders.base import BaseBlobParser
 from langchain_core.documents import Document
 
-from langchain_community.document_loaders.base import BaseBlobParser
-from langchain_community.document_loaders.blob_loaders import Blob
+import PdfImages
+import PdfMetrics
+from PdfCache import ParseCache
+from PdfPages import PageSelection, parse_page_selection, select_pages
 
+# numpy, the PDF backends and the process/thread pools are imported where they
+# are used, so loading this module for one text-only parser stays cheap.
 if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
     import fitz.fitz
+    import numpy as np
     import pdfminer.layout
     import pdfplumber.page
     import pypdf._page
     import pypdfium2._helpers.page
     from pypdf import PageObject
 
+    from langchain_community.document_loaders.blob_loaders import Blob
+
+
+class _RapidOCRPool:
+    """Process-wide pool of RapidOCR engines.
+
+    Loading the ONNX models costs far more than recognizing a page, so engines
+    are created lazily, at most ``size`` of them, and reused for every image
+    afterwards. Each engine serves one thread at a time.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._timings = {
+            "engines_loaded": 0,
+            "load_seconds": 0.0,
+            "images": 0,
+            "inference_seconds": 0.0,
+        }
+
+    @contextlib.contextmanager
+    def engine(self) -> Iterator[Any]:
+        """Borrow an engine, loading one if none is idle and the pool has room."""
+        try:
+            engine = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    engine = self._load()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                engine = self._idle.get()
+        try:
+            yield engine
+        finally:
+            self._idle.put(engine)
+
+    def reserve(self, size: int) -> None:
+        """Allow at least ``size`` engines, one per thread that runs OCR."""
+        with self._lock:
+            self.size = max(self.size, size)
+
+    def warm_up(self, engines: int = 1) -> None:
+        """Load up to ``engines`` engines now instead of on the first image."""
+        with contextlib.ExitStack() as stack:
+            for _ in range(min(engines, self.size)):
+                stack.enter_context(self.engine())
+
+    def recognize(self, image: Union[np.ndarray, bytes]) -> Any:
+        """Run OCR on one image with a pooled engine."""
+        with self.engine() as ocr:
+            start = time.perf_counter()
+            result, _ = ocr(image)
+            elapsed = time.perf_counter() - start
+        with self._lock:
+            self._timings["images"] += 1
+            self._timings["inference_seconds"] += elapsed
+        PdfMetrics.observe("ocr", elapsed)
+        PdfMetrics.count("ocr_calls")
+        return result
+
+    def timings(self) -> Dict[str, Union[int, float]]:
+        """Model-load and inference time spent so far."""
+        with self._lock:
+            return dict(self._timings)
+
+    def _load(self) -> Any:
+        try:
+            from rapidocr_onnxruntime import RapidOCR
+        except ImportError:
+            raise ImportError(
+                "`rapidocr-onnxruntime` package not found, please install it with "
+                "`pip install rapidocr-onnxruntime`"
+            )
+        start = time.perf_counter()
+        engine = RapidOCR()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._timings["engines_loaded"] += 1
+            self._timings["load_seconds"] += elapsed
+        return engine
+
+
+_OCR_POOL = _RapidOCRPool(size=int(os.environ.get("RAPIDOCR_ENGINES", "1")))
+
+
+def warm_up_rapidocr(engines: int = 1) -> None:
+    """Load RapidOCR engines ahead of time, e.g. when a server starts.
+
+    Args:
+        engines: Number of engines to load, capped by the ``RAPIDOCR_ENGINES``
+                 pool size.
+    """
+    _OCR_POOL.warm_up(engines)
+
 
-_PDF_FILTER_WITH_LOSS = ["DCTDecode", "DCT", "JPXDecode"]
-_PDF_FILTER_WITHOUT_LOSS = [
-    "LZWDecode",
-    "LZW",
-    "FlateDecode",
-    "Fl",
-    "ASCII85Decode",
-    "A85",
-    "ASCIIHexDecode",
-    "AHx",
-    "RunLengthDecode",
-    "RL",
-    "CCITTFaxDecode",
-    "CCF",
-    "JBIG2Decode",
-]
+def rapidocr_timings() -> Dict[str, Union[int, float]]:
+    """Time spent loading RapidOCR models versus running them, in this process."""
+    return _OCR_POOL.timings()
 
 
 def extract_from_images_with_rapidocr(
@@ -54,6 +168,9 @@ def extract_from_images_with_rapidocr(
 ) -> str:
     """Extract text from images with RapidOCR.
 
+    The engine comes from a process-wide pool, so models are loaded once and
+    shared by every page and call.
+
     Args:
         images: Images to extract text from.
 
@@ -63,26 +180,272 @@ def extract_from_images_with_rapidocr(
     Raises:
         ImportError: If `rapidocr-onnxruntime` package is not installed.
     """
+    return "".join(map(_recognize_image_text, images))
+
+
+def _recognize_image_text(image: Union[np.ndarray, bytes]) -> str:
+    """Text of one image, one line per recognized text box."""
+    result = _OCR_POOL.recognize(image)
+    if not result:
+        return ""
+    return "\n".join(text[1] for text in result)
+
+
+def _warm_up_ocr_worker() -> None:
+    """Load the OCR engine of a new worker before its first image. Without
+    `rapidocr-onnxruntime`, the first image reports the ImportError."""
     try:
-        from rapidocr_onnxruntime import RapidOCR
+        _OCR_POOL.warm_up(1)
     except ImportError:
-        raise ImportError(
-            "`rapidocr-onnxruntime` package not found, please install it with "
-            "`pip install rapidocr-onnxruntime`"
+        pass
+
+
+class _PageImage(NamedTuple):
+    """An image drawn on a page, identified by its PDF object or content."""
+
+    key: Hashable
+    #: Decoded image, ``None`` when the same image was met earlier in the document.
+    data: Any
+
+
+class _DocumentImages:
+    """Image work already done for one document.
+
+    Logos, letterheads and watermarks are usually one image drawn on every
+    page; it is decoded and recognized the first time only, and later pages
+    reuse its OCR text.
+    """
+
+    def __init__(self, parser: str = "") -> None:
+        """Initialize the store.
+
+        Args:
+            parser: Name of the parser, the label of the image metrics.
+        """
+        self.parser = parser
+        self._texts: Dict[Hashable, str] = {}
+
+    def add(
+        self, key: Hashable, decode: Callable[[], Any]
+    ) -> Optional[_PageImage]:
+        """Image with ``key`` found on a page; ``decode`` runs only the first time
+        the key is seen. Returns ``None`` for images that cannot be decoded."""
+        if key in self._texts:
+            PdfMetrics.count("images_reused", 1, self.parser)
+            return _PageImage(key, None)
+        PdfMetrics.count("images", 1, self.parser)
+        with PdfMetrics.stage("image_decode", self.parser):
+            data = decode()
+        if data is None:
+            self._texts[key] = ""
+            return None
+        self._texts[key] = ""  # until the OCR text is recorded
+        return _PageImage(key, data)
+
+    def record(self, images: Sequence[_PageImage], texts: Iterable[str]) -> None:
+        """Store the OCR text of newly decoded images."""
+        for image, text in zip(images, texts):
+            self._texts[image.key] = text
+
+    def text(self, images: Sequence[_PageImage]) -> str:
+        """OCR text of a page's images, in the order they were found."""
+        return "".join(self._texts[image.key] for image in images)
+
+
+def _decode_stream_image(stream: Any) -> Any:
+    """Decode a pdfminer image stream for OCR, ``None`` for unsupported filters."""
+    image = PdfImages.from_pdfminer(stream)
+    return None if image is None else image.for_ocr()
+
+
+def _stream_key(stream: Any) -> Hashable:
+    """Identity of a pdfminer image stream: its object id, or a hash of its bytes
+    for inline images."""
+    if getattr(stream, "objid", None) is not None:
+        return ("obj", stream.objid)
+    raw = stream.rawdata if stream.rawdata is not None else stream.get_data()
+    return ("sha256", hashlib.sha256(raw).digest())
+
+
+class OCRBatcher:
+    """OCR stage that recognizes the images of many pages together.
+
+    Pages are held back until ``batch_size`` images have been collected or the
+    document ends. The batch is recognized by a pool of workers and every page
+    then gets the text of its own images appended, in page order.
+
+    The pool is started on the first batch and reused by every later one, for
+    any document, until `close`. Each worker loads its engine when it starts.
+    """
+
+    def __init__(
+        self, batch_size: int = 32, workers: int = 1, *, processes: bool = False
+    ) -> None:
+        """Initialize the OCR stage.
+
+        Args:
+            batch_size: Number of images recognized together.
+            workers: Number of threads, or processes, running OCR.
+            processes: Use worker processes instead of threads. Every process
+                       loads its own engine.
+        """
+        self.batch_size = batch_size
+        self.workers = workers
+        self.processes = processes
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Only the configuration travels to worker processes and into cache
+        # keys; every process starts its own pool.
+        return {"batch_size": self.batch_size, "workers": self.workers, "processes": self.processes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
+
+    def __enter__(self) -> "OCRBatcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut the worker pool down; a later batch starts a new one."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def run(
+        self,
+        pages: Iterable[Tuple[Document, Sequence[_PageImage]]],
+        seen: _DocumentImages,
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Append to each Document the OCR text of the images it came with."""
+        held: List[Tuple[Document, Sequence[_PageImage]]] = []
+        images: List[_PageImage] = []
+        for document, page_images in pages:
+            held.append((document, page_images))
+            images.extend(image for image in page_images if image.data is not None)
+            # Pages without images ahead of them need not wait for a batch.
+            if len(images) >= self.batch_size or not images:
+                yield from self._recognize(held, images, seen)
+                held, images = [], []
+        yield from self._recognize(held, images, seen)
+
+    def _executor(self) -> Executor:
+        """The worker pool, started on first use."""
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        with self._lock:
+            if self._pool is None:
+                if self.processes:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_warm_up_ocr_worker
+                    )
+                else:
+                    _OCR_POOL.reserve(self.workers)
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers, initializer=_warm_up_ocr_worker
+                    )
+            return self._pool
+
+    def _recognize(
+        self,
+        held: List[Tuple[Document, Sequence[_PageImage]]],
+        images: List[_PageImage],
+        seen: _DocumentImages,
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        if images:
+            recognize = _recognize_image_text
+            if not self.processes:
+                # Worker threads report their OCR time to the caller's request too.
+                recognize = PdfMetrics.in_request(recognize)
+            seen.record(
+                images,
+                self._executor().map(
+                    recognize,
+                    [image.data for image in images],
+                    chunksize=max(1, len(images) // (4 * self.workers)),
+                ),
+            )
+        for document, page_images in held:
+            document.page_content += seen.text(page_images)
+            yield document
+
+
+def _with_ocr_text(
+    pages: Iterable[Tuple[Document, Sequence[_PageImage]]],
+    ocr_batcher: Optional[OCRBatcher],
+    seen: _DocumentImages,
+) -> Iterator[Document]:  # type: ignore[valid-type]
+    """Append to each Document the OCR text of the images it came with, page by
+    page or through ``ocr_batcher``. Images already met in the document are not
+    recognized again."""
+    if ocr_batcher is not None:
+        yield from ocr_batcher.run(pages, seen)
+        return
+    for document, images in pages:
+        document.page_content += _recognize_page_images(images, seen)
+        yield document
+
+
+def _recognize_page_images(
+    images: Sequence[_PageImage], seen: _DocumentImages
+) -> str:
+    """OCR text of one page's images, recognizing only those not seen before."""
+    new_images = [image for image in images if image.data is not None]
+    seen.record(new_images, map(_recognize_image_text, (i.data for i in new_images)))
+    return seen.text(images)
+
+
+def _plain_metadata(info: Mapping[str, Any]) -> Dict[str, Any]:
+    """The text and integer entries of a document information dictionary."""
+    return {
+        key: value
+        for key, value in info.items()
+        if isinstance(value, (str, int)) and not isinstance(value, bool)
+    }
+
+
+def _selected_pages(parser: BaseBlobParser, blob: Blob) -> Optional[List[int]]:  # type: ignore[valid-type]
+    """The pages chosen with the parser's ``pages`` option, ``None`` for all."""
+    if parser.pages is None:  # type: ignore[attr-defined]
+        return None
+    page_count, _ = parser._document_info(blob)  # type: ignore[attr-defined]
+    return select_pages(parser.pages, page_count)  # type: ignore[attr-defined]
+
+
+def _timed_lazy_parse(parser: BaseBlobParser, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
+    """Parse the selected pages of the blob, or only its metadata, recording the
+    bytes read and how long each page took."""
+    name = type(parser).__name__
+    PdfMetrics.count("bytes_read", PdfMetrics.blob_size(blob), name)
+    if parser.metadata_only:  # type: ignore[attr-defined]
+        with PdfMetrics.stage("metadata", name):
+            page_count, info = parser._document_info(blob)  # type: ignore[attr-defined]
+        yield Document(
+            page_content="",
+            metadata={**info, "source": blob.source, "total_pages": page_count},  # type: ignore[attr-defined]
         )
-    ocr = RapidOCR()
-    text = ""
-    for img in images:
-        result, _ = ocr(img)
-        if result:
-            result = [text[1] for text in result]
-            text += "\n".join(result)
-    return text
+        return
+    page_numbers = _selected_pages(parser, blob)
+    yield from PdfMetrics.timed_pages(parser._lazy_parse_pages(blob, page_numbers), name)  # type: ignore[attr-defined]
 
 
 class PyPDFParser(BaseBlobParser):
     """Load `PDF` using `pypdf`"""
 
+    #: Attributes that change the Documents, see `PdfCache.parser_fingerprint`.
+    output_options = (
+        "password",
+        "extract_images",
+        "extraction_mode",
+        "extraction_kwargs",
+        "pages",
+        "metadata_only",
+    )
+
     def __init__(
         self,
         password: Optional[Union[str, bytes]] = None,
@@ -90,14 +453,26 @@ class PyPDFParser(BaseBlobParser):
         *,
         extraction_mode: str = "plain",
         extraction_kwargs: Optional[Dict[str, Any]] = None,
+        ocr_batcher: Optional[OCRBatcher] = None,
+        pages: Optional[PageSelection] = None,
+        metadata_only: bool = False,
     ):
         self.password = password
         self.extract_images = extract_images
         self.extraction_mode = extraction_mode
         self.extraction_kwargs = extraction_kwargs or {}
+        self.ocr_batcher = ocr_batcher
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
+        yield from _timed_lazy_parse(self, blob)
+
+    def _lazy_parse_pages(
+        self, blob: Blob, page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse the given zero-based pages, in ascending order, or every page."""
         try:
             import pypdf
         except ImportError:
@@ -118,59 +493,153 @@ class PyPDFParser(BaseBlobParser):
                     **self.extraction_kwargs,  # type: ignore[arg-type]
                 )
 
+        name = type(self).__name__
         with blob.as_bytes_io() as pdf_file_obj:  # type: ignore[attr-defined]
-            pdf_reader = pypdf.PdfReader(pdf_file_obj, password=self.password)
+            with PdfMetrics.stage("open", name):
+                pdf_reader = pypdf.PdfReader(pdf_file_obj, password=self.password)
+            if page_numbers is None:
+                page_numbers = range(len(pdf_reader.pages))
+
+            def pages() -> Iterator[Tuple[Document, List[Any]]]:
+                for page_number in page_numbers:
+                    page = pdf_reader.pages[page_number]
+                    with PdfMetrics.stage("extract_text", name):
+                        text = _extract_text_from_page(page=page)
+                    yield (
+                        Document(
+                            page_content=text,
+                            metadata={"source": blob.source, "page": page_number},  # type: ignore[attr-defined]
+                        ),
+                        self._get_images_from_page(page, seen),
+                    )
 
-            yield from [
-                Document(
-                    page_content=_extract_text_from_page(page=page)
-                    + self._extract_images_from_page(page),
-                    metadata={"source": blob.source, "page": page_number},  # type: ignore[attr-defined]
-                )
-                for page_number, page in enumerate(pdf_reader.pages)
-            ]
+            seen = _DocumentImages(type(self).__name__)
+            yield from _with_ocr_text(pages(), self.ocr_batcher, seen)
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:  # type: ignore[valid-type]
+        """Number of pages and metadata of the blob, without parsing any page."""
+        import pypdf
+
+        with blob.as_bytes_io() as pdf_file_obj:  # type: ignore[attr-defined]
+            pdf_reader = pypdf.PdfReader(pdf_file_obj, password=self.password)
+            info = {
+                key.lstrip("/"): value
+                for key, value in (pdf_reader.metadata or {}).items()
+            }
+            return len(pdf_reader.pages), _plain_metadata(info)
 
     def _extract_images_from_page(self, page: pypdf._page.PageObject) -> str:
         """Extract images from page and get the text with RapidOCR."""
+        seen = _DocumentImages(type(self).__name__)
+        return _recognize_page_images(
+            self._get_images_from_page(page, seen), seen
+        )
+
+    def _get_images_from_page(
+        self, page: pypdf._page.PageObject, seen: _DocumentImages
+    ) -> List[_PageImage]:
+        """Decode the images of the page for OCR, except those already seen."""
         if not self.extract_images or "/XObject" not in page["/Resources"].keys():  # type: ignore[attr-defined]
-            return ""
+            return []
+
+        import pypdf
 
         xObject = page["/Resources"]["/XObject"].get_object()  # type: ignore
         images = []
         for obj in xObject:
             if xObject[obj]["/Subtype"] == "/Image":
-                if xObject[obj]["/Filter"][1:] in _PDF_FILTER_WITHOUT_LOSS:
-                    height, width = xObject[obj]["/Height"], xObject[obj]["/Width"]
-
-                    images.append(
-                        np.frombuffer(xObject[obj].get_data(), dtype=np.uint8).reshape(
-                            height, width, -1
-                        )
-                    )
-                elif xObject[obj]["/Filter"][1:] in _PDF_FILTER_WITH_LOSS:
-                    images.append(xObject[obj].get_data())
+                ref = xObject.raw_get(obj)
+                if isinstance(ref, pypdf.generic.IndirectObject):
+                    key: Hashable = ("obj", ref.idnum, ref.generation)
                 else:
-                    warnings.warn("Unknown PDF Filter!")
-        return extract_from_images_with_rapidocr(images)
+                    key = ("sha256", hashlib.sha256(xObject[obj].get_data()).digest())
+                image = seen.add(key, functools.partial(self._decode_image, xObject[obj]))
+                if image is not None:
+                    images.append(image)
+        return images
+
+    @staticmethod
+    def _decode_image(xobject: Any) -> Any:
+        """Decode an image XObject for OCR, ``None`` for unsupported filters."""
+        image = PdfImages.from_pypdf(xobject)
+        return None if image is None else image.for_ocr()
+
+
+def _layout_text(layout: pdfminer.layout.LTPage) -> str:
+    """Text of a page layout, exactly as ``TextConverter`` writes it."""
+    from pdfminer.layout import LTContainer, LTText, LTTextBox
+
+    parts: List[str] = []
+
+    def render(item: Any) -> None:
+        if isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            parts.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            parts.append("\n")
+
+    render(layout)
+    parts.append("\f")
+    return "".join(parts)
+
+
+def _layout_images(layout: pdfminer.layout.LTPage) -> Iterator[pdfminer.layout.LTImage]:
+    """Every image in a page layout, including those nested in figures."""
+    from pdfminer.layout import LTContainer, LTImage
+
+    for item in layout:
+        if isinstance(item, LTImage):
+            yield item
+        elif isinstance(item, LTContainer):
+            yield from _layout_images(item)
 
 
 class PDFMinerParser(BaseBlobParser):
     """Parse `PDF` using `PDFMiner`."""
 
-    def __init__(self, extract_images: bool = False, *, concatenate_pages: bool = True):
+    output_options = ("extract_images", "concatenate_pages", "pages", "metadata_only")
+
+    def __init__(
+        self,
+        extract_images: bool = False,
+        *,
+        concatenate_pages: bool = True,
+        ocr_batcher: Optional[OCRBatcher] = None,
+        pages: Optional[PageSelection] = None,
+        metadata_only: bool = False,
+    ):
         """Initialize a parser based on PDFMiner.
 
         Args:
             extract_images: Whether to extract images from PDF.
             concatenate_pages: If True, concatenate all PDF pages into one a single
                                document. Otherwise, return one document per page.
+            ocr_batcher: OCR stage that recognizes images of many pages together,
+                         instead of page by page.
+            pages: Pages to parse, e.g. ``"0-4,9"`` or ``range(5)``, see
+                   `PdfPages`; every page by default.
+            metadata_only: Yield one Document with the page count and document
+                           metadata instead of parsing any page.
         """
         self.extract_images = extract_images
         self.concatenate_pages = concatenate_pages
+        self.ocr_batcher = ocr_batcher
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
+        yield from _timed_lazy_parse(self, blob)
 
+    def _lazy_parse_pages(
+        self, blob: Blob, page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse the given zero-based pages, in ascending order, or every page.
+
+        With ``concatenate_pages`` the given pages make up the one Document.
+        """
         if not self.extract_images:
             try:
                 from pdfminer.high_level import extract_text
@@ -180,94 +649,197 @@ class PDFMinerParser(BaseBlobParser):
                     "`pip install pdfminer.six`"
                 )
 
+            name = type(self).__name__
             with blob.as_bytes_io() as pdf_file_obj:  # type: ignore[attr-defined]
                 if self.concatenate_pages:
-                    text = extract_text(pdf_file_obj)
+                    with PdfMetrics.stage("extract_text", name):
+                        text = extract_text(pdf_file_obj, page_numbers=page_numbers)
                     metadata = {"source": blob.source}  # type: ignore[attr-defined]
                     yield Document(page_content=text, metadata=metadata)
                 else:
+                    # One interpreter over one walk of the page tree; calling
+                    # extract_text per page re-parses the document every time.
+                    import io
+
+                    from pdfminer.converter import TextConverter
+                    from pdfminer.layout import LAParams
+                    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
                     from pdfminer.pdfpage import PDFPage
 
-                    pages = PDFPage.get_pages(pdf_file_obj)
-                    for i, _ in enumerate(pages):
-                        text = extract_text(pdf_file_obj, page_numbers=[i])
+                    wanted = None if page_numbers is None else set(page_numbers)
+                    last = None if wanted is None else max(wanted, default=-1)
+                    text_io = io.StringIO()
+                    rsrcmgr = PDFResourceManager()
+                    device = TextConverter(rsrcmgr, text_io, laparams=LAParams())
+                    interpreter = PDFPageInterpreter(rsrcmgr, device)
+                    for i, page in enumerate(PDFPage.get_pages(pdf_file_obj)):
+                        if last is not None and i > last:
+                            break
+                        if wanted is not None and i not in wanted:
+                            continue
+                        with PdfMetrics.stage("extract_text", name):
+                            interpreter.process_page(page)
+                        text = text_io.getvalue()
+                        text_io.truncate(0)
+                        text_io.seek(0)
                         metadata = {"source": blob.source, "page": str(i)}  # type: ignore[attr-defined]
                         yield Document(page_content=text, metadata=metadata)
         else:
             import io
 
-            from pdfminer.converter import PDFPageAggregator, TextConverter
+            from pdfminer.converter import PDFPageAggregator
             from pdfminer.layout import LAParams
             from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
             from pdfminer.pdfpage import PDFPage
 
-            text_io = io.StringIO()
+            name = type(self).__name__
+            wanted = None if page_numbers is None else set(page_numbers)
+            last = None if wanted is None else max(wanted, default=-1)
             with blob.as_bytes_io() as pdf_file_obj:  # type: ignore[attr-defined]
                 pages = PDFPage.get_pages(pdf_file_obj)
                 rsrcmgr = PDFResourceManager()
-                device_for_text = TextConverter(rsrcmgr, text_io, laparams=LAParams())
-                device_for_image = PDFPageAggregator(rsrcmgr, laparams=LAParams())
-                interpreter_for_text = PDFPageInterpreter(rsrcmgr, device_for_text)
-                interpreter_for_image = PDFPageInterpreter(rsrcmgr, device_for_image)
-                for i, page in enumerate(pages):
-                    interpreter_for_text.process_page(page)
-                    interpreter_for_image.process_page(page)
-                    content = text_io.getvalue() + self._extract_images_from_page(
-                        device_for_image.get_result()
-                    )
-                    text_io.truncate(0)
-                    text_io.seek(0)
-                    metadata = {"source": blob.source, "page": str(i)}  # type: ignore[attr-defined]
-                    yield Document(page_content=content, metadata=metadata)
+                # One interpretation and layout analysis per page; the text and
+                # the images are both read from the resulting layout.
+                device = PDFPageAggregator(rsrcmgr, laparams=LAParams())
+                interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+                def parsed_pages() -> Iterator[Tuple[Document, List[Any]]]:
+                    for i, page in enumerate(pages):
+                        if last is not None and i > last:
+                            break
+                        if wanted is not None and i not in wanted:
+                            continue
+                        with PdfMetrics.stage("layout", name):
+                            interpreter.process_page(page)
+                        layout = device.get_result()
+                        with PdfMetrics.stage("extract_text", name):
+                            content = _layout_text(layout)
+                        metadata = {"source": blob.source, "page": str(i)}  # type: ignore[attr-defined]
+                        yield (
+                            Document(page_content=content, metadata=metadata),
+                            self._get_images_from_page(layout, seen),
+                        )
+
+                seen = _DocumentImages(type(self).__name__)
+                yield from _with_ocr_text(parsed_pages(), self.ocr_batcher, seen)
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:  # type: ignore[valid-type]
+        """Number of pages and metadata of the blob, without parsing any page."""
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdftypes import resolve1
+        from pdfminer.utils import decode_text
+
+        with blob.as_bytes_io() as pdf_file_obj:  # type: ignore[attr-defined]
+            document = PDFDocument(PDFParser(pdf_file_obj))
+            info = {}
+            for entries in document.info:
+                for key, value in entries.items():
+                    value = resolve1(value)
+                    info[key] = decode_text(value) if isinstance(value, bytes) else value
+            return resolve1(document.catalog["Pages"])["Count"], _plain_metadata(info)
 
     def _extract_images_from_page(self, page: pdfminer.layout.LTPage) -> str:
         """Extract images from page and get the text with RapidOCR."""
-        import pdfminer
-
-        def get_image(layout_object: Any) -> Any:
-            if isinstance(layout_object, pdfminer.layout.LTImage):
-                return layout_object
-            if isinstance(layout_object, pdfminer.layout.LTContainer):
-                for child in layout_object:
-                    return get_image(child)
-            else:
-                return None
+        seen = _DocumentImages(type(self).__name__)
+        return _recognize_page_images(
+            self._get_images_from_page(page, seen), seen
+        )
 
+    def _get_images_from_page(
+        self, page: pdfminer.layout.LTPage, seen: _DocumentImages
+    ) -> List[_PageImage]:
+        """Decode the images of the page for OCR, except those already seen."""
         images = []
-
-        for img in list(filter(bool, map(get_image, page))):
-            if img.stream["Filter"].name in _PDF_FILTER_WITHOUT_LOSS:
-                images.append(
-                    np.frombuffer(img.stream.get_data(), dtype=np.uint8).reshape(
-                        img.stream["Height"], img.stream["Width"], -1
-                    )
-                )
-            elif img.stream["Filter"].name in _PDF_FILTER_WITH_LOSS:
-                images.append(img.stream.get_data())
-            else:
-                warnings.warn("Unknown PDF Filter!")
-        return extract_from_images_with_rapidocr(images)
+        for img in _layout_images(page):
+            image = seen.add(
+                _stream_key(img.stream),
+                functools.partial(_decode_stream_image, img.stream),
+            )
+            if image is not None:
+                images.append(image)
+        return images
 
 
 class PyMuPDFParser(BaseBlobParser):
     """Parse `PDF` using `PyMuPDF`."""
 
+    output_options = ("text_kwargs", "extract_images", "pages", "metadata_only")
+
     def __init__(
         self,
         text_kwargs: Optional[Mapping[str, Any]] = None,
         extract_images: bool = False,
+        *,
+        ocr_batcher: Optional[OCRBatcher] = None,
+        pages: Optional[PageSelection] = None,
+        metadata_only: bool = False,
     ) -> None:
         """Initialize the parser.
 
         Args:
             text_kwargs: Keyword arguments to pass to ``fitz.Page.get_text()``.
+            ocr_batcher: OCR stage that recognizes images of many pages together,
+                         instead of page by page.
+            pages: Pages to parse, e.g. ``"0-4,9"`` or ``range(5)``, see
+                   `PdfPages`; every page by default.
+            metadata_only: Yield one Document with the page count and document
+                           metadata instead of parsing any page.
         """
         self.text_kwargs = text_kwargs or {}
         self.extract_images = extract_images
+        self.ocr_batcher = ocr_batcher
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
+        yield from _timed_lazy_parse(self, blob)
+
+    def _lazy_parse_pages(
+        self, blob: Blob, page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse the given zero-based pages, in ascending order, or every page."""
+        import fitz
+
+        name = type(self).__name__
+        with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
+            with PdfMetrics.stage("open", name):
+                if blob.data is None:  # type: ignore[attr-defined]
+                    doc = fitz.open(file_path)
+                else:
+                    doc = fitz.open(stream=file_path, filetype="pdf")
+
+            if page_numbers is None:
+                page_numbers = range(len(doc))
+
+            # ``doc.metadata`` is rebuilt on every access, read it once.
+            document_metadata = self._document_metadata(doc, blob)
+
+            def pages() -> Iterator[Tuple[Document, List[Any]]]:
+                for page_number in page_numbers:
+                    page = doc[page_number]
+                    with PdfMetrics.stage("extract_text", name):
+                        text = page.get_text(**self.text_kwargs)
+                    yield (
+                        Document(
+                            page_content=text,
+                            metadata=self._extract_metadata(doc, page, blob, document_metadata),
+                        ),
+                        self._get_images_from_page(doc, page, seen),
+                    )
 
+            seen = _DocumentImages(type(self).__name__)
+            for document in _with_ocr_text(pages(), self.ocr_batcher, seen):
+                if not document.page_content:
+                    warnings.warn(
+                        f"Warning: Empty content on page "
+                        f"{document.metadata['page']} of document {blob.source}"
+                    )
+                yield document
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:  # type: ignore[valid-type]
+        """Number of pages and metadata of the blob, without parsing any page."""
         import fitz
 
         with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
@@ -275,77 +847,90 @@ class PyMuPDFParser(BaseBlobParser):
                 doc = fitz.open(file_path)
             else:
                 doc = fitz.open(stream=file_path, filetype="pdf")
-
-            yield from [
-                Document(
-                    page_content=self._get_page_content(doc, page, blob),
-                    metadata=self._extract_metadata(doc, page, blob),
-                )
-                for page in doc
-            ]
-
-    def _get_page_content(
-        self, doc: fitz.fitz.Document, page: fitz.fitz.Page, blob: Blob
-    ) -> str:
-        """
-        Get the text of the page using PyMuPDF and RapidOCR and issue a warning
-        if it is empty.
-        """
-        content = page.get_text(**self.text_kwargs) + self._extract_images_from_page(
-            doc, page
-        )
-
-        if not content:
-            warnings.warn(
-                f"Warning: Empty content on page "
-                f"{page.number} of document {blob.source}"
-            )
-
-        return content
+            with doc:
+                return len(doc), _plain_metadata(doc.metadata or {})
+
+    def _document_metadata(self, doc: fitz.fitz.Document, blob: Blob) -> dict:
+        """The metadata shared by every page of the document."""
+        return {
+            "source": blob.source,  # type: ignore[attr-defined]
+            "file_path": blob.source,  # type: ignore[attr-defined]
+            "total_pages": len(doc),
+            **_plain_metadata(doc.metadata or {}),
+        }
 
     def _extract_metadata(
-        self, doc: fitz.fitz.Document, page: fitz.fitz.Page, blob: Blob
+        self,
+        doc: fitz.fitz.Document,
+        page: fitz.fitz.Page,
+        blob: Blob,
+        document_metadata: Optional[dict] = None,
     ) -> dict:
-        """Extract metadata from the document and page."""
-        return dict(
-            {
-                "source": blob.source,  # type: ignore[attr-defined]
-                "file_path": blob.source,  # type: ignore[attr-defined]
-                "page": page.number,
-                "total_pages": len(doc),
-            },
-            **{
-                k: doc.metadata[k]
-                for k in doc.metadata
-                if isinstance(doc.metadata[k], (str, int))
-            },
-        )
+        """Extract metadata from the document and page.
+
+        Args:
+            document_metadata: The result of `_document_metadata` for ``doc``,
+                               to avoid reading it again for every page.
+        """
+        if document_metadata is None:
+            document_metadata = self._document_metadata(doc, blob)
+        return {**document_metadata, "page": page.number}
 
     def _extract_images_from_page(
         self, doc: fitz.fitz.Document, page: fitz.fitz.Page
     ) -> str:
         """Extract images from page and get the text with RapidOCR."""
+        seen = _DocumentImages(type(self).__name__)
+        return _recognize_page_images(
+            self._get_images_from_page(doc, page, seen), seen
+        )
+
+    def _get_images_from_page(
+        self, doc: fitz.fitz.Document, page: fitz.fitz.Page, seen: _DocumentImages
+    ) -> List[_PageImage]:
+        """Decode the images of the page for OCR, except those already seen."""
         if not self.extract_images:
-            return ""
+            return []
         import fitz
+        import numpy as np
+
+        def decode(xref: int, smask: int) -> Any:
+            # e.g. "/DCTDecode" or "[/FlateDecode /DCTDecode]"
+            filters = doc.xref_get_key(xref, "Filter")[1].replace("/", " ").strip("[] ").split()
+            if filters and filters[-1] in PdfImages.ENCODED_FILTERS:
+                return doc.extract_image(xref)["image"]
+            pix = fitz.Pixmap(doc, xref)
+            if pix.colorspace is not None and pix.colorspace.n not in (1, 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            if smask:
+                pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+            rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+            pixels = rows[:, : pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+            return PdfImages.DecodedImage(pixels, None, ".png").for_ocr()
 
         img_list = page.get_images()
         imgs = []
         for img in img_list:
-            xref = img[0]
-            pix = fitz.Pixmap(doc, xref)
-            imgs.append(
-                np.frombuffer(pix.samples, dtype=np.uint8).reshape(
-                    pix.height, pix.width, -1
-                )
-            )
-        return extract_from_images_with_rapidocr(imgs)
+            xref, smask = img[0], img[1]
+            image = seen.add(("obj", xref), functools.partial(decode, xref, smask))
+            if image is not None:
+                imgs.append(image)
+        return imgs
 
 
 class PyPDFium2Parser(BaseBlobParser):
     """Parse `PDF` with `PyPDFium2`."""
 
-    def __init__(self, extract_images: bool = False) -> None:
+    output_options = ("extract_images", "pages", "metadata_only")
+
+    def __init__(
+        self,
+        extract_images: bool = False,
+        *,
+        ocr_batcher: Optional[OCRBatcher] = None,
+        pages: Optional[PageSelection] = None,
+        metadata_only: bool = False,
+    ) -> None:
         """Initialize the parser."""
         try:
             import pypdfium2  # noqa:F401
@@ -355,113 +940,575 @@ class PyPDFium2Parser(BaseBlobParser):
                 " `pip install pypdfium2`"
             )
         self.extract_images = extract_images
+        self.ocr_batcher = ocr_batcher
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
+        yield from _timed_lazy_parse(self, blob)
+
+    def _lazy_parse_pages(
+        self, blob: Blob, page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse the given zero-based pages, in ascending order, or every page."""
         import pypdfium2
 
         # pypdfium2 is really finicky with respect to closing things,
         # if done incorrectly creates seg faults.
+        name = type(self).__name__
+        with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
+            with PdfMetrics.stage("open", name):
+                pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
+            try:
+                if page_numbers is None:
+                    page_numbers = range(len(pdf_reader))
+
+                def pages() -> Iterator[Tuple[Document, List[Any]]]:
+                    for page_number in page_numbers:
+                        page = pdf_reader[page_number]
+                        with PdfMetrics.stage("extract_text", name):
+                            text_page = page.get_textpage()
+                            content = text_page.get_text_range()
+                            text_page.close()
+                        images = self._get_images_from_page(page, seen)
+                        page.close()
+                        metadata = {"source": blob.source, "page": page_number}  # type: ignore[attr-defined]
+                        yield Document(page_content=content + "\n", metadata=metadata), images
+
+                seen = _DocumentImages(type(self).__name__)
+                yield from _with_ocr_text(pages(), self.ocr_batcher, seen)
+            finally:
+                pdf_reader.close()
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:  # type: ignore[valid-type]
+        """Number of pages and metadata of the blob, without parsing any page."""
+        import pypdfium2
+
         with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
             pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
             try:
-                for page_number, page in enumerate(pdf_reader):
-                    text_page = page.get_textpage()
-                    content = text_page.get_text_range()
-                    text_page.close()
-                    content += "\n" + self._extract_images_from_page(page)
-                    page.close()
-                    metadata = {"source": blob.source, "page": page_number}  # type: ignore[attr-defined]
-                    yield Document(page_content=content, metadata=metadata)
+                return len(pdf_reader), _plain_metadata(pdf_reader.get_metadata_dict())
             finally:
                 pdf_reader.close()
 
     def _extract_images_from_page(self, page: pypdfium2._helpers.page.PdfPage) -> str:
         """Extract images from page and get the text with RapidOCR."""
+        seen = _DocumentImages(type(self).__name__)
+        return _recognize_page_images(
+            self._get_images_from_page(page, seen), seen
+        )
+
+    def _get_images_from_page(
+        self, page: pypdfium2._helpers.page.PdfPage, seen: _DocumentImages
+    ) -> List[_PageImage]:
+        """Decode the images of the page for OCR, except those already seen."""
         if not self.extract_images:
-            return ""
+            return []
 
         import pypdfium2.raw as pdfium_c
 
-        images = list(page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)))
+        def decode(obj: Any) -> Any:
+            filters = obj.get_filters()
+            if filters and filters[-1] in PdfImages.ENCODED_FILTERS:
+                return obj.get_data(decode_simple=True)
+            bitmap = obj.get_bitmap()
+            return PdfImages.from_bitmap(bitmap.to_numpy(), bitmap.mode).for_ocr()
 
-        images = list(map(lambda x: x.get_bitmap().to_numpy(), images))
-        return extract_from_images_with_rapidocr(images)
+        images = []
+        for obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,)):
+            # pdfium does not expose object numbers, so identify images by
+            # their still-encoded bytes, which is cheap next to decoding.
+            key = ("sha256", hashlib.sha256(obj.get_data(decode_simple=False)).digest())
+            image = seen.add(key, functools.partial(decode, obj))
+            if image is not None:
+                images.append(image)
+        return images
 
 
 class PDFPlumberParser(BaseBlobParser):
     """Parse `PDF` with `PDFPlumber`."""
 
+    output_options = ("text_kwargs", "dedupe", "extract_images", "pages", "metadata_only")
+
     def __init__(
         self,
         text_kwargs: Optional[Mapping[str, Any]] = None,
         dedupe: bool = False,
         extract_images: bool = False,
+        *,
+        ocr_batcher: Optional[OCRBatcher] = None,
+        pages: Optional[PageSelection] = None,
+        metadata_only: bool = False,
     ) -> None:
         """Initialize the parser.
 
         Args:
             text_kwargs: Keyword arguments to pass to ``pdfplumber.Page.extract_text()``
             dedupe: Avoiding the error of duplicate characters if `dedupe=True`.
+            ocr_batcher: OCR stage that recognizes images of many pages together,
+                         instead of page by page.
+            pages: Pages to parse, e.g. ``"0-4,9"`` or ``range(5)``, see
+                   `PdfPages`; every page by default.
+            metadata_only: Yield one Document with the page count and document
+                           metadata instead of parsing any page.
         """
         self.text_kwargs = text_kwargs or {}
         self.dedupe = dedupe
         self.extract_images = extract_images
+        self.ocr_batcher = ocr_batcher
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
+        yield from _timed_lazy_parse(self, blob)
+
+    def _lazy_parse_pages(
+        self, blob: Blob, page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse the given zero-based pages, in ascending order, or every page."""
         import pdfplumber
 
         with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
-            doc = pdfplumber.open(file_path)  # open document
-
-            yield from [
-                Document(
-                    page_content=self._process_page_content(page)
-                    + "\n"
-                    + self._extract_images_from_page(page),
-                    metadata=dict(
-                        {
-                            "source": blob.source,  # type: ignore[attr-defined]
-                            "file_path": blob.source,  # type: ignore[attr-defined]
-                            "page": page.page_number - 1,
-                            "total_pages": len(doc.pages),
-                        },
-                        **{
-                            k: doc.metadata[k]
-                            for k in doc.metadata
-                            if type(doc.metadata[k]) in [str, int]
-                        },
-                    ),
-                )
-                for page in doc.pages
-            ]
+            with PdfMetrics.stage("open", type(self).__name__):
+                doc = pdfplumber.open(file_path)
+            with doc:
+                if page_numbers is None:
+                    page_numbers = range(len(doc.pages))
+
+                document_metadata = {
+                    "source": blob.source,  # type: ignore[attr-defined]
+                    "file_path": blob.source,  # type: ignore[attr-defined]
+                    "total_pages": len(doc.pages),
+                    **_plain_metadata(doc.metadata),
+                }
+
+                def pages() -> Iterator[Tuple[Document, List[Any]]]:
+                    for page in (doc.pages[i] for i in page_numbers):
+                        yield (
+                            Document(
+                                page_content=self._process_page_content(page) + "\n",
+                                # Document copies its metadata, it cannot be shared.
+                                metadata={**document_metadata, "page": page.page_number - 1},
+                            ),
+                            self._get_images_from_page(page, seen),
+                        )
+                        # Drop the page's cached objects and layout once it is consumed.
+                        page.flush_cache()
+
+                seen = _DocumentImages(type(self).__name__)
+                yield from _with_ocr_text(pages(), self.ocr_batcher, seen)
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:  # type: ignore[valid-type]
+        """Number of pages and metadata of the blob, without parsing any page."""
+        import pdfplumber
+        from pdfminer.pdftypes import resolve1
+
+        with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
+            with pdfplumber.open(file_path) as doc:
+                # The page tree's count, ``doc.pages`` would load every page.
+                page_count = resolve1(doc.doc.catalog["Pages"])["Count"]
+                return page_count, _plain_metadata(doc.metadata)
 
     def _process_page_content(self, page: pdfplumber.page.Page) -> str:
         """Process the page content based on dedupe."""
+        name = type(self).__name__
         if self.dedupe:
-            return page.dedupe_chars().extract_text(**self.text_kwargs)
-        return page.extract_text(**self.text_kwargs)
+            with PdfMetrics.stage("dedupe", name):
+                page = page.dedupe_chars()
+        with PdfMetrics.stage("extract_text", name):
+            return page.extract_text(**self.text_kwargs)
 
     def _extract_images_from_page(self, page: pdfplumber.page.Page) -> str:
         """Extract images from page and get the text with RapidOCR."""
+        seen = _DocumentImages(type(self).__name__)
+        return _recognize_page_images(
+            self._get_images_from_page(page, seen), seen
+        )
+
+    def _get_images_from_page(
+        self, page: pdfplumber.page.Page, seen: _DocumentImages
+    ) -> List[_PageImage]:
+        """Decode the images of the page for OCR, except those already seen."""
         if not self.extract_images:
-            return ""
+            return []
 
         images = []
         for img in page.images:
-            if img["stream"]["Filter"].name in _PDF_FILTER_WITHOUT_LOSS:
-                images.append(
-                    np.frombuffer(img["stream"].get_data(), dtype=np.uint8).reshape(
-                        img["stream"]["Height"], img["stream"]["Width"], -1
+            image = seen.add(
+                _stream_key(img["stream"]),
+                functools.partial(_decode_stream_image, img["stream"]),
+            )
+            if image is not None:
+                images.append(image)
+
+        return images
+
+
+class AdaptivePDFParser(BaseBlobParser):
+    """Parse `PDF` with `PyPDFium2`, running OCR only on pages that need it.
+
+    The text layer of every page is read first, which is cheap, and the number
+    of non-blank characters sorts the page into one of three routes:
+
+    * ``text``: born-digital, at least ``min_chars`` characters. The text layer
+      is used as is and the page's images are ignored.
+    * ``mixed``: some text, but fewer than ``min_chars`` characters. The text
+      layer is kept and the images embedded in the page are OCR'd.
+    * ``scanned``: fewer than ``scanned_chars`` characters. The page is
+      rendered and the whole bitmap is OCR'd.
+
+    Every Document records its ``route`` and text layer ``chars`` in metadata.
+    """
+
+    output_options = ("min_chars", "scanned_chars", "render_scale", "pages", "metadata_only")
+
+    def __init__(
+        self,
+        min_chars: int = 100,
+        scanned_chars: int = 10,
+        render_scale: float = 2.0,
+        *,
+        ocr_batcher: Optional[OCRBatcher] = None,
+        pages: Optional[PageSelection] = None,
+        metadata_only: bool = False,
+    ) -> None:
+        """Initialize the parser.
+
+        Args:
+            min_chars: Characters a text layer needs for the page to be read
+                       without OCR.
+            scanned_chars: Below this many characters the page is rendered
+                           and OCR'd as a whole.
+            render_scale: Scale of the rendered page, 1 is 72 dpi.
+            ocr_batcher: Batch the OCR of the mixed and scanned pages.
+            pages: Pages to parse, e.g. ``"0-4,9"`` or ``range(5)``, see
+                   `PdfPages`; every page by default.
+            metadata_only: Yield one Document with the page count and document
+                           metadata instead of parsing any page.
+        """
+        if scanned_chars > min_chars:
+            raise ValueError("scanned_chars cannot be larger than min_chars")
+        self.min_chars = min_chars
+        self.scanned_chars = scanned_chars
+        self.render_scale = render_scale
+        self.ocr_batcher = ocr_batcher
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
+        # Embedded images of mixed pages are found and decoded the same way.
+        self._images = PyPDFium2Parser(extract_images=True)
+
+    def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Lazily parse the blob."""
+        yield from _timed_lazy_parse(self, blob)
+
+    def _lazy_parse_pages(
+        self, blob: Blob, page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse the given zero-based pages, in ascending order, or every page."""
+        import pypdfium2
+
+        name = type(self).__name__
+        with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
+            with PdfMetrics.stage("open", name):
+                pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
+            try:
+                if page_numbers is None:
+                    page_numbers = range(len(pdf_reader))
+
+                def pages() -> Iterator[Tuple[Document, List[Any]]]:
+                    for page_number in page_numbers:
+                        page = pdf_reader[page_number]
+                        with PdfMetrics.stage("extract_text", name):
+                            text_page = page.get_textpage()
+                            content = text_page.get_text_range()
+                            text_page.close()
+                        chars = len("".join(content.split()))
+                        route, images = self._route(page, page_number, chars, seen)
+                        page.close()
+                        PdfMetrics.count(f"route_{route}", 1, name)
+                        metadata = {
+                            "source": blob.source,  # type: ignore[attr-defined]
+                            "page": page_number,
+                            "route": route,
+                            "chars": chars,
+                        }
+                        yield Document(page_content=content + "\n", metadata=metadata), images
+
+                seen = _DocumentImages(name)
+                yield from _with_ocr_text(pages(), self.ocr_batcher, seen)
+            finally:
+                pdf_reader.close()
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:  # type: ignore[valid-type]
+        """Number of pages and metadata of the blob, without parsing any page."""
+        return self._images._document_info(blob)
+
+    def _route(
+        self,
+        page: pypdfium2._helpers.page.PdfPage,
+        page_number: int,
+        chars: int,
+        seen: _DocumentImages,
+    ) -> Tuple[str, List[_PageImage]]:
+        """Route of a page with ``chars`` characters of text, and the images to
+        OCR for it."""
+        if chars >= self.min_chars:
+            return "text", []
+        if chars >= self.scanned_chars:
+            return "mixed", self._images._get_images_from_page(page, seen)
+        image = seen.add(("render", page_number), functools.partial(self._render, page))
+        return "scanned", [image] if image is not None else []
+
+    def _render(self, page: pypdfium2._helpers.page.PdfPage) -> np.ndarray:
+        """Rasterize the page for OCR."""
+        import numpy as np
+
+        with PdfMetrics.stage("render", type(self).__name__):
+            bitmap = page.render(scale=self.render_scale)
+            # Copy the pixels out, OCR may run after the bitmap is closed.
+            pixels = np.array(bitmap.to_numpy())
+            bitmap.close()
+        return pixels
+
+
+@contextlib.contextmanager
+def _on_disk(blob: Blob) -> Iterator[Blob]:  # type: ignore[valid-type]
+    """The blob, or for one held in memory, a copy of it in a temporary file,
+    removed on exit, with the same ``source``.
+
+    Every task sent to a process pool pickles its blob; a path is cheap to
+    send, the bytes of the PDF are not.
+    """
+    if blob.data is None:  # type: ignore[attr-defined]
+        yield blob
+        return
+    import tempfile
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob.as_bytes())  # type: ignore[attr-defined]
+        yield type(blob)(
+            path=path,
+            mimetype=blob.mimetype,  # type: ignore[attr-defined]
+            encoding=blob.encoding,  # type: ignore[attr-defined]
+            metadata={**blob.metadata, "source": blob.source},  # type: ignore[attr-defined]
+        )
+    finally:
+        os.remove(path)
+
+
+def _parse_page_chunk(
+    parser: BaseBlobParser, blob: Blob, page_numbers: Sequence[int]
+) -> List[Document]:
+    """Worker entry point of `ParallelPDFParser`: parse one chunk of pages."""
+    return list(parser._lazy_parse_pages(blob, page_numbers))  # type: ignore[attr-defined]
+
+
+class ParallelPDFParser(BaseBlobParser):
+    """Parse the pages of a `PDF` across a pool of processes.
+
+    Wraps one of the local parsers above. The page range is split into chunks,
+    every worker opens the document itself and parses its chunk, and chunks are
+    yielded in page order as soon as they and all earlier chunks are done, so
+    the output is the same as the wrapped parser's.
+    """
+
+    output_options = ("parser",)
+
+    def __init__(
+        self,
+        parser: BaseBlobParser,
+        workers: Optional[int] = None,
+        *,
+        pages_per_task: int = 8,
+    ) -> None:
+        """Initialize the parser.
+
+        Args:
+            parser: Parser that does the work, e.g. `PDFPlumberParser`. It is
+                    pickled to every worker.
+            workers: Number of worker processes, defaults to the CPU count.
+            pages_per_task: Number of consecutive pages parsed per task.
+        """
+        if not hasattr(parser, "_lazy_parse_pages"):
+            raise ValueError(
+                f"{type(parser).__name__} cannot parse a subset of pages, "
+                "only the local PDF parsers can run in parallel"
+            )
+        self.parser = parser
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+
+    def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Lazily parse the blob."""
+        if getattr(self.parser, "concatenate_pages", False) or self.parser.metadata_only:  # type: ignore[attr-defined]
+            # A single document spanning all pages, or no pages at all.
+            yield from self.parser.lazy_parse(blob)
+            return
+
+        page_numbers = _selected_pages(self.parser, blob)
+        if page_numbers is None:
+            page_numbers = list(range(self.parser._document_info(blob)[0]))  # type: ignore[attr-defined]
+        chunks = [
+            page_numbers[start : start + self.pages_per_task]
+            for start in range(0, len(page_numbers), self.pages_per_task)
+        ]
+        workers = min(self.workers, len(chunks))
+        if workers <= 1:
+            yield from self.parser.lazy_parse(blob)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with _on_disk(blob) as blob, ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded window of chunks in flight so finished pages do not
+            # pile up while the caller is still consuming earlier ones.
+            todo = iter(chunks)
+            pending: Deque[Future] = collections.deque()
+            try:
+                for chunk in todo:
+                    pending.append(
+                        pool.submit(_parse_page_chunk, self.parser, blob, chunk)
                     )
-                )
-            elif img["stream"]["Filter"].name in _PDF_FILTER_WITH_LOSS:
-                images.append(img["stream"].get_data())
-            else:
-                warnings.warn("Unknown PDF Filter!")
+                    if len(pending) >= 2 * workers:
+                        break
+                while pending:
+                    documents = pending.popleft().result()
+                    chunk = next(todo, None)
+                    if chunk is not None:
+                        pending.append(
+                            pool.submit(_parse_page_chunk, self.parser, blob, chunk)
+                        )
+                    yield from documents
+            finally:
+                for future in pending:
+                    future.cancel()
+
+
+class CachedPDFParser(BaseBlobParser):
+    """Serve pages of a wrapped parser from a `ParseCache`.
+
+    Entries are keyed by the blob's content together with the wrapped parser's
+    class and options, so a PDF parsed once is streamed back from disk when it
+    shows up again, whatever its name.
+    """
+
+    output_options = ("parser",)
+
+    def __init__(self, parser: BaseBlobParser, cache: ParseCache) -> None:
+        """Initialize the parser.
+
+        Args:
+            parser: Parser to run on cache misses.
+            cache: Cache shared between parsers; its ``stats()`` holds the
+                   hit/miss counters.
+        """
+        self.parser = parser
+        self.cache = cache
+
+    def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Lazily parse the blob."""
+        yield from self.cache.lazy_parse(self.parser, blob)
+
+
+# Error codes of Textract requests refused for going over the account's limits.
+_TEXTRACT_THROTTLING_CODES = frozenset(
+    {"ThrottlingException", "ProvisionedThroughputExceededException", "LimitExceededException"}
+)
+
+
+def _is_throttling(error: BaseException) -> bool:
+    """Whether ``error`` is a botocore ``ClientError`` of a throttled request."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, Mapping):
+        return False
+    return response.get("Error", {}).get("Code") in _TEXTRACT_THROTTLING_CODES
+
+
+class TextractBatcher:
+    """Calls Textract for many blobs at once, for `AmazonTextractPDFParser`.
+
+    At most ``concurrency`` calls are in flight, from a pool of threads, and
+    results come back in the order of the blobs. A throttled call is retried
+    after an exponential backoff with full jitter, holding its slot meanwhile
+    so the pool slows down as a whole.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        *,
+        max_retries: int = 6,
+        backoff: float = 0.5,
+        max_backoff: float = 20.0,
+    ) -> None:
+        """Initialize the batcher.
+
+        Args:
+            concurrency: Maximum number of Textract calls in flight.
+            max_retries: Number of times a throttled call is retried before its
+                         error is raised.
+            backoff: Upper bound of the first wait before a retry, in seconds;
+                     it doubles with every retry.
+            max_backoff: Upper bound of any wait before a retry, in seconds.
+        """
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def call(self, function: Callable[[Any], Any], item: Any, name: str = "") -> Any:
+        """``function(item)``, retried while it is throttled.
+
+        Raises:
+            Exception: What ``function`` raised, once it is not throttling or
+                       the retries are used up.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return function(item)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_throttling(e):
+                    raise
+            PdfMetrics.count("throttled", 1, name)
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt)))
+
+    def map(
+        self, function: Callable[[Any], Any], items: Iterable[Any], name: str = ""
+    ) -> Iterator[Tuple[Any, Any]]:
+        """Yield ``(item, function(item))`` for every item, in order, with the
+        calls made concurrently, see `call`."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Worker threads report their calls to the caller's request too.
+        call = PdfMetrics.in_request(functools.partial(self.call, function, name=name))
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="textract"
+        ) as executor:
+            # A bounded window of items queued ahead, so results do not pile
+            # up while the caller is still consuming earlier ones.
+            todo = iter(items)
+            pending: Deque[Tuple[Any, Future]] = collections.deque()
+            try:
+                for item in todo:
+                    pending.append((item, executor.submit(call, item)))
+                    if len(pending) >= 2 * self.concurrency:
+                        break
+                while pending:
+                    item, future = pending.popleft()
+                    following = next(todo, _NO_ITEM)
+                    if following is not _NO_ITEM:
+                        pending.append((following, executor.submit(call, following)))
+                    yield item, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
 
-        return extract_from_images_with_rapidocr(images)
+
+_NO_ITEM = object()
 
 
 class AmazonTextractPDFParser(BaseBlobParser):
@@ -510,12 +1557,16 @@ class AmazonTextractPDFParser(BaseBlobParser):
 
     """
 
+    output_options = ("textract_features", "linearize", "linearization_config")
+
     def __init__(
         self,
         textract_features: Optional[Sequence[int]] = None,
         client: Optional[Any] = None,
         *,
         linearization_config: Optional["TextLinearizationConfig"] = None,
+        textract_batcher: Optional[TextractBatcher] = None,
+        linearize: bool = True,
     ) -> None:
         """Initializes the parser.
 
@@ -523,42 +1574,46 @@ class AmazonTextractPDFParser(BaseBlobParser):
             textract_features: Features to be used for extraction, each feature
                                should be passed as an int that conforms to the enum
                                `Textract_Features`, see `amazon-textract-caller` pkg
-            client: boto3 textract client
+            client: boto3 textract client, or any object with its
+                    ``detect_document_text`` method, e.g. a fake for tests
             linearization_config: Config to be used for linearization of the output
                                   should be an instance of TextLinearizationConfig from
                                   the `textractor` pkg
+            textract_batcher: Concurrency and retries of the Textract calls,
+                              see `lazy_parse_many`; one call at a time with
+                              the default retries otherwise.
+            linearize: Lay the text of each page out in reading order with
+                       `amazon-textract-textractor`. With ``False`` the text of
+                       a page is its LINE blocks, one per line, and textractor
+                       is not needed.
+
+        `amazon-textract-caller` is needed for S3 documents and
+        ``textract_features`` only; plain text detection of in-memory documents
+        calls ``client`` directly.
+
+        Raises:
+            ImportError: A package the options need is not installed.
+            ValueError: A feature is not a `Textract_Features` value, or
+                        ``linearization_config`` is given with ``linearize=False``.
         """
-
-        try:
-            import textractcaller as tc
-            import textractor.entities.document as textractor
-
-            self.tc = tc
-            self.textractor = textractor
-
-            if textract_features is not None:
-                self.textract_features = [
-                    tc.Textract_Features(f) for f in textract_features
-                ]
-            else:
-                self.textract_features = []
-
+        self.textract_batcher = textract_batcher or TextractBatcher()
+        self.textract_features = []
+        if textract_features:
+            tc = _textractcaller()
+            self.textract_features = [tc.Textract_Features(f) for f in textract_features]
+
+        self.linearize = linearize
+        if not linearize:
             if linearization_config is not None:
-                self.linearization_config = linearization_config
-            else:
-                self.linearization_config = self.textractor.TextLinearizationConfig(
-                    hide_figure_layout=True,
-                    title_prefix="# ",
-                    section_header_prefix="## ",
-                    list_element_prefix="*",
-                )
-        except ImportError:
-            raise ImportError(
-                "Could not import amazon-textract-caller or "
-                "amazon-textract-textractor python package. Please install it "
-                "with `pip install amazon-textract-caller` & "
-                "`pip install amazon-textract-textractor`."
+                raise ValueError("linearization_config needs linearize=True")
+        elif linearization_config is None:
+            linearization_config = _textractor().TextLinearizationConfig(
+                hide_figure_layout=True,
+                title_prefix="# ",
+                section_header_prefix="## ",
+                list_element_prefix="*",
             )
+        self.linearization_config = linearization_config
 
         if not client:
             try:
@@ -579,40 +1634,110 @@ class AmazonTextractPDFParser(BaseBlobParser):
         has to be set to the S3 URI and for single page docs
         the blob.data is taken
         """
+        name = type(self).__name__
+        response = self.textract_batcher.call(self._call_textract, blob, name)
+        yield from self._documents(blob, response)
+
+    def lazy_parse_many(self, blobs: Iterable[Blob]) -> Iterator[Document]:  # type: ignore[valid-type]
+        """Parse many blobs, like `lazy_parse`, with up to the batcher's
+        ``concurrency`` of them sent to Textract at once.
+
+        Documents come out in the order of the blobs, then of their pages.
+        Each page's ``source`` metadata tells which blob it belongs to.
+        """
+        name = type(self).__name__
+        for blob, response in self.textract_batcher.map(self._call_textract, blobs, name):
+            yield from self._documents(blob, response)
 
+    def _call_textract(self, blob: Blob) -> Any:  # type: ignore[valid-type]
+        """Textract's response for the blob."""
         url_parse_result = urlparse(str(blob.path)) if blob.path else None  # type: ignore[attr-defined]
-        # Either call with S3 path (multi-page) or with bytes (single-page)
-        if (
-            url_parse_result
-            and url_parse_result.scheme == "s3"
-            and url_parse_result.netloc
-        ):
-            textract_response_json = self.tc.call_textract(
-                input_document=str(blob.path),  # type: ignore[attr-defined]
-                features=self.textract_features,
-                boto3_textract_client=self.boto3_textract_client,
-            )
-        else:
-            textract_response_json = self.tc.call_textract(
+        s3 = bool(url_parse_result and url_parse_result.scheme == "s3" and url_parse_result.netloc)
+        with PdfMetrics.stage("remote_call", type(self).__name__):
+            if not (s3 or self.textract_features):
+                # The request textractcaller makes for this case.
+                return self.boto3_textract_client.detect_document_text(
+                    Document={"Bytes": blob.as_bytes()}  # type: ignore[attr-defined]
+                )
+            tc = _textractcaller()
+            features = self.textract_features
+            # Either call with S3 path (multi-page) or with bytes (single-page)
+            if s3:
+                return tc.call_textract(
+                    input_document=str(blob.path),  # type: ignore[attr-defined]
+                    features=features,
+                    boto3_textract_client=self.boto3_textract_client,
+                )
+            return tc.call_textract(
                 input_document=blob.as_bytes(),  # type: ignore[attr-defined]
-                features=self.textract_features,
-                call_mode=self.tc.Textract_Call_Mode.FORCE_SYNC,
+                features=features,
+                call_mode=tc.Textract_Call_Mode.FORCE_SYNC,
                 boto3_textract_client=self.boto3_textract_client,
             )
 
-        document = self.textractor.Document.open(textract_response_json)
-
-        for idx, page in enumerate(document.pages):
+    def _documents(self, blob: Blob, textract_response_json: Any) -> Iterator[Document]:  # type: ignore[valid-type]
+        """A Document for each page of a Textract response."""
+        name = type(self).__name__
+        for idx, text in enumerate(self._page_texts(textract_response_json)):
+            PdfMetrics.count("pages", 1, name)
             yield Document(
-                page_content=page.get_text(config=self.linearization_config),
+                page_content=text,
                 metadata={"source": blob.source, "page": idx + 1},  # type: ignore[attr-defined]
             )
 
+    def _page_texts(self, textract_response_json: Any) -> Iterator[str]:
+        """Text of every page of a Textract response, see ``linearize``."""
+        if not self.linearize:
+            yield from _textract_lines(textract_response_json)
+            return
+        document = _textractor().Document.open(textract_response_json)
+        for page in document.pages:
+            yield page.get_text(config=self.linearization_config)
+
+
+def _textractcaller() -> Any:
+    """The ``textractcaller`` module of `amazon-textract-caller`."""
+    try:
+        import textractcaller
+    except ImportError:
+        raise ImportError(
+            "Could not import amazon-textract-caller python package, which "
+            "S3 documents and textract_features need. Please install it "
+            "with `pip install amazon-textract-caller`."
+        )
+    return textractcaller
+
+
+def _textractor() -> Any:
+    """The ``textractor.entities.document`` module of `amazon-textract-textractor`."""
+    try:
+        import textractor.entities.document as textractor
+    except ImportError:
+        raise ImportError(
+            "Could not import amazon-textract-textractor python package, which "
+            "linearize=True needs. Please install it with "
+            "`pip install amazon-textract-textractor`."
+        )
+    return textractor
+
+
+def _textract_lines(textract_response_json: Mapping[str, Any]) -> List[str]:
+    """Text of every page of a Textract response: its LINE blocks, in order."""
+    pages: Dict[int, List[str]] = {}
+    for block in textract_response_json.get("Blocks", []):
+        if block.get("BlockType") == "PAGE":
+            pages.setdefault(block.get("Page", 1), [])
+        elif block.get("BlockType") == "LINE":
+            pages.setdefault(block.get("Page", 1), []).append(block.get("Text", ""))
+    return ["\n".join(lines) for _, lines in sorted(pages.items())]
+
 
 class DocumentIntelligenceParser(BaseBlobParser):
     """Loads a PDF with Azure Document Intelligence
     (formerly Form Recognizer) and chunks at character level."""
 
+    output_options = ("model",)
+
     def __init__(self, client: Any, model: str):
         warnings.warn(
             "langchain_community.document_loaders.parsers.pdf.DocumentIntelligenceParser"
@@ -641,10 +1766,13 @@ class DocumentIntelligenceParser(BaseBlobParser):
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
 
+        name = type(self).__name__
+        PdfMetrics.count("bytes_read", PdfMetrics.blob_size(blob), name)
         with blob.as_bytes_io() as file_obj:  # type: ignore[attr-defined]
-            poller = self.client.begin_analyze_document(self.model, file_obj)
-            result = poller.result()
+            with PdfMetrics.stage("remote_call", name):
+                poller = self.client.begin_analyze_document(self.model, file_obj)
+                result = poller.result()
 
             docs = self._generate_docs(blob, result)
 
-            yield from docs
+            yield from PdfMetrics.timed_pages(docs, name)
@@ -0,0 +1,111 @@
+"""Compact page metadata, with the document-level part shared by every page.
+
+The metadata of a parsed page is mostly about its document: the source, the
+page count and the PDF information dictionary. `PageMetadata` keeps that part
+by reference, so a document of N pages holds it once instead of N times, and
+`CompactPages` emits it once in responses, leaving each page with only the
+fields that change from page to page.
+"""
+
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+_MISSING = object()
+
+
+class PageMetadata(MutableMapping):
+    """Metadata of one page: its own ``fields`` over the shared ``document``.
+
+    Reads look in ``fields`` first. Writes and deletions only ever touch this
+    page, the ``document`` mapping is never modified.
+    """
+
+    __slots__ = ("document", "fields")
+
+    def __init__(self, document: Mapping[str, Any], fields: Optional[Dict[str, Any]] = None) -> None:
+        self.document = document
+        self.fields = {} if fields is None else fields
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self.fields[key]
+        except KeyError:
+            return self.document[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.fields[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        found = self.fields.pop(key, _MISSING) is not _MISSING
+        if key in self.document:
+            # Detach this page from the shared mapping rather than modify it.
+            self.document = {k: v for k, v in self.document.items() if k != key}
+        elif not found:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.fields or key in self.document
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.document
+        for key in self.fields:
+            if key not in self.document:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.document) + sum(key not in self.document for key in self.fields)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def copy(self) -> PageMetadata:
+        return PageMetadata(self.document, dict(self.fields))
+
+
+def share_documents(documents: Iterable[Any]) -> Iterator[Any]:
+    """Pass Documents through, pointing pages whose document-level metadata is
+    equal at the same mapping again.
+
+    Pages pickled one by one, by the caches or by worker processes, come back
+    with a copy of that mapping each.
+    """
+    shared: Optional[Mapping[str, Any]] = None
+    for document in documents:
+        metadata = document.metadata
+        if isinstance(metadata, PageMetadata):
+            if shared is not None and metadata.document is not shared and metadata.document == shared:
+                metadata.document = shared
+            shared = metadata.document
+        yield document
+
+
+class CompactPages:
+    """Split page metadata into the document-level part, taken from the first
+    page and emitted once, and what each page adds to or changes in it.
+
+    ``{**document, **fields(metadata)}`` is the page's full metadata. Pages
+    with plain dict metadata share nothing and keep all of it.
+    """
+
+    __slots__ = ("document", "_shared")
+
+    def __init__(self) -> None:
+        self.document: Optional[Dict[str, Any]] = None
+        self._shared: Optional[Mapping[str, Any]] = None
+
+    def fields(self, metadata: Mapping[str, Any]) -> Dict[str, Any]:
+        """The page-level fields of ``metadata``."""
+        if self.document is None:
+            if isinstance(metadata, PageMetadata):
+                self._shared = metadata.document
+                self.document = {key: metadata[key] for key in metadata.document}
+            else:
+                self.document = {}
+        document = self.document
+        if isinstance(metadata, PageMetadata) and metadata.document is self._shared:
+            items = metadata.fields.items()
+        else:
+            items = metadata.items()
+        return {key: value for key, value in items if document.get(key, _MISSING) != value}
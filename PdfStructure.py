@@ -0,0 +1,284 @@
+"""Chapters and subsections of a PDF, for the ``chapter``/``subsection`` metadata.
+
+A `StructureIndex` knows on which page every heading is, so the chapter and
+subsection of any page are found with a binary search and carry over to the
+pages after the heading. It is built once per document from the outline (the
+bookmarks) when the PDF has one, see `from_outlines`, and otherwise grows page
+by page from the fonts of the parsed text, see `FontHeadings`, compared with
+the body font size of the whole document, see `body_font_size`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import collections
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+CHAPTER = 1
+SUBSECTION = 2
+
+# Pages sampled for the body font size of longer documents.
+_SAMPLED_PAGES = 24
+# Text lines at least this many times the body font size are chapter headings,
+# or subsection headings from the second threshold on.
+_CHAPTER_SCALE = 1.5
+_SUBSECTION_SCALE = 1.15
+_MAX_HEADING_LENGTH = 120
+_BOLD_MARKERS = ("bold", "black", "heavy", "semibold", "demi")
+
+#: ``(text, font size, font name)`` of a line of text.
+TextLine = Tuple[str, float, str]
+
+
+class StructureIndex:
+    """Headings of a document by the page they are on.
+
+    The chapter of a page is the last chapter heading on or before it, and its
+    subsection the last subsection heading since that chapter started.
+    """
+
+    def __init__(self) -> None:
+        # Per level, sorted ``(page_number, order)`` keys and their titles.
+        self._keys: Dict[int, List[Tuple[int, int]]] = {CHAPTER: [], SUBSECTION: []}
+        self._titles: Dict[int, List[str]] = {CHAPTER: [], SUBSECTION: []}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, page_number: int, level: int, title: str) -> None:
+        """Record a heading; headings of a page are added in reading order."""
+        key = (page_number, self._count)
+        self._count += 1
+        keys = self._keys[level]
+        position = bisect.bisect(keys, key)
+        keys.insert(position, key)
+        self._titles[level].insert(position, title)
+
+    def lookup(self, page_number: int) -> Tuple[str, str]:
+        """``(chapter, subsection)`` of the page, ``""`` for none."""
+        chapter_key, chapter = self._last(CHAPTER, page_number)
+        subsection_key, subsection = self._last(SUBSECTION, page_number)
+        if subsection_key is None or (chapter_key is not None and subsection_key < chapter_key):
+            subsection = ""
+        return chapter, subsection
+
+    def headings(self, page_number: int) -> List[Tuple[int, str]]:
+        """``(level, title)`` of the headings on the page, in reading order."""
+        found = []
+        for level, keys in self._keys.items():
+            start = bisect.bisect_left(keys, (page_number,))
+            stop = bisect.bisect_left(keys, (page_number + 1,), start)
+            found.extend((keys[i], level, self._titles[level][i]) for i in range(start, stop))
+        return [(level, title) for _, level, title in sorted(found)]
+
+    def _last(self, level: int, page_number: int) -> Tuple[Optional[Tuple[int, int]], str]:
+        keys = self._keys[level]
+        position = bisect.bisect_left(keys, (page_number + 1,)) - 1
+        if position < 0:
+            return None, ""
+        return keys[position], self._titles[level][position]
+
+
+class FontHeadings:
+    """Finds the headings of the pages of a document from the size and weight
+    of their text lines.
+
+    Lines set notably larger than the body font size are headings, and short
+    bold lines at body size are subsection headings. The body size is that of
+    the whole document, so a page has the same headings however the pages
+    around it are parsed: in order, in chunks, or not at all.
+    """
+
+    def __init__(self, index: StructureIndex, body_size: float) -> None:
+        self.index = index
+        self.body_size = body_size
+
+    def add_page(self, page_number: int, lines: Iterable[TextLine]) -> None:
+        """Add the headings among the lines of a page to the index."""
+        for text, size, font in lines:
+            level = _heading_level(text, size, font, self.body_size) if text else None
+            if level is not None:
+                self.index.add(page_number, level, text)
+
+
+def body_font_size(pages: Sequence[Any]) -> float:
+    """Most common font size of the characters of a document, rounded to half
+    points, or 0 when it has no text.
+
+    Only the page contents are interpreted, without pdfplumber's layout work,
+    on at most ``_SAMPLED_PAGES`` pages spread evenly through the document.
+
+    Args:
+        pages: pdfminer ``PDFPage`` of every page of the document.
+    """
+    from pdfminer.converter import PDFLayoutAnalyzer
+    from pdfminer.layout import LTChar, LTContainer
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+
+    sizes: collections.Counter = collections.Counter()
+
+    class SizeCounter(PDFLayoutAnalyzer):
+        def receive_layout(self, ltpage: Any) -> None:
+            containers = [ltpage]
+            while containers:
+                for item in containers.pop():
+                    if isinstance(item, LTChar):
+                        if not item.get_text().isspace():
+                            sizes[round(item.size * 2) / 2] += 1
+                    elif isinstance(item, LTContainer):
+                        containers.append(item)
+
+    if len(pages) > _SAMPLED_PAGES:
+        pages = [pages[i * len(pages) // _SAMPLED_PAGES] for i in range(_SAMPLED_PAGES)]
+    manager = PDFResourceManager(caching=True)
+    device = SizeCounter(manager)
+    interpreter = PDFPageInterpreter(manager, device)
+    for page in pages:
+        interpreter.process_page(page)
+    device.close()
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def carry(
+        structure: Tuple[str, str], headings: Iterable[Tuple[int, str]]
+) -> Tuple[str, str]:
+    """``(chapter, subsection)`` of a page, from those of the page before and
+    the page's own headings."""
+    chapter, subsection = structure
+    for level, title in headings:
+        if level == CHAPTER:
+            chapter, subsection = title, ""
+        else:
+            subsection = title
+    return chapter, subsection
+
+
+def _heading_level(text: str, size: float, font: str, body_size: float) -> Optional[int]:
+    if len(text) > _MAX_HEADING_LENGTH or not any(c.isalpha() for c in text) or body_size <= 0:
+        return None
+    if size >= body_size * _CHAPTER_SCALE:
+        return CHAPTER
+    if size >= body_size * _SUBSECTION_SCALE:
+        return SUBSECTION
+    if size >= body_size and any(marker in font.lower() for marker in _BOLD_MARKERS):
+        return SUBSECTION
+    return None
+
+
+def text_lines(textmap: Any) -> Iterator[TextLine]:
+    """Lines of a pdfplumber ``TextMap`` with the font of their first character.
+
+    Lines whose first and last characters are in different fonts or sizes
+    are mixed text, never headings, and come out with a size of 0.
+    """
+    tuples = textmap.tuples
+    texts = textmap.as_string
+    aligned = True
+    if (
+            len(texts) != len(tuples)
+            or (getattr(textmap, "line_dir_render", "ttb"), getattr(textmap, "char_dir_render", "ltr"))
+            != ("ttb", "ltr")
+    ):
+        # The string is not one character per tuple in order, e.g. because of
+        # expanded ligatures; lines are then only split at the same places.
+        texts = "".join("\n" if char is None and text == "\n" else "\0" for text, char in tuples)
+        aligned = False
+    start = 0
+    while start <= len(texts):
+        stop = texts.find("\n", start)
+        if stop < 0:
+            stop = len(texts)
+        first = _first_char(tuples, range(start, stop))
+        if first is not None:
+            line = texts[start:stop] if aligned else "".join(map(itemgetter(0), tuples[start:stop]))
+            last = _first_char(tuples, range(stop - 1, start - 1, -1))
+            yield line.strip(), _line_size(first, last), first.get("fontname", "")
+        start = stop + 1
+
+
+def _first_char(
+        tuples: Sequence[Tuple[str, Optional[Mapping[str, Any]]]], positions: Iterable[int]
+) -> Optional[Mapping[str, Any]]:
+    """The first char object at ``positions`` that is not white space."""
+    for position in positions:
+        text, char = tuples[position]
+        if char is not None and not text.isspace():
+            return char
+    return None
+
+
+def _line_size(first: Mapping[str, Any], last: Mapping[str, Any]) -> float:
+    if first.get("fontname") != last.get("fontname") or abs(first["size"] - last["size"]) > 0.5:
+        return 0.0
+    return float(first["size"])
+
+
+def from_outlines(document: Any, page_numbers: Mapping[int, int]) -> Optional[StructureIndex]:
+    """Index of the top two levels of a pdfminer ``PDFDocument``'s outline.
+
+    Args:
+        document: The document.
+        page_numbers: Zero-based page number of every page, by the object id
+                      of its page dictionary.
+
+    Returns:
+        The index, or ``None`` when the document has no outline entries that
+        point to one of its pages.
+    """
+    from pdfminer.pdfdocument import PDFNoOutlines
+    from pdfminer.psparser import PSException
+
+    index = StructureIndex()
+    try:
+        for level, title, dest, action, _ in document.get_outlines():
+            if level not in (CHAPTER, SUBSECTION):
+                continue
+            page_number = _outline_page(document, dest, action, page_numbers)
+            if page_number is not None:
+                index.add(page_number, level, _outline_title(title))
+    except PDFNoOutlines:
+        return None
+    except (PSException, KeyError, TypeError, ValueError, RecursionError):
+        # A broken outline is no worse than a missing one.
+        return None
+    return index if len(index) else None
+
+
+def _outline_page(document: Any, dest: Any, action: Any, page_numbers: Mapping[int, int]) -> Optional[int]:
+    """Page number an outline entry points to, ``None`` for other targets."""
+    from pdfminer.pdfdocument import PDFDestinationNotFound
+    from pdfminer.pdftypes import PDFObjRef, resolve1
+    from pdfminer.psparser import PSLiteral
+
+    if dest is None:
+        action = resolve1(action)
+        if not isinstance(action, dict):
+            return None
+        kind = resolve1(action.get("S"))
+        if not (isinstance(kind, PSLiteral) and kind.name == "GoTo"):
+            return None
+        dest = action.get("D")
+    dest = resolve1(dest)
+    if isinstance(dest, PSLiteral):
+        # Keys of the PDF 1.1 /Dests dictionary; name trees use strings.
+        dest = dest.name
+    if isinstance(dest, (bytes, str)):
+        try:
+            dest = resolve1(document.get_dest(dest))
+        except (PDFDestinationNotFound, KeyError):
+            return None
+    if isinstance(dest, dict):
+        dest = resolve1(dest.get("D"))
+    if not isinstance(dest, list) or not dest or not isinstance(dest[0], PDFObjRef):
+        return None
+    return page_numbers.get(dest[0].objid)
+
+
+def _outline_title(title: Any) -> str:
+    from pdfminer.utils import decode_text
+
+    if isinstance(title, bytes):
+        title = decode_text(title)
+    return str(title or "").strip()
@@ -1,26 +1,36 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import pdfplumber
-import numpy as np
-import warnings
+import collections
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import mmap
 import os
-from typing import Any, Iterator, Mapping, Optional
-
-_PDF_FILTER_WITH_LOSS = ["DCTDecode", "DCT", "JPXDecode"]
-_PDF_FILTER_WITHOUT_LOSS = [
-    "LZWDecode",
-    "LZW",
-    "FlateDecode",
-    "Fl",
-    "ASCII85Decode",
-    "A85",
-    "ASCIIHexDecode",
-    "AHx",
-    "RunLengthDecode",
-    "RL",
-    "CCITTFaxDecode",
-    "CCF",
-    "JBIG2Decode",
-]
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import PdfImages
+import PdfMetrics
+from PdfCache import PageIndex, ParseCache
+from PdfImageStore import ImageNamespace, ImageStore
+from PdfPages import PageSelection, parse_page_selection, select_pages
+from PdfRecords import CompactPages, PageMetadata, share_documents
+from PdfStructure import FontHeadings, StructureIndex, body_font_size, carry, from_outlines, text_lines
+
+try:
+    from pdfplumber.utils.text import TextMap
+except ImportError:  # pdfplumber < 0.10 keeps it elsewhere; it is only a type hint here
+    TextMap = Any
 
 
 # Placeholder function for image text extraction
@@ -30,19 +40,36 @@ def extract_from_images_with_rapidocr(images):
 
 
 class Blob:
-    def __init__(self, source):
+    def __init__(self, source, stream=None, path=None):
         self.source = source
+        self.stream = stream
+        # File holding the PDF when it is not at ``source``, e.g. an upload
+        # saved to a temporary file.
+        self.path = path
 
     def as_bytes_io(self):
-        import io
-        with open(self.source, 'rb') as f:
-            return io.BytesIO(f.read())
+        """Seekable view of the PDF that does not copy it into memory.
+
+        An upload stream is handed over as is, rewound and left open for the
+        next reader; a file on disk is memory-mapped.
+        """
+        if self.stream is not None:
+            self.stream.seek(0)
+            return contextlib.nullcontext(self.stream)
+        with open(self.path or self.source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return io.BytesIO()  # empty files cannot be mapped
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 
 class Document:
-    def __init__(self, page_content, metadata):
+    __slots__ = ("page_content", "metadata", "headings")
+
+    def __init__(self, page_content, metadata, headings=()):
         self.page_content = page_content
         self.metadata = metadata
+        # ``(level, title)`` of the chapter and subsection headings on the page.
+        self.headings = headings
 
 
 class BaseBlobParser:
@@ -50,15 +77,138 @@ class BaseBlobParser:
         raise NotImplementedError
 
 
+def _image_key(stream: Any) -> Hashable:
+    """Identity of an image stream: its PDF object id, or a hash of its bytes
+    for inline images."""
+    if getattr(stream, "objid", None) is not None:
+        return ("obj", stream.objid)
+    raw = stream.rawdata if stream.rawdata is not None else stream.get_data()
+    return ("sha256", hashlib.sha256(raw).digest())
+
+
+def _textmap(page: pdfplumber.page.Page, text_kwargs: Mapping[str, Any]) -> TextMap:
+    """The text map ``page.extract_text(**text_kwargs)`` reads its text from.
+
+    ``Page.get_textmap`` caches its result by its keyword arguments, which must
+    be hashable, as ``extract_text`` makes them too. pdfplumber before 0.10
+    has no such method and the map is built from the characters directly.
+    """
+    get_textmap = getattr(page, "get_textmap", None)
+    if get_textmap is None:
+        return pdfplumber.utils.chars_to_textmap(page.chars, **text_kwargs)
+    return get_textmap(**{
+        key: tuple(value) if isinstance(value, list) else value for key, value in text_kwargs.items()
+    })
+
+
+class DocumentAnalysis:
+    """State shared by the pages of one document while it is parsed."""
+
+    def __init__(
+            self,
+            images: Optional[ImageNamespace] = None,
+            structure: Optional[StructureIndex] = None,
+            body_size: float = 0.0,
+    ) -> None:
+        # Where this parse saves its images.
+        self.images = images
+        # Saved file of every image met so far. Logos and watermarks repeat on
+        # every page, but are decoded and written only once.
+        self.saved_images: Dict[Hashable, Optional[str]] = {}
+        # Headings from the outline, or else from the fonts of the pages
+        # analyzed so far, which must then be analyzed in page order.
+        self.font_headings = FontHeadings(StructureIndex(), body_size) if structure is None else None
+        self.structure = structure if structure is not None else self.font_headings.index
+
+
+class PageAnalysis:
+    """Result of the single extraction pass over one page.
+
+    Every metadata field is derived from this object, so the page text and
+    characters are pulled out of pdfplumber exactly once.
+    """
+
+    def __init__(
+            self,
+            page: pdfplumber.page.Page,
+            text_page: pdfplumber.page.Page,
+            textmap: TextMap,
+            document: DocumentAnalysis,
+    ) -> None:
+        self.document = document
+        self.page = page
+        self.page_number = page.page_number - 1
+        self.chars = text_page.chars
+        self.textmap = textmap
+        self.text = textmap.as_string
+        self.lines = self.text.splitlines()
+        self._indexed = False
+
+    @property
+    def structure(self) -> Tuple[str, str]:
+        """``(chapter, subsection)`` of the page, from the document's structure index."""
+        self._index()
+        return self.document.structure.lookup(self.page_number)
+
+    @property
+    def headings(self) -> List[Tuple[int, str]]:
+        """``(level, title)`` of the chapter and subsection headings on the page."""
+        self._index()
+        return self.document.structure.headings(self.page_number)
+
+    def _index(self) -> None:
+        """Add the page's headings to the index when they come from the fonts."""
+        if not self._indexed and self.document.font_headings is not None:
+            self.document.font_headings.add_page(self.page_number, text_lines(self.textmap))
+        self._indexed = True
+
+
+@contextlib.contextmanager
+def _saved_upload(blob: Blob) -> Iterator[Blob]:
+    """A copy of a stream blob in a temporary file, removed on exit."""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            blob.stream.seek(0)
+            shutil.copyfileobj(blob.stream, f, 1 << 20)
+        yield Blob(blob.source, path=path)
+    finally:
+        os.remove(path)
+
+
+def _parse_page_chunk(
+        parser: "PDFPlumberParser", blob: Blob, page_numbers: Sequence[int], namespace: str, body_size: float
+) -> List[Document]:
+    """Worker entry point for ``workers > 1``: parse one chunk of pages."""
+    return list(parser._lazy_parse_pages(blob, page_numbers, namespace, body_size))
+
+
 class PDFPlumberParser(BaseBlobParser):
     """Parse `PDF` with `PDFPlumber`."""
 
+    #: Attributes that change the Documents, see `PdfCache.parser_fingerprint`.
+    output_options = (
+        "text_kwargs",
+        "dedupe",
+        "extract_images",
+        "image_store",
+        "pages",
+        "metadata_only",
+        "page_fields",
+    )
+
     def __init__(
             self,
             text_kwargs: Optional[Mapping[str, Any]] = None,
             dedupe: bool = False,
             extract_images: bool = False,
-            image_output_dir: str = 'extracted_images'
+            image_output_dir: str = 'extracted_images',
+            image_store: Optional[ImageStore] = None,
+            page_fields: Optional[Mapping[str, Callable[[PageAnalysis], Any]]] = None,
+            workers: int = 1,
+            pages_per_task: int = 8,
+            pages: Optional[PageSelection] = None,
+            metadata_only: bool = False,
     ) -> None:
         """Initialize the parser.
 
@@ -66,96 +216,861 @@ class PDFPlumberParser(BaseBlobParser):
             text_kwargs: Keyword arguments to pass to ``pdfplumber.Page.extract_text()``
             dedupe: Avoiding the error of duplicate characters if `dedupe=True`.
             image_output_dir: Directory to save extracted images.
+            image_store: Store the images are saved to, instead of an
+                unbounded one in ``image_output_dir``.
+            page_fields: Extra metadata fields, each computed from the page's
+                `PageAnalysis` without another extraction pass.
+            workers: Number of processes that parse pages in parallel. Every
+                worker opens the document itself; pages still come out in order.
+            pages_per_task: Number of consecutive pages a worker parses per task.
+            pages: Pages to parse, e.g. ``"0-4,9"`` or ``range(5)``, see
+                `PdfPages`; every page by default.
+            metadata_only: Yield one Document with the page count and document
+                metadata instead of parsing any page.
         """
         self.text_kwargs = text_kwargs or {}
         self.dedupe = dedupe
         self.extract_images = extract_images
         self.image_output_dir = image_output_dir
-
-        if self.extract_images:
-            os.makedirs(self.image_output_dir, exist_ok=True)
+        if image_store is None and extract_images:
+            image_store = ImageStore(image_output_dir)
+        self.image_store = image_store
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.pages = None if pages is None else parse_page_selection(pages)
+        self.metadata_only = metadata_only
+        self.page_fields = {
+            "chapter": self._extract_chapter_from_page,
+            "subsection": self._extract_subsection_from_page,
+            "images": self._extract_images_from_page,
+            **(page_fields or {}),
+        }
 
     def lazy_parse(self, blob: Blob) -> Iterator[Document]:  # type: ignore[valid-type]
         """Lazily parse the blob."""
+        PdfMetrics.count("bytes_read", PdfMetrics.blob_size(blob), type(self).__name__)
+        if self.metadata_only:
+            with PdfMetrics.stage("metadata", type(self).__name__):
+                page_count, info = self._document_info(blob)
+            yield Document(
+                page_content="",
+                metadata={**info, "source": blob.source, "file_path": blob.source, "total_pages": page_count},
+            )
+            return
+
+        page_numbers = None
+        if self.pages is not None:
+            page_numbers = select_pages(self.pages, self._document_info(blob)[0])
+        if self.workers > 1:
+            pages = self._parallel_parse(blob, page_numbers)
+        else:
+            pages = self._lazy_parse_pages(blob, page_numbers)
+        # With workers, a page's time is how long it was waited for.
+        yield from PdfMetrics.timed_pages(pages, type(self).__name__)
+
+    def _parallel_parse(self, blob: Blob, page_numbers: Optional[Sequence[int]] = None) -> Iterator[Document]:
+        """Parse chunks of pages in a process pool and yield them in page order."""
+        if page_numbers is None:
+            page_numbers = range(self._document_info(blob)[0])
+        chunks = [
+            page_numbers[start:start + self.pages_per_task]
+            for start in range(0, len(page_numbers), self.pages_per_task)
+        ]
+        workers = min(self.workers, len(chunks))
+        if workers <= 1:
+            yield from self._lazy_parse_pages(blob, page_numbers)
+            return
+        if blob.stream is not None:
+            # Workers open the document by path: a stream is saved once to a
+            # temporary file rather than pickled into every task.
+            with _saved_upload(blob) as saved:
+                yield from self._parallel_parse(saved, page_numbers)
+            return
+
+        # Every chunk finds its headings against the body font size of the
+        # whole document, worked out once here.
+        with blob.as_bytes_io() as file_path, pdfplumber.open(file_path) as doc:  # type: ignore[attr-defined]
+            _, body_size = self._document_structure(doc)
+        # Every chunk saves its images to the same namespace.
+        namespace = uuid.uuid4().hex
+        chunks = iter(chunks)
+        previous = None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # A bounded window of chunks in flight, so finished pages do not
+            # pile up while the caller is still consuming earlier ones.
+            pending = collections.deque(
+                pool.submit(_parse_page_chunk, self, blob, chunk, namespace, body_size)
+                for _, chunk in zip(range(2 * workers), chunks)
+            )
+            try:
+                while pending:
+                    documents = pending.popleft().result()
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        pending.append(pool.submit(_parse_page_chunk, self, blob, chunk, namespace, body_size))
+                    yield from self._carry_structure(documents, previous)
+                    if documents:
+                        previous = documents[-1]
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _carry_structure(
+            self, documents: Iterable[Document], previous: Optional[Document] = None
+    ) -> Iterator[Document]:
+        """Work out the chapter and subsection of pages parsed apart from the
+        page before them, e.g. at the start of a chunk, from that page's and
+        their own headings.
+
+        Without an outline, headings are only known from the pages a parse has
+        seen; a page that is not right after another one keeps its own.
+        """
+        if not (
+                self.page_fields.get("chapter") == self._extract_chapter_from_page
+                and self.page_fields.get("subsection") == self._extract_subsection_from_page
+        ):
+            yield from documents
+            return
+        for document in documents:
+            metadata = document.metadata
+            if previous is not None and metadata.get("page") == previous.metadata.get("page", -2) + 1:
+                metadata["chapter"], metadata["subsection"] = carry(
+                    (previous.metadata["chapter"], previous.metadata["subsection"]), document.headings
+                )
+            previous = document
+            yield document
+
+    def _lazy_parse_pages(
+            self,
+            blob: Blob,
+            page_numbers: Optional[Iterable[int]] = None,
+            namespace: Optional[str] = None,
+            body_size: Optional[float] = None,
+    ) -> Iterator[Document]:
+        """Parse the given zero-based pages, in ascending order, or every page.
+
+        Images are saved to the image store ``namespace``, a new one by default.
+        ``body_size`` is the document's body font size when already known.
+        """
         import pdfplumber
 
+        parser_name = type(self).__name__
         with blob.as_bytes_io() as file_path:  # type: ignore[attr-defined]
-            doc = pdfplumber.open(file_path)  # open document
-
-            yield from [
-                Document(
-                    page_content=self._process_page_content(page),
-                    metadata=dict(
-                        {
-                            "source": blob.source,  # type: ignore[attr-defined]
-                            "file_path": blob.source,  # type: ignore[attr-defined]
-                            "page": page.page_number - 1,
-                            "total_pages": len(doc.pages),
-                            "chapter": self._extract_chapter_from_page(page),
-                            "subsection": self._extract_subsection_from_page(page),
-                            "images": self._extract_images_from_page(page, page.page_number - 1),
-                        },
-                        **{
-                            k: doc.metadata[k]
-                            for k in doc.metadata
-                            if type(doc.metadata[k]) in [str, int]
-                        },
-                    ),
+            with PdfMetrics.stage("open", parser_name):
+                doc = pdfplumber.open(file_path)
+            with doc:
+                if page_numbers is None:
+                    page_numbers = range(len(doc.pages))
+                structure, body_size = self._document_structure(doc, body_size)
+                document = DocumentAnalysis(
+                    self.image_store.namespace(namespace) if self.image_store is not None else None,
+                    structure,
+                    body_size,
                 )
-                for page in doc.pages
-            ]
+                # Shared by reference by the metadata of every page.
+                document_metadata = {
+                    "source": blob.source,  # type: ignore[attr-defined]
+                    "file_path": blob.source,  # type: ignore[attr-defined]
+                    "total_pages": len(doc.pages),
+                    **{k: v for k, v in doc.metadata.items() if type(v) in [str, int]},
+                }
+                for page in (doc.pages[i] for i in page_numbers):
+                    analysis = self._analyze_page(page, document)
+                    fields = {}
+                    for name, field in self.page_fields.items():
+                        with PdfMetrics.stage(f"field:{name}", parser_name):
+                            fields[name] = field(analysis)
+                    yield Document(
+                        page_content=analysis.text,
+                        metadata=PageMetadata(document_metadata, {"page": analysis.page_number, **fields}),
+                        headings=analysis.headings,
+                    )
+                    # Drop the page's cached objects, layout and text map once it is consumed.
+                    del analysis
+                    page.close()
+                if document.images is not None:
+                    # Images are written in the background; have them on disk
+                    # before the parse is reported done.
+                    document.images.wait()
+
+    def _document_structure(
+            self, doc: pdfplumber.PDF, body_size: Optional[float] = None
+    ) -> Tuple[Optional[StructureIndex], float]:
+        """Headings of the open document from its outline, or else its body
+        font size to find them by, unless ``body_size`` is already known."""
+        parser_name = type(self).__name__
+        with PdfMetrics.stage("outline", parser_name):
+            structure = from_outlines(doc.doc, {page.page_obj.pageid: i for i, page in enumerate(doc.pages)})
+        if structure is None and body_size is None:
+            with PdfMetrics.stage("font_sizes", parser_name):
+                body_size = body_font_size([page.page_obj for page in doc.pages])
+        return structure, body_size or 0.0
+
+    def _document_info(self, blob: Blob) -> Tuple[int, Dict[str, Any]]:
+        """Number of pages and metadata of the blob, without parsing any page."""
+        from pdfminer.pdftypes import resolve1
+
+        with blob.as_bytes_io() as file_path:
+            with pdfplumber.open(file_path) as doc:
+                # The page tree's count, ``doc.pages`` would load every page.
+                page_count = resolve1(doc.doc.catalog["Pages"])["Count"]
+                return page_count, {k: v for k, v in doc.metadata.items() if type(v) in [str, int]}
+
+    def _analyze_page(self, page: pdfplumber.page.Page, document: Optional[DocumentAnalysis] = None) -> PageAnalysis:
+        """Run the one extraction pass over the page that every field reads from."""
+        parser_name = type(self).__name__
+        text_page = page
+        if self.dedupe:
+            with PdfMetrics.stage("dedupe", parser_name):
+                text_page = page.dedupe_chars()
+        with PdfMetrics.stage("extract_text", parser_name):
+            # ``extract_text`` is this text map's ``as_string``; the page's
+            # headings are read from its lines and fonts too.
+            textmap = _textmap(text_page, self.text_kwargs)
+        return PageAnalysis(page, text_page, textmap, document or DocumentAnalysis())
 
     def _process_page_content(self, page: pdfplumber.page.Page) -> str:
         """Process the page content based on dedupe."""
-        if self.dedupe:
-            return page.dedupe_chars().extract_text(**self.text_kwargs)
-        return page.extract_text(**self.text_kwargs)
-
-    def _extract_chapter_from_page(self, page: pdfplumber.page.Page) -> str:
-        """Extract chapter title from the page."""
-        text = self._process_page_content(page)
-        for line in text.splitlines():
-            if line.isupper():
-                return line
-        return ""
-
-    def _extract_subsection_from_page(self, page: pdfplumber.page.Page) -> str:
-        """Extract subsection title from the page."""
-        text = self._process_page_content(page)
-        for line in text.splitlines():
-            if line.startswith("Section"):
-                return line
-        return ""
-
-    def _extract_images_from_page(self, page: pdfplumber.page.Page, page_number: int) -> list:
+        return self._analyze_page(page).text
+
+    def _extract_chapter_from_page(self, analysis: PageAnalysis) -> str:
+        """Title of the chapter the page is in, see `PdfStructure`."""
+        return analysis.structure[0]
+
+    def _extract_subsection_from_page(self, analysis: PageAnalysis) -> str:
+        """Title of the subsection the page is in, see `PdfStructure`."""
+        return analysis.structure[1]
+
+    def _extract_images_from_page(self, analysis: PageAnalysis) -> List[str]:
         """Extract images from page, save to files, and return list of image file paths."""
         if not self.extract_images:
             return []
 
-        images = []
+        saved_images = analysis.document.saved_images
         image_files = []
-        for idx, img in enumerate(page.images):
-            if img["stream"]["Filter"].name in _PDF_FILTER_WITHOUT_LOSS:
-                image_data = np.frombuffer(img["stream"].get_data(), dtype=np.uint8).reshape(
-                    img["stream"]["Height"], img["stream"]["Width"], -1
-                )
-                image_path = os.path.join(self.image_output_dir, f'page_{page_number}_img_{idx}.png')
-                with open(image_path, 'wb') as f:
-                    f.write(image_data)
-                image_files.append(image_path)
-            elif img["stream"]["Filter"].name in _PDF_FILTER_WITH_LOSS:
-                image_path = os.path.join(self.image_output_dir, f'page_{page_number}_img_{idx}.jpg')
-                with open(image_path, 'wb') as f:
-                    f.write(img["stream"].get_data())
-                image_files.append(image_path)
+        for img in analysis.page.images:
+            key = _image_key(img["stream"])
+            if key not in saved_images:
+                PdfMetrics.count("images", 1, type(self).__name__)
+                saved_images[key] = self._save_image(img["stream"], analysis.document.images)
             else:
-                warnings.warn("Unknown PDF Filter!")
+                PdfMetrics.count("images_reused", 1, type(self).__name__)
+            if saved_images[key] is not None:
+                image_files.append(saved_images[key])
 
         return image_files
 
+    def _save_image(self, stream: Any, images: ImageNamespace) -> Optional[str]:
+        """Decode an image stream and queue it to be written, returning its path.
+
+        JPEG and JPEG 2000 images are saved as they are; the others are encoded
+        as PNG on the image store's writer threads.
+        """
+        with PdfMetrics.stage("image_decode", type(self).__name__):
+            image = PdfImages.from_pdfminer(stream)
+        if image is None:
+            return None
+        if image.pixels is None:
+            return images.save(image.encoded, image.extension)
+        return images.save_lazily(image.digest(), image.extension, image.to_bytes)
 
 app = Flask(__name__)
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+parse_cache = ParseCache(
+    os.environ.get("PARSE_CACHE_DIR", "parse_cache"),
+    max_bytes=int(os.environ.get("PARSE_CACHE_MAX_BYTES", 1 << 30)),
+)
+
+page_index = PageIndex(
+    os.environ.get("PAGE_INDEX_DIR", "page_index"),
+    max_bytes=int(os.environ.get("PAGE_INDEX_MAX_BYTES", 1 << 30)),
+)
+
+
+class ParseJob:
+    """A PDF parsed in the background and polled through ``GET /jobs/<id>``."""
+
+    def __init__(self, source: str, path: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.path = path
+        self.status = "queued"
+        self.results: List[dict] = []
+        self.all_image_files: List[str] = []
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+
+    def run(self) -> None:
+        self.status = "running"
+        start = time.perf_counter()
+        try:
+            pdf_blob = Blob(self.source, path=self.path)
+            for document in parse_cache.lazy_parse(_pdf_parser(), pdf_blob):
+                self.results.append(_page_result(document))
+                self.all_image_files.extend(document.metadata["images"])
+            self.status = "done"
+            serving_stats.record(time.perf_counter() - start, len(self.results))
+        except Exception as e:
+            app.logger.exception("Parse job %s failed", self.id)
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            os.remove(self.path)  # Clean up the uploaded file
+            self.finished_at = time.time()
+
+    def as_dict(self) -> dict:
+        body = {
+            "job_id": self.id,
+            "status": self.status,
+            "pages_done": len(self.results)
+        }
+        if self.status == "done":
+            body["results"] = self.results
+            body["all_image_files"] = self.all_image_files
+        elif self.status == "failed":
+            body["error"] = self.error
+        return body
+
+
+class JobQueue:
+    """Bounded pool of background parser workers.
+
+    At most ``workers + queue_depth`` jobs are unfinished at any time; further
+    submissions are refused so the server pushes back under load spikes.
+    Finished jobs are forgotten ``ttl`` seconds after they end, by a timer and
+    whenever jobs are submitted or looked up.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, ttl: float) -> None:
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse-job")
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._jobs: Dict[str, ParseJob] = {}
+        self._lock = threading.Lock()
+        # Runs when the oldest finished job is due to be forgotten.
+        self._timer: Optional[threading.Timer] = None
+
+    def submit(self, job: ParseJob) -> bool:
+        """Queue the job, or return False when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        self._expire()
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(job.run).add_done_callback(lambda _: self._finished())
+        return True
+
+    def get(self, job_id: str) -> Optional[ParseJob]:
+        self._expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _finished(self) -> None:
+        self._slots.release()
+        with self._lock:
+            if self._timer is None:
+                self._start_timer(self.ttl)
+
+    def _start_timer(self, delay: float) -> None:
+        self._timer = threading.Timer(delay, self._expire_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire_on_timer(self) -> None:
+        self._expire()
+        with self._lock:
+            finished = [job.finished_at for job in self._jobs.values() if job.finished_at is not None]
+            if finished:
+                self._start_timer(max(0.0, min(finished) + self.ttl - time.time()))
+            else:
+                self._timer = None
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.finished_at is not None and job.finished_at < cutoff:
+                    del self._jobs[job_id]
+
+
+job_queue = JobQueue(
+    workers=int(os.environ.get("PARSE_JOB_WORKERS", 2)),
+    queue_depth=int(os.environ.get("PARSE_JOB_QUEUE_DEPTH", 16)),
+    ttl=float(os.environ.get("PARSE_JOB_TTL", 3600)),
+)
+
+
+class ServingStats:
+    """Latency and page counters of this worker process.
+
+    The first request is reported apart from the rest so cold starts can be
+    compared with warm requests. Once ``recycle_after_pages`` pages have been
+    parsed, ``on_recycle`` is called so the server can replace the process
+    before pdfminer's caches grow too large.
+    """
+
+    def __init__(self, recycle_after_pages: int = 0) -> None:
+        self.recycle_after_pages = recycle_after_pages
+        self.on_recycle: Optional[Callable[[], None]] = None
+        self.warm_up_seconds: Optional[float] = None
+        self.first_request_seconds: Optional[float] = None
+        self.warm_requests = 0
+        self.warm_seconds = 0.0
+        self.pages_parsed = 0
+        self._recycling = False
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, pages: int) -> None:
+        PdfMetrics.observe("request", seconds)
+        with self._lock:
+            if self.first_request_seconds is None:
+                self.first_request_seconds = seconds
+            else:
+                self.warm_requests += 1
+                self.warm_seconds += seconds
+            self.pages_parsed += pages
+            recycle = (
+                    0 < self.recycle_after_pages <= self.pages_parsed
+                    and not self._recycling
+                    and self.on_recycle is not None
+            )
+            self._recycling = self._recycling or recycle
+        if recycle:
+            app.logger.info("Recycling worker %d after %d pages", os.getpid(), self.pages_parsed)
+            self.on_recycle()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "warm_up_seconds": self.warm_up_seconds,
+                "first_request_seconds": self.first_request_seconds,
+                "warm_requests": self.warm_requests,
+                "warm_mean_seconds": self.warm_seconds / self.warm_requests if self.warm_requests else None,
+                "pages_parsed": self.pages_parsed,
+                "recycle_after_pages": self.recycle_after_pages
+            }
+
+
+serving_stats = ServingStats(recycle_after_pages=int(os.environ.get("RECYCLE_AFTER_PAGES", 0)))
+
+
+image_store = ImageStore(
+    os.environ.get("IMAGE_STORE_DIR", "extracted_images"),
+    max_bytes=int(os.environ.get("IMAGE_STORE_MAX_BYTES", 1 << 30)),
+    max_age=float(os.environ.get("IMAGE_STORE_MAX_AGE", 7 * 24 * 3600)),
+    workers=int(os.environ.get("IMAGE_STORE_WORKERS", 4)),
+)
+
+# ``PARSE_WORKERS`` > 1 parses the pages of each document on that many processes.
+_PARSER_OPTIONS = {
+    "dedupe": True,
+    "extract_images": True,
+    "image_store": image_store,
+    "workers": int(os.environ.get("PARSE_WORKERS", 1)),
+}
+
+# Limits of one /parse_batch request, archives counted once expanded.
+_BATCH_MAX_DOCUMENTS = int(os.environ.get("BATCH_MAX_DOCUMENTS", 1000))
+_BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", 2 << 30))
+_BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 2))
+_BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", os.cpu_count() or 1))
+# Streamed uploads are copied to a temporary file past this size.
+_UPLOAD_SPOOL_BYTES = int(os.environ.get("UPLOAD_SPOOL_BYTES", 16 << 20))
+
+
+@functools.lru_cache(maxsize=None)
+def _pdf_parser() -> PDFPlumberParser:
+    """The configured parser, built once per process and shared by all requests."""
+    return PDFPlumberParser(**_PARSER_OPTIONS)
+
+
+def _request_parser() -> PDFPlumberParser:
+    """The shared parser, or one limited to the ``pages`` or ``metadata_only``
+    asked for in the query string, e.g. ``?pages=0-4`` for a preview.
+
+    Raises:
+        ValueError: The page selection is malformed.
+    """
+    pages = request.args.get("pages") or None
+    metadata_only = _flag("metadata_only")
+    if pages is None and not metadata_only:
+        return _pdf_parser()
+    return PDFPlumberParser(**_PARSER_OPTIONS, pages=pages, metadata_only=metadata_only)
+
+
+def _warm_up_pdf() -> bytes:
+    """A one-page PDF with a line of text, enough to exercise the whole parser."""
+    content = b"BT /F1 12 Tf 72 720 Td (WARM UP) Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+    ]
+    pdf = io.BytesIO()
+    pdf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(pdf.tell())
+        pdf.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = pdf.tell()
+    pdf.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    pdf.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    pdf.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return pdf.getvalue()
+
+
+def warm_up() -> None:
+    """Build the shared parser and run it once, so the lazy imports and font
+    tables of pdfplumber/pdfminer are loaded before the first request."""
+    start = time.perf_counter()
+    for _ in _pdf_parser().lazy_parse(Blob("warm-up.pdf", stream=io.BytesIO(_warm_up_pdf()))):
+        pass
+    serving_stats.warm_up_seconds = time.perf_counter() - start
+
+
+def _flag(name: str) -> bool:
+    """Whether the query string switches option ``name`` on."""
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _wants_ndjson() -> bool:
+    """Whether the client asked for one JSON line per page instead of one payload."""
+    if _flag("stream"):
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def _page_result(document: Document, compact: Optional[CompactPages] = None) -> dict:
+    """JSON of a page, with only its page-level metadata under ``compact``."""
+    return {
+        "page_content": document.page_content,
+        "metadata": dict(document.metadata) if compact is None else compact.fields(document.metadata)
+    }
+
+
+def _parse(parser: PDFPlumberParser, blob: Blob, incremental: bool = False) -> Iterator[Document]:
+    """Pages of the blob, from the parse cache unless only metadata is wanted.
+
+    With ``incremental``, the pages of earlier revisions are reused one by one
+    from the page index instead, see `PageIndex`.
+    """
+    if incremental:
+        # Changed pages are parsed on their own, after the pages they follow.
+        documents = parser._carry_structure(page_index.lazy_parse(parser, blob))
+    elif parser.metadata_only:
+        # Cheaper than hashing the whole upload for a cache key.
+        documents = parser.lazy_parse(blob)
+    else:
+        documents = parse_cache.lazy_parse(parser, blob)
+    return share_documents(documents)
+
+
+def _reused_pages(metadatas: Iterable[Mapping[str, Any]]) -> Optional[List[Any]]:
+    """Numbers of the pages taken from the page index, ``None`` when the pages
+    did not go through it."""
+    reused_pages = None
+    for metadata in metadatas:
+        if "reused" in metadata:
+            reused_pages = reused_pages if reused_pages is not None else []
+            if metadata["reused"]:
+                reused_pages.append(metadata["page"])
+    return reused_pages
+
+
+def _request_metrics() -> Optional[PdfMetrics.RequestMetrics]:
+    """Per-request stage breakdown, when asked for with ``?timings=1`` or
+    ``?profile=1`` (which adds a cProfile capture)."""
+    profile = _flag("profile")
+    if not (profile or _flag("timings")):
+        return None
+    return PdfMetrics.RequestMetrics(profile=profile)
+
+
+def _timings(metrics: PdfMetrics.RequestMetrics) -> dict:
+    """The request's stage breakdown, with ``cache_hit`` telling whether the
+    pages came from the parse cache instead of being parsed."""
+    timings = metrics.as_dict()
+    timings["cache_hit"] = timings["counters"].get("cache_hits", 0) > 0
+    return timings
+
+
+def _stream_ndjson(
+        documents: Iterator[Document],
+        start: float,
+        metrics: Optional[PdfMetrics.RequestMetrics] = None,
+        compact: bool = False,
+) -> Iterator[str]:
+    """Yield one JSON line per page as it is parsed, then a trailer line with
+    ``total_pages``, ``all_image_files``, and the ``reused_pages`` and
+    ``timings`` if requested. A parse that fails ends with an
+    ``{"error": ..., "pages": ...}`` line instead of the trailer.
+
+    With ``compact``, a ``{"document": ...}`` line with the document-level
+    metadata comes before the first page and the pages only carry their own.
+    """
+    if metrics is not None:
+        documents = metrics.iterate(documents)
+    pages = CompactPages() if compact else None
+    total_pages = 0
+    all_image_files = []
+    page_metadata = []
+    error = None
+    try:
+        for document in documents:
+            total_pages += 1
+            all_image_files.extend(document.metadata.get("images", []))
+            page_metadata.append(document.metadata)
+            line = json.dumps(_page_result(document, pages)) + "\n"
+            if pages is not None and total_pages == 1:
+                yield json.dumps({"document": pages.document}) + "\n"
+            yield line
+    except Exception as e:
+        # The 200 is already sent: the error is the last line instead of the trailer.
+        app.logger.exception("Streamed parse failed after %d pages", total_pages)
+        error = str(e)
+    finally:
+        if metrics is not None:
+            metrics.close()
+        serving_stats.record(time.perf_counter() - start, total_pages)
+
+    if error is not None:
+        trailer = {"error": error, "pages": total_pages}
+    else:
+        trailer = {
+            "total_pages": total_pages,
+            "all_image_files": all_image_files
+        }
+        reused_pages = _reused_pages(page_metadata)
+        if reused_pages is not None:
+            trailer["reused_pages"] = reused_pages
+    if metrics is not None:
+        trailer["timings"] = _timings(metrics)
+    yield json.dumps(trailer) + "\n"
+
+
+def _detached_upload(file: Any) -> Any:
+    """Copy of an uploaded file that outlives the request, in memory up to
+    ``_UPLOAD_SPOOL_BYTES`` and in a temporary file beyond."""
+    upload = tempfile.SpooledTemporaryFile(max_size=_UPLOAD_SPOOL_BYTES)
+    file.stream.seek(0)
+    shutil.copyfileobj(file.stream, upload, 1 << 20)
+    upload.seek(0)
+    return upload
+
+
+def _closing(lines: Iterator[str], file: Any) -> Iterator[str]:
+    """Pass a response body through, then close ``file``."""
+    try:
+        yield from lines
+    finally:
+        file.close()
+
+
+class _BatchTooLarge(ValueError):
+    """A batch upload goes past the document count or size limits."""
+
+
+def _spool_document(stream: Any, directory: str, budget: List[int]) -> str:
+    """Copy one document of a batch into ``directory`` and return its path.
+
+    ``budget`` holds the bytes the batch may still use and is charged for the
+    copy, so archives are bounded by what they expand to, not by their size.
+    """
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.pdf")
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(1 << 20), b""):
+            budget[0] -= len(chunk)
+            if budget[0] < 0:
+                raise _BatchTooLarge(f"Batch expands to more than {_BATCH_MAX_BYTES} bytes")
+            f.write(chunk)
+    return path
+
+
+def _archive_members(upload: Any) -> Optional[Iterator[Tuple[str, Any]]]:
+    """``(name, stream)`` of the PDFs in an uploaded zip or tar archive, or
+    ``None`` when the upload is not an archive."""
+    stream = upload.stream
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+
+        def zip_members() -> Iterator[Tuple[str, Any]]:
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                        with archive.open(info) as member:
+                            yield info.filename, member
+
+        return zip_members()
+    stream.seek(0)
+    if tarfile.is_tarfile(stream):
+        stream.seek(0)
+
+        def tar_members() -> Iterator[Tuple[str, Any]]:
+            with tarfile.open(fileobj=stream, mode="r:*") as archive:
+                for info in archive:
+                    if info.isfile() and info.name.lower().endswith(".pdf"):
+                        member = archive.extractfile(info)
+                        if member is not None:
+                            with member:
+                                yield info.name, member
+
+        return tar_members()
+    stream.seek(0)
+    return None
+
+
+def _spool_batch(uploads: Sequence[Any], directory: str) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """Copy every uploaded PDF, and every PDF inside uploaded archives, into
+    ``directory``.
+
+    Returns:
+        ``(source, path)`` of the documents to parse, and an error entry for
+        every archive member that could not be read. Archive members are named
+        ``<archive>/<member>``.
+
+    Raises:
+        _BatchTooLarge: The batch has too many documents or bytes.
+        ValueError: An archive is unreadable.
+    """
+    documents: List[Tuple[str, str]] = []
+    failures: List[dict] = []
+    budget = [_BATCH_MAX_BYTES]
+
+    def add(source: str, stream: Any) -> None:
+        if len(documents) + len(failures) >= _BATCH_MAX_DOCUMENTS:
+            raise _BatchTooLarge(f"Batch has more than {_BATCH_MAX_DOCUMENTS} documents")
+        documents.append((source, _spool_document(stream, directory, budget)))
+
+    for upload in uploads:
+        members = _archive_members(upload)
+        if members is None:
+            add(upload.filename, upload.stream)
+            continue
+        try:
+            for name, member in members:
+                source = f"{upload.filename}/{name}"
+                try:
+                    add(source, member)
+                except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error) as e:
+                    failures.append(_batch_error(source, e))
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            raise ValueError(f"Unreadable archive {upload.filename}: {e}") from e
+    return documents, failures
+
+
+def _batch_error(source: str, error: BaseException) -> dict:
+    return {"source": source, "error": f"{type(error).__name__}: {error}"}
+
+
+def _parse_batch_document(
+        parser: PDFPlumberParser, source: str, path: str, incremental: bool, compact: bool = False
+) -> dict:
+    """Worker entry point of /parse_batch: parse one document of the batch."""
+    pages = CompactPages() if compact else None
+    results = [
+        _page_result(document, pages)
+        for document in _parse(parser, Blob(source, path=path), incremental)
+    ]
+    entry = {
+        "source": source,
+        "total_pages": len(results),
+        "results": results,
+        "all_image_files": [
+            image for result in results for image in result["metadata"].get("images", [])
+        ],
+    }
+    if pages is not None:
+        entry["document"] = pages.document or {}
+    reused_pages = _reused_pages(result["metadata"] for result in results)
+    if reused_pages is not None:
+        entry["reused_pages"] = reused_pages
+    return entry
+
+
+def _run_batch(
+        parser: PDFPlumberParser,
+        documents: Sequence[Tuple[str, str]],
+        workers: int,
+        incremental: bool,
+        compact: bool = False,
+) -> Iterator[dict]:
+    """Parse the documents on ``workers`` processes and yield the entry of
+    each one as soon as it is done, whatever the order."""
+    if workers <= 1:
+        for source, path in documents:
+            try:
+                yield _parse_batch_document(parser, source, path, incremental, compact)
+            except Exception as e:
+                app.logger.warning("Batch document %s failed: %s", source, e)
+                yield _batch_error(source, e)
+        return
+
+    remaining = iter(documents)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # A bounded window of documents in flight, like _parallel_parse.
+        pending = {
+            pool.submit(_parse_batch_document, parser, source, path, incremental, compact): source
+            for _, (source, path) in zip(range(2 * workers), remaining)
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = pending.pop(future)
+                    following = next(remaining, None)
+                    if following is not None:
+                        pending[
+                            pool.submit(_parse_batch_document, parser, *following, incremental, compact)
+                        ] = following[0]
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        app.logger.warning("Batch document %s failed: %s", source, e)
+                        yield _batch_error(source, e)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _stream_batch(
+        parser: PDFPlumberParser,
+        documents: Sequence[Tuple[str, str]],
+        failures: Sequence[dict],
+        workers: int,
+        incremental: bool,
+        directory: tempfile.TemporaryDirectory,
+        start: float,
+        compact: bool = False,
+) -> Iterator[str]:
+    """Yield one JSON line per document as it finishes, then a trailer line with
+    the ``documents``, ``failed`` and ``total_pages`` counts."""
+    total_pages = 0
+    failed = len(failures)
+    try:
+        for failure in failures:
+            yield json.dumps(failure) + "\n"
+        for entry in _run_batch(parser, documents, workers, incremental, compact):
+            if "error" in entry:
+                failed += 1
+            else:
+                total_pages += entry["total_pages"]
+            yield json.dumps(entry) + "\n"
+    finally:
+        directory.cleanup()
+
+    serving_stats.record(time.perf_counter() - start, total_pages)
+    yield json.dumps({
+        "documents": len(documents) + len(failures),
+        "failed": failed,
+        "total_pages": total_pages
+    }) + "\n"
+
 
 @app.route('/parse_pdf', methods=['POST'])
 def parse_pdf():
@@ -166,26 +1081,154 @@ def parse_pdf():
     if file.filename == '':
         return "No file selected for uploading", 400
 
-    file.save(file.filename)
-    pdf_blob = Blob(file.filename)
+    start = time.perf_counter()
+    try:
+        parser = _request_parser()
+    except ValueError as e:
+        return str(e), 400
+    compact = _flag("compact")
+
+    if _wants_ndjson():
+        # The request closes the upload's stream before the body is sent, so
+        # the streamed parse reads a copy of its own.
+        upload = _detached_upload(file)
+        documents = _parse(parser, Blob(file.filename, stream=upload), incremental=_flag("incremental"))
+        metrics = _request_metrics()
+        response = Response(
+            _closing(_stream_ndjson(documents, start, metrics, compact), upload), mimetype=NDJSON_MIMETYPE
+        )
+        # Also when the client goes away before the body is started; the
+        # profiler is only released by ``close``.
+        response.call_on_close(upload.close)
+        if metrics is not None:
+            response.call_on_close(metrics.close)
+        return response
+
+    # Parse straight from the spooled upload instead of saving and re-reading it.
+    documents = _parse(parser, Blob(file.filename, stream=file.stream), incremental=_flag("incremental"))
+    metrics = _request_metrics()
 
-    pdf_parser = PDFPlumberParser(dedupe=True, extract_images=True)
+    pages = CompactPages() if compact else None
     results = []
     all_image_files = []
-    for document in pdf_parser.lazy_parse(pdf_blob):
-        results.append({
-            "page_content": document.page_content,
-            "metadata": document.metadata
-        })
-        all_image_files.extend(document.metadata["images"])
+    with contextlib.ExitStack() as stack:
+        if metrics is not None:
+            stack.callback(metrics.close)
+            stack.enter_context(metrics.active())
+        for document in documents:
+            results.append(_page_result(document, pages))
+            all_image_files.extend(document.metadata.get("images", []))
+    serving_stats.record(time.perf_counter() - start, len(results))
 
-    os.remove(file.filename)  # Clean up the uploaded file
-
-    return jsonify({
+    body = {
         "results": results,
         "all_image_files": all_image_files
+    }
+    if pages is not None:
+        # Every page's metadata is this updated with its own ``metadata``.
+        body["document"] = pages.document or {}
+    reused_pages = _reused_pages(result["metadata"] for result in results)
+    if reused_pages is not None:
+        body["reused_pages"] = reused_pages
+    if metrics is not None:
+        body["timings"] = _timings(metrics)
+    return jsonify(body)
+
+
+@app.route('/parse_batch', methods=['POST'])
+def parse_batch():
+    """Parse many PDFs, uploaded as several ``file`` parts and/or zip and tar
+    archives, ``?workers=N`` documents at a time.
+
+    The response is NDJSON: one line per document as it finishes, tagged with
+    its ``source``, either with its ``results`` or with the ``error`` that
+    stopped it, then a trailer with the counts. Accepts ``?pages``,
+    ``?metadata_only``, ``?incremental`` and ``?compact`` like /parse_pdf.
+    """
+    uploads = [file for file in request.files.getlist('file') if file.filename]
+    if not uploads:
+        return "No file part in the request", 400
+
+    start = time.perf_counter()
+    try:
+        parser = _request_parser()
+        workers = int(request.args.get("workers", _BATCH_WORKERS))
+    except ValueError as e:
+        return str(e), 400
+    workers = max(1, min(workers, _BATCH_MAX_WORKERS))
+
+    directory = tempfile.TemporaryDirectory(prefix="parse-batch-")
+    try:
+        documents, failures = _spool_batch(uploads, directory.name)
+    except _BatchTooLarge as e:
+        directory.cleanup()
+        return str(e), 413
+    except ValueError as e:
+        directory.cleanup()
+        return str(e), 400
+
+    return Response(
+        _stream_batch(
+            parser, documents, failures, workers, _flag("incremental"), directory, start, _flag("compact")
+        ),
+        mimetype=NDJSON_MIMETYPE,
+    )
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    if 'file' not in request.files:
+        return "No file part in the request", 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return "No file selected for uploading", 400
+
+    # The upload stream goes away with the request, so the job gets its own copy.
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, 'wb') as f:
+        file.save(f)
+
+    job = ParseJob(file.filename, path)
+    if not job_queue.submit(job):
+        os.remove(path)
+        return "Too many parse jobs queued, retry later", 429, {"Retry-After": "30"}
+
+    return jsonify(job.as_dict()), 202, {"Location": f"/jobs/{job.id}"}
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return "No such job", 404
+    return jsonify(job.as_dict())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage timings and counters of this worker process, for Prometheus."""
+    return Response(
+        PdfMetrics.render_prometheus()
+        + PdfMetrics.render_values("pdf_cache", parse_cache.stats())
+        + PdfMetrics.render_values("pdf_page_index", page_index.stats())
+        + PdfMetrics.render_values("pdf_image_store", image_store.stats())
+        + PdfMetrics.render_values("pdf_serving", serving_stats.as_dict()),
+        mimetype="text/plain; version=0.0.4",
+    )
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "cache": parse_cache.stats(),
+        "page_index": page_index.stats(),
+        "images": image_store.stats(),
+        "serving": serving_stats.as_dict()
     })
 
 
 if __name__ == "__main__":
+    # Development server only; serve production traffic with
+    # ``gunicorn -c gunicorn.conf.py app:app``.
     app.run(debug=True)
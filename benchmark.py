@@ -0,0 +1,998 @@
+"""Benchmarks for the PDF parsers.
+
+Every benchmark builds its own synthetic PDFs, so it runs offline:
+
+    python benchmark.py extract-calls --pages 50
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+_SAMPLE_TEXT = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua."
+)
+
+
+def write_pdf(
+    path: str,
+    pages: Sequence[bytes],
+    filler_size: int = 0,
+    images: Sequence[Tuple[int, int, bytes, bytes]] = (),
+    page_images: Optional[Sequence[Sequence[int]]] = None,
+    info: Optional[Dict[str, str]] = None,
+) -> None:
+    """Write a minimal PDF whose pages draw the given content streams.
+
+    Every page shares one Helvetica font resource named ``/F1``. ``filler_size``
+    random bytes are added as an unreferenced stream, to get large files that
+    are still cheap to parse.
+
+    ``images`` are ``(width, height, colorspace, samples)`` of 8-bit images,
+    stored Flate-compressed. ``page_images`` lists for every page the indices
+    of the images it may draw, as ``/Im<index>``. ``info`` is written as the
+    document information dictionary.
+    """
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    image_refs = []
+    for width, height, colorspace, samples in images:
+        data = zlib.compress(samples)
+        objects.append(
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace /%s /BitsPerComponent 8 /Filter /FlateDecode "
+            b"/Length %d >>\nstream\n" % (width, height, colorspace, len(data))
+            + data
+            + b"\nendstream"
+        )
+        image_refs.append(len(objects))
+    page_refs = []
+    for page_index, content in enumerate(pages):
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        xobjects = b" ".join(
+            b"/Im%d %d 0 R" % (index, image_refs[index])
+            for index in (page_images[page_index] if page_images else ())
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> /XObject << %s >> >> "
+            b"/Contents %d 0 R >>" % (xobjects, len(objects))
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(page_refs),
+        len(page_refs),
+    )
+    trailer_info = b""
+    if info:
+        objects.append(
+            b"<< %s >>" % b" ".join(
+                b"/%s (%s)" % (key.encode("latin-1"), value.encode("latin-1"))
+                for key, value in info.items()
+            )
+        )
+        trailer_info = b" /Info %d 0 R" % len(objects)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        if filler_size:
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n<< /Length %d >>\nstream\n" % (len(offsets), filler_size))
+            for start in range(0, filler_size, 1 << 20):
+                f.write(os.urandom(min(1 << 20, filler_size - start)))
+            f.write(b"\nendstream\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R%s >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(offsets) + 1, trailer_info, xref)
+        )
+
+
+def text_page(page_number: int, lines: int = 40) -> bytes:
+    """Content stream for a page of body text under a chapter heading."""
+    rows = [b"BT /F1 18 Tf 72 740 Td (CHAPTER %d) Tj ET" % (page_number // 10 + 1)]
+    rows.append(b"BT /F1 14 Tf 72 716 Td (Section %d) Tj ET" % page_number)
+    for row in range(lines):
+        rows.append(
+            b"BT /F1 10 Tf 72 %d Td (%s) Tj ET"
+            % (696 - row * 15, _SAMPLE_TEXT.encode("latin-1"))
+        )
+    return b"\n".join(rows)
+
+
+def make_text_pdf(directory: str, page_count: int) -> str:
+    """Write a text-only PDF with ``page_count`` pages and return its path."""
+    path = os.path.join(directory, f"text_{page_count}.pdf")
+    write_pdf(path, [text_page(n) for n in range(page_count)])
+    return path
+
+
+def table_page(page_number: int, rows: int = 12, columns: int = 4) -> bytes:
+    """Content stream for a ruled table with one 24pt number per cell."""
+    x0, y0, cell_width, cell_height = 56, 740, 125, 50
+    ops = [b"0.5 w"]
+    for row in range(rows + 1):
+        y = y0 - row * cell_height
+        ops.append(b"%d %d m %d %d l S" % (x0, y, x0 + columns * cell_width, y))
+    for column in range(columns + 1):
+        x = x0 + column * cell_width
+        ops.append(b"%d %d m %d %d l S" % (x, y0, x, y0 - rows * cell_height))
+    for row in range(rows):
+        for column in range(columns):
+            value = (page_number * rows + row) * columns + column
+            ops.append(
+                b"BT /F1 24 Tf %d %d Td (%d) Tj ET"
+                % (x0 + column * cell_width + 10, y0 - (row + 1) * cell_height + 15, value)
+            )
+    return b"\n".join(ops)
+
+
+def _photo(rng: random.Random, width: int = 240, height: int = 160) -> Tuple[int, int, bytes, bytes]:
+    """An RGB image of random bands, about as compressible as a photo."""
+    band = 8
+    samples = b"".join(rng.randbytes(width * 3) * band for _ in range(height // band))
+    return width, height // band * band, b"DeviceRGB", samples
+
+
+def _scan(rng: random.Random, width: int = 1275, height: int = 1650) -> Tuple[int, int, bytes, bytes]:
+    """A grayscale letter page at 150 dpi with dark bars where lines of print go."""
+    margin, line_height, bar_height = 150, 40, 14
+    lengths = [
+        rng.randrange(width // 2, width - margin)
+        for _ in range((height - 2 * margin) // line_height + 1)
+    ]
+    rows = []
+    for row in range(height):
+        line, offset = divmod(row - margin, line_height)
+        if row < margin or row >= height - margin or offset >= bar_height:
+            rows.append(b"\xff" * width)
+            continue
+        length = lengths[line]
+        rows.append(b"\xff" * margin + b"\x00" * (length - margin) + b"\xff" * (width - length))
+    return width, height, b"DeviceGray", b"".join(rows)
+
+
+CORPUS_KINDS = ("text", "images", "scanned", "many-pages", "tables")
+
+
+def make_corpus(
+    directory: str, sizes: Sequence[int], kinds: Sequence[str] = CORPUS_KINDS, seed: int = 0
+) -> List[Tuple[str, str, int]]:
+    """Write the synthetic corpus, the same bytes for the same arguments, and
+    return ``(name, path, page count)`` of every document.
+
+    * text: pages of body text.
+    * images: a little text, a logo repeated on every page and four photos.
+    * scanned: one full-page image per page and no text at all.
+    * many-pages: twenty times ``size`` short pages.
+    * tables: ruled tables of large numbers.
+    """
+    corpus = []
+    for kind in kinds:
+        for size in sizes:
+            rng = random.Random(f"{seed}:{kind}:{size}")
+            page_count = size * 20 if kind == "many-pages" else size
+            name = f"{kind}-{page_count}"
+            path = os.path.join(directory, f"{name}.pdf")
+            if kind == "text":
+                write_pdf(path, [text_page(n) for n in range(page_count)])
+            elif kind == "many-pages":
+                write_pdf(path, [text_page(n, lines=3) for n in range(page_count)])
+            elif kind == "tables":
+                write_pdf(path, [table_page(n) for n in range(page_count)])
+            elif kind == "images":
+                images = [_photo(rng, 120, 40)] + [_photo(rng) for _ in range(4 * page_count)]
+                pages = []
+                for n in range(page_count):
+                    draws = [b"q 120 0 0 40 72 40 cm /Im0 Do Q"] + [
+                        b"q 240 0 0 160 %d %d cm /Im%d Do Q"
+                        % (72 + i % 2 * 250, 300 - i // 2 * 180, 1 + 4 * n + i)
+                        for i in range(4)
+                    ]
+                    pages.append(text_page(n, lines=5) + b"\n" + b"\n".join(draws))
+                page_images = [[0] + list(range(1 + 4 * n, 5 + 4 * n)) for n in range(page_count)]
+                write_pdf(path, pages, images=images, page_images=page_images)
+            elif kind == "scanned":
+                images = [_scan(rng) for _ in range(page_count)]
+                pages = [b"q 612 0 0 792 0 0 cm /Im%d Do Q" % n for n in range(page_count)]
+                write_pdf(path, pages, images=images, page_images=[[n] for n in range(page_count)])
+            else:
+                raise ValueError(f"unknown corpus kind {kind!r}")
+            corpus.append((name, path, page_count))
+    return corpus
+
+
+def _count_calls(owner: type, name: str) -> Callable[[], int]:
+    """Patch ``owner.name`` to count its calls; returns a reader for the count."""
+    original = getattr(owner, name)
+    calls = [0]
+
+    def counted(*args, **kwargs):
+        calls[0] += 1
+        return original(*args, **kwargs)
+
+    setattr(owner, name, counted)
+    return lambda: calls[0]
+
+
+def parser_and_blob(parser_name: str, path: str, **kwargs: Any) -> Tuple[Any, Any]:
+    """One of the parsers by name, e.g. ``app.PDFPlumberParser`` or
+    ``PdfParser.PyPDFParser``, and the blob of ``path`` it takes."""
+    module_name, class_name = parser_name.split(".")
+    if module_name == "app":
+        import app
+
+        return getattr(app, class_name)(**kwargs), app.Blob(path)
+
+    import PdfParser
+    from langchain_community.document_loaders.blob_loaders import Blob
+
+    return getattr(PdfParser, class_name)(**kwargs), Blob.from_path(path)
+
+
+def parse_file(parser_name: str, path: str, **kwargs: Any) -> Iterator[Any]:
+    """Parse ``path`` with one of the parsers by name, see `parser_and_blob`."""
+    parser, blob = parser_and_blob(parser_name, path, **kwargs)
+    return parser.lazy_parse(blob)
+
+
+def _peak_rss_after_parse(parser_name: str, path: str) -> int:
+    """Run in a fresh process: parse every page and return peak RSS in KiB."""
+    for _ in parse_file(parser_name, path):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _rss_growth_of_parse(path: str) -> int:
+    """Run in a fresh process: peak RSS growth in KiB from parsing ``path`` with
+    app.py's parser, after the imports are paid for."""
+    import pdfplumber  # noqa: F401
+
+    from app import Blob, PDFPlumberParser
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for _ in PDFPlumberParser().lazy_parse(Blob(path)):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+
+def bench_extract_calls(args: argparse.Namespace) -> None:
+    """pdfplumber text extraction passes and wall time per page in app.py's parser."""
+    import pdfplumber.page
+
+    from app import Blob, PDFPlumberParser
+
+    # ``extract_text`` and ``get_textmap`` both build the page's text map with
+    # ``_get_textmap``, which is only called again when its cache misses.
+    read_calls = _count_calls(pdfplumber.page.Page, "_get_textmap")
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_text_pdf(directory, args.pages)
+        parser = PDFPlumberParser(dedupe=True)
+        start = time.perf_counter()
+        pages = sum(1 for _ in parser.lazy_parse(Blob(path)))
+        elapsed = time.perf_counter() - start
+
+    print(f"pages:                   {pages}")
+    print(f"text map builds/page:    {read_calls() / pages:.2f}")
+    print(f"ms/page:                 {elapsed * 1000 / pages:.2f}")
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Peak RSS while streaming documents of growing page counts."""
+    context = multiprocessing.get_context("spawn")
+    peaks = []
+    with tempfile.TemporaryDirectory() as directory:
+        for page_count in args.pages:
+            path = make_text_pdf(directory, page_count)
+            # ru_maxrss never goes down, so every size gets its own process.
+            with context.Pool(1) as pool:
+                peak = pool.apply(_peak_rss_after_parse, (args.parser, path))
+            peaks.append(peak)
+            print(f"{page_count:>6} pages: peak RSS {peak / 1024:8.1f} MiB")
+
+    growth = max(peaks) / min(peaks)
+    print(f"growth: {growth:.2f}x (allowed {args.max_growth:.2f}x)")
+    if growth > args.max_growth:
+        raise SystemExit("peak RSS grows with page count")
+
+
+def bench_blob_memory(args: argparse.Namespace) -> None:
+    """Peak RSS of parsing a large PDF relative to its file size."""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.pdf")
+        write_pdf(path, [text_page(n) for n in range(args.pages)], args.size_mb << 20)
+        file_size = os.path.getsize(path)
+        with context.Pool(1) as pool:
+            growth = pool.apply(_rss_growth_of_parse, (path,)) * 1024
+
+    print(f"file size:       {file_size / (1 << 20):8.1f} MiB")
+    print(f"peak RSS growth: {growth / (1 << 20):8.1f} MiB ({growth / file_size:.2f}x file size)")
+
+
+def _synthetic_scans(count: int, height: int = 200, width: int = 600) -> List[Any]:
+    """Grayscale images of dark bars on white, in the shape of lines of print."""
+    import numpy as np
+
+    images = []
+    for index in range(count):
+        image = np.full((height, width, 3), 255, dtype=np.uint8)
+        for row in range(20, height - 20, 30):
+            length = width - 40 - (index * 37 + row) % 200
+            image[row : row + 12, 20:length] = 0
+        images.append(image)
+    return images
+
+
+def bench_ocr_throughput(args: argparse.Namespace) -> None:
+    """Images per second of page-by-page OCR against the batched OCR stage."""
+    from PdfParser import (
+        OCRBatcher,
+        _DocumentImages,
+        extract_from_images_with_rapidocr,
+        warm_up_rapidocr,
+    )
+
+    class _Page:
+        def __init__(self) -> None:
+            self.page_content = ""
+
+    images = _synthetic_scans(args.images)
+    pages = [
+        images[start : start + args.images_per_page]
+        for start in range(0, len(images), args.images_per_page)
+    ]
+    warm_up_rapidocr()  # keep model loading out of the measurement
+
+    start = time.perf_counter()
+    for page_images in pages:
+        extract_from_images_with_rapidocr(page_images)
+    elapsed = time.perf_counter() - start
+    print(f"page by page:                    {len(images) / elapsed:8.2f} images/s")
+
+    for workers in args.workers:
+        seen = _DocumentImages()
+        keyed = [
+            [seen.add((page_number, i), lambda image=image: image) for i, image in enumerate(page)]
+            for page_number, page in enumerate(pages)
+        ]
+        with OCRBatcher(
+            batch_size=args.batch_size, workers=workers, processes=args.processes
+        ) as batcher:
+            start = time.perf_counter()
+            for _ in batcher.run(((_Page(), page) for page in keyed), seen):
+                pass
+            elapsed = time.perf_counter() - start
+        print(
+            f"batch {args.batch_size:>4}, {workers:>2} workers:       "
+            f"{len(images) / elapsed:8.2f} images/s"
+        )
+
+
+def bench_pdfminer_pages(args: argparse.Namespace) -> None:
+    """PDFMinerParser per-page mode against one extract_text call per page."""
+    from pdfminer.high_level import extract_text
+    from pdfminer.pdfpage import PDFPage
+
+    with tempfile.TemporaryDirectory() as directory:
+        for page_count in args.pages:
+            path = make_text_pdf(directory, page_count)
+
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                page_total = sum(1 for _ in PDFPage.get_pages(f))
+                per_call = [extract_text(f, page_numbers=[i]) for i in range(page_total)]
+            per_call_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            single_pass = [
+                document.page_content
+                for document in parse_file(
+                    "PdfParser.PDFMinerParser", path, concatenate_pages=False
+                )
+            ]
+            single_pass_seconds = time.perf_counter() - start
+
+            assert single_pass == per_call, "per-page text differs"
+            print(
+                f"{page_count:>6} pages: extract_text per page {per_call_seconds:8.2f}s, "
+                f"single pass {single_pass_seconds:8.2f}s "
+                f"({per_call_seconds / single_pass_seconds:.1f}x)"
+            )
+
+
+LOCAL_PARSERS = [
+    "PdfParser.PyPDFParser",
+    "PdfParser.PDFMinerParser",
+    "PdfParser.PyMuPDFParser",
+    "PdfParser.PyPDFium2Parser",
+    "PdfParser.PDFPlumberParser",
+    "PdfParser.AdaptivePDFParser",
+    "app.PDFPlumberParser",
+]
+# Options that make every parser yield one Document per page.
+_PER_PAGE_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "PdfParser.PDFMinerParser": {"concatenate_pages": False},
+}
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _measure_parse(parser_name: str, path: str, pages: int, repeat: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run in a fresh process: parse ``path`` ``repeat`` times and report the
+    fastest run, the peak RSS and the amount of text produced."""
+    try:
+        best = None
+        for _ in range(repeat):
+            latencies = []
+            chars = 0
+            start = last = time.perf_counter()
+            for document in parse_file(parser_name, path, **options):
+                now = time.perf_counter()
+                latencies.append(now - last)
+                last = now
+                chars += len(document.page_content)
+            if best is None or last - start < best[0]:
+                best = (last - start, sorted(latencies), chars)
+    except Exception as e:  # a missing backend or a parser bug skips this row only
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    seconds, latencies, chars = best
+    return {
+        "pages_per_second": pages / seconds if seconds else float("inf"),
+        "p50_ms": _percentile(latencies, 0.50) * 1000 if latencies else 0.0,
+        "p95_ms": _percentile(latencies, 0.95) * 1000 if latencies else 0.0,
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "chars": chars,
+    }
+
+
+def bench_parsers(args: argparse.Namespace) -> None:
+    """Throughput, page latency, peak RSS and output size of every local parser
+    on a synthetic corpus, optionally compared with a JSON baseline."""
+    context = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = make_corpus(directory, args.sizes, args.kinds, args.seed)
+        # A fresh process per run, so peak RSS and warm caches do not carry over.
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            for name, path, pages in corpus:
+                print(f"{name} ({os.path.getsize(path) / (1 << 20):.1f} MiB)")
+                print(f"  {'parser':<28} {'pages/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'RSS MiB':>8} {'chars':>9} {'vs ref':>7}")
+                reference = None
+                for parser_name in args.parsers:
+                    options = dict(_PER_PAGE_OPTIONS.get(parser_name, {}))
+                    if args.extract_images:
+                        options["extract_images"] = True
+                    result = pool.apply(_measure_parse, (parser_name, path, pages, args.repeat, options))
+                    results[f"{name}/{parser_name}"] = result
+                    if "error" in result:
+                        print(f"  {parser_name:<28} skipped: {result['error']}")
+                        continue
+                    if reference is None:
+                        reference = result["chars"]
+                    delta = (result["chars"] - reference) / reference * 100 if reference else 0.0
+                    print(
+                        f"  {parser_name:<28} {result['pages_per_second']:9.1f} "
+                        f"{result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+                        f"{result['peak_rss_mib']:8.1f} {result['chars']:9d} {delta:+6.1f}%"
+                    )
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump(
+                {"machine": platform.platform(), "python": platform.python_version(), "results": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"baseline written to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        for key, result in sorted(results.items()):
+            before = baseline.get(key, {})
+            if "error" in result or "pages_per_second" not in before:
+                continue
+            ratio = result["pages_per_second"] / before["pages_per_second"]
+            if ratio < 1 - args.max_regression:
+                regressions.append(f"{key}: {before['pages_per_second']:.1f} -> {result['pages_per_second']:.1f} pages/s")
+        if regressions:
+            raise SystemExit("throughput regressions:\n  " + "\n  ".join(regressions))
+        print(f"no throughput regression over {args.max_regression:.0%} against {args.baseline}")
+
+
+def bench_preview(args: argparse.Namespace) -> None:
+    """Time to a first-pages preview and to metadata only on a long document."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_text_pdf(directory, args.pages)
+        print(f"{args.pages} pages, preview of pages {args.preview!r}")
+        for parser_name in args.parsers:
+            options = dict(_PER_PAGE_OPTIONS.get(parser_name, {}))
+            timings = []
+            try:
+                for mode in ({"pages": args.preview}, {"metadata_only": True}):
+                    start = time.perf_counter()
+                    for _ in parse_file(parser_name, path, **options, **mode):
+                        pass
+                    timings.append((time.perf_counter() - start) * 1000)
+            except ImportError as e:
+                print(f"  {parser_name:<28} skipped: {e}")
+                continue
+            print(f"  {parser_name:<28} preview {timings[0]:8.1f} ms, metadata only {timings[1]:8.1f} ms")
+
+
+def bench_pdfminer_layout(args: argparse.Namespace) -> None:
+    """CPU time of PDFMinerParser's single layout pass per page against
+    interpreting every page twice, once for the text and once for the images."""
+    import io
+
+    from pdfminer.converter import PDFPageAggregator, TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    from PdfParser import _layout_images, _layout_text
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, path, pages in make_corpus(directory, args.sizes, args.kinds):
+            start = time.process_time()
+            two_pass = []
+            with open(path, "rb") as f:
+                text_io = io.StringIO()
+                rsrcmgr = PDFResourceManager()
+                text_interpreter = PDFPageInterpreter(rsrcmgr, TextConverter(rsrcmgr, text_io, laparams=LAParams()))
+                aggregator = PDFPageAggregator(rsrcmgr, laparams=LAParams())
+                image_interpreter = PDFPageInterpreter(rsrcmgr, aggregator)
+                for page in PDFPage.get_pages(f):
+                    text_interpreter.process_page(page)
+                    image_interpreter.process_page(page)
+                    aggregator.get_result()
+                    two_pass.append(text_io.getvalue())
+                    text_io.truncate(0)
+                    text_io.seek(0)
+            two_pass_seconds = time.process_time() - start
+
+            start = time.process_time()
+            single_pass = []
+            image_count = 0
+            with open(path, "rb") as f:
+                rsrcmgr = PDFResourceManager()
+                aggregator = PDFPageAggregator(rsrcmgr, laparams=LAParams())
+                interpreter = PDFPageInterpreter(rsrcmgr, aggregator)
+                for page in PDFPage.get_pages(f):
+                    interpreter.process_page(page)
+                    layout = aggregator.get_result()
+                    single_pass.append(_layout_text(layout))
+                    image_count += sum(1 for _ in _layout_images(layout))
+            single_pass_seconds = time.process_time() - start
+
+            assert single_pass == two_pass, f"{name}: page text differs"
+            print(
+                f"{name:>16}: two passes {two_pass_seconds * 1000 / pages:8.2f} ms/page, "
+                f"one pass {single_pass_seconds * 1000 / pages:8.2f} ms/page "
+                f"({two_pass_seconds / single_pass_seconds:.2f}x), {image_count} images"
+            )
+
+
+def bench_incremental(args: argparse.Namespace) -> None:
+    """Time to parse a revision that changes a few pages of a document already
+    in the page index, against parsing it in full."""
+    from PdfCache import PageIndex
+
+    with tempfile.TemporaryDirectory() as directory:
+        pages = [text_page(n) for n in range(args.pages)]
+        first = os.path.join(directory, "first.pdf")
+        write_pdf(first, pages)
+        revised = list(pages)
+        for page_number in random.Random(0).sample(range(args.pages), args.changed):
+            revised[page_number] = text_page(args.pages + page_number)
+        second = os.path.join(directory, "second.pdf")
+        write_pdf(second, revised)
+
+        print(f"{args.pages} pages, {args.changed} changed")
+        for parser_name in args.parsers:
+            options = dict(_PER_PAGE_OPTIONS.get(parser_name, {}))
+            index = PageIndex(os.path.join(directory, f"index-{parser_name}"))
+            try:
+                parser, blob = parser_and_blob(parser_name, first, **options)
+                for _ in index.lazy_parse(parser, blob):
+                    pass
+                _, blob = parser_and_blob(parser_name, second, **options)
+                start = time.perf_counter()
+                for _ in parser.lazy_parse(blob):
+                    pass
+                full_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                reused = sum(document.metadata["reused"] for document in index.lazy_parse(parser, blob))
+                incremental_seconds = time.perf_counter() - start
+            except ImportError as e:
+                print(f"  {parser_name:<28} skipped: {e}")
+                continue
+            print(
+                f"  {parser_name:<28} full {full_seconds * 1000:8.1f} ms, incremental "
+                f"{incremental_seconds * 1000:8.1f} ms ({full_seconds / incremental_seconds:.1f}x), "
+                f"{reused} pages reused"
+            )
+
+
+def _raw_images(width: int, height: int) -> Dict[str, Any]:
+    """One `PdfImages.RawImage` of every sample layout, of scan-like content."""
+    import numpy as np
+
+    from PdfImages import ColorSpace, RawImage
+
+    rng = np.random.default_rng(0)
+    # Dark bars on white with some noise, like print on a scanned page.
+    page = np.full((height, width), 250, dtype=np.uint8)
+    for top in range(40, height - 40, 40):
+        page[top : top + 14, 60 : width - int(rng.integers(60, width // 2))] = 20
+    page = page - rng.integers(0, 8, size=page.shape, dtype=np.uint8)
+    rgb = np.stack([page, page // 2 + 64, 255 - page], axis=2)
+    cmyk = np.concatenate([255 - rgb, np.zeros((height, width, 1), np.uint8)], axis=2)
+    gray = ColorSpace("DeviceGray", 1)
+    palette = ColorSpace("Indexed", 1, ColorSpace("DeviceRGB", 3), 15, bytes(range(48)))
+    mask = RawImage(width, height, 8, gray, (), page.tobytes())
+    nibbles = np.pad(page >> 4, ((0, 0), (0, width % 2)))
+    indices = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+    return {
+        "gray 8-bit": RawImage(width, height, 8, gray, (), page.tobytes()),
+        "rgb 8-bit": RawImage(width, height, 8, ColorSpace("DeviceRGB", 3), (), rgb.tobytes()),
+        "rgb 16-bit": RawImage(
+            width, height, 16, ColorSpace("DeviceRGB", 3), (),
+            (rgb.astype(">u2") * 257).tobytes(),
+        ),
+        "cmyk 8-bit": RawImage(width, height, 8, ColorSpace("DeviceCMYK", 4), (), cmyk.tobytes()),
+        "bilevel 1-bit": RawImage(
+            width, height, 1, gray, (), np.packbits(page > 128, axis=1).tobytes()
+        ),
+        "indexed 4-bit": RawImage(width, height, 4, palette, (), indices.tobytes()),
+        "rgb + smask": RawImage(
+            width, height, 8, ColorSpace("DeviceRGB", 3), (), rgb.tobytes(), smask=mask
+        ),
+    }
+
+
+def bench_images(args: argparse.Namespace) -> None:
+    """Megapixels per second of image decoding, and of PNG encoding on one
+    thread against a pool of threads."""
+    from PdfImages import decode_image, encode_png, encode_pngs
+
+    megapixels = args.width * args.height / 1e6
+    decoded = []
+    for name, raw in _raw_images(args.width, args.height).items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            image = decode_image(raw)
+        elapsed = time.perf_counter() - start
+        decoded.append(image.pixels)  # type: ignore[union-attr]
+        print(f"decode {name:<14} {megapixels * args.repeat / elapsed:8.1f} MP/s")
+
+    images = decoded * args.repeat
+    start = time.perf_counter()
+    sizes = [len(encode_png(pixels)) for pixels in images]
+    elapsed = time.perf_counter() - start
+    print(
+        f"png encode, 1 thread     {megapixels * len(images) / elapsed:8.1f} MP/s, "
+        f"{sum(sizes) / len(sizes) / 1024:.0f} KiB per image"
+    )
+    for workers in args.workers:
+        start = time.perf_counter()
+        for _ in encode_pngs(images, workers):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"png encode, {workers:>2} threads   {megapixels * len(images) / elapsed:8.1f} MP/s")
+
+
+def _traced_bytes(build: Callable[[], Any]) -> Tuple[Any, int]:
+    """What ``build`` returns and the bytes it allocated that are still held."""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        value = build()
+        return value, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_metadata(args: argparse.Namespace) -> None:
+    """Memory held by the page metadata and size of the /parse_pdf JSON, with
+    the document-level metadata copied into every page against shared by the
+    pages and emitted once (``?compact=1``)."""
+    import app
+    from PdfRecords import CompactPages
+
+    info = {
+        "Title": "Annual report of the synthetic benchmark corporation",
+        "Author": "Benchmark authors",
+        "Subject": "Page metadata",
+        "Creator": "benchmark.py",
+        "Producer": "benchmark.py write_pdf",
+        "CreationDate": "D:20240101000000Z",
+        "ModDate": "D:20240101000000Z",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "document.pdf")
+        write_pdf(path, [text_page(n, args.lines) for n in range(args.pages)], info=info)
+        documents = list(app.PDFPlumberParser().lazy_parse(app.Blob(path)))
+
+    _, copied_bytes = _traced_bytes(lambda: [dict(d.metadata) for d in documents])
+    _, shared_bytes = _traced_bytes(lambda: [d.metadata.copy() for d in documents])
+    print(
+        f"{len(documents)} pages, metadata held: {copied_bytes / 1024:8.1f} KiB copied per page, "
+        f"{shared_bytes / 1024:8.1f} KiB shared ({copied_bytes / shared_bytes:.1f}x less)"
+    )
+
+    full = [app._page_result(d) for d in documents]
+    pages = CompactPages()
+    compact = [app._page_result(d, pages) for d in documents]
+    for label, full_body, compact_body in (
+        ("JSON", {"results": full}, {"document": pages.document, "results": compact}),
+        (
+            "JSON metadata",
+            [r["metadata"] for r in full],
+            {"document": pages.document, "results": [r["metadata"] for r in compact]},
+        ),
+    ):
+        full_size = len(json.dumps(full_body))
+        compact_size = len(json.dumps(compact_body))
+        print(
+            f"{label:<14} {full_size / 1024:8.1f} KiB full, {compact_size / 1024:8.1f} KiB compact "
+            f"({1 - compact_size / full_size:.0%} smaller)"
+        )
+
+
+class FakeTextractClient:
+    """Stand-in for a boto3 Textract client: answers ``detect_document_text``
+    and ``analyze_document`` after ``latency`` seconds, and refuses calls with
+    a ``ThrottlingException`` while ``max_in_flight`` are already running."""
+
+    class ClientError(Exception):
+        """Shaped like ``botocore.exceptions.ClientError``."""
+
+        def __init__(self, code: str) -> None:
+            super().__init__(code)
+            self.response = {"Error": {"Code": code, "Message": code}}
+
+    def __init__(self, latency: float = 0.2, max_in_flight: int = 10) -> None:
+        import threading
+
+        self.latency = latency
+        self.max_in_flight = max_in_flight
+        self.calls = 0
+        self.throttled = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def detect_document_text(self, Document: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            if self._in_flight >= self.max_in_flight:
+                self.throttled += 1
+                raise self.ClientError("ThrottlingException")
+            self._in_flight += 1
+        try:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        text = Document["Bytes"].decode("latin-1")
+        return {
+            "DocumentMetadata": {"Pages": 1},
+            "Blocks": [
+                {"BlockType": "PAGE", "Id": "page-1", "Page": 1},
+                {"BlockType": "LINE", "Id": "line-1", "Page": 1, "Text": text},
+            ],
+        }
+
+    def analyze_document(self, Document: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        return self.detect_document_text(Document)
+
+
+def bench_textract(args: argparse.Namespace) -> None:
+    """Documents per second of `AmazonTextractPDFParser.lazy_parse_many` with
+    Textract calls made one at a time against concurrently, on a fake client
+    with simulated latency and throttling."""
+    from langchain_community.document_loaders.blob_loaders import Blob
+
+    from PdfParser import AmazonTextractPDFParser, TextractBatcher
+
+    texts = [f"document {n}" for n in range(args.documents)]
+    blobs = [Blob.from_data(text.encode("latin-1"), path=f"document-{n}.pdf") for n, text in enumerate(texts)]
+    for concurrency in args.concurrency:
+        client = FakeTextractClient(latency=args.latency, max_in_flight=args.max_in_flight)
+        # Real Textract calls take seconds; scale the default backoff alike.
+        batcher = TextractBatcher(concurrency, backoff=args.latency)
+        parser = AmazonTextractPDFParser(client=client, textract_batcher=batcher, linearize=False)
+        start = time.perf_counter()
+        try:
+            documents = list(parser.lazy_parse_many(blobs))
+        except FakeTextractClient.ClientError:
+            print(f"concurrency {concurrency:>3}: still throttled after {batcher.max_retries} retries")
+            continue
+        elapsed = time.perf_counter() - start
+        in_order = [document.page_content for document in documents] == texts and [
+            document.metadata["source"] for document in documents
+        ] == [blob.source for blob in blobs]
+        print(
+            f"concurrency {concurrency:>3}: {len(blobs) / elapsed:8.2f} documents/s, "
+            f"{client.throttled:>4} throttled calls retried, in order: {in_order}"
+        )
+
+
+def _import_times(code: str) -> Dict[str, Dict[str, int]]:
+    """Run ``code`` under ``python -X importtime`` and return, per imported
+    module, its self and cumulative import time in microseconds and its depth."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {
+            "self": int(self_us),
+            "cumulative": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        }
+    return modules
+
+
+def bench_import_time(args: argparse.Namespace) -> None:
+    """Import cost of PdfParser.py plus one text-only parser, from -X importtime."""
+    code = f"import PdfParser; PdfParser.{args.parser}()"
+    runs = [_import_times(code) for _ in range(args.repeat)]
+    # Take the fastest run; the others only add noise from a cold disk cache.
+    modules = min(
+        runs,
+        key=lambda run: sum(m["cumulative"] for m in run.values() if m["depth"] == 0),
+    )
+    total_ms = sum(m["cumulative"] for m in modules.values() if m["depth"] == 0) / 1000
+
+    print(f"{code}")
+    print(f"total import time: {total_ms:8.1f} ms (budget {args.max_ms:.0f} ms)")
+    print("slowest modules (self time):")
+    for name, times in sorted(modules.items(), key=lambda m: -m[1]["self"])[:10]:
+        print(f"  {times['self'] / 1000:8.1f} ms  {name}")
+
+    forbidden = sorted(
+        name for name in modules if name.split(".")[0] in args.forbid
+    )
+    if forbidden:
+        raise SystemExit(f"imported modules a text-only parser does not need: {forbidden}")
+    if total_ms > args.max_ms:
+        raise SystemExit("import time is over budget")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract_calls = commands.add_parser("extract-calls", help=bench_extract_calls.__doc__)
+    extract_calls.add_argument("--pages", type=int, default=50)
+    extract_calls.set_defaults(run=bench_extract_calls)
+
+    memory = commands.add_parser("memory", help=bench_memory.__doc__)
+    memory.add_argument("--parser", default="app.PDFPlumberParser")
+    memory.add_argument("--pages", type=int, nargs="+", default=[100, 500, 2000])
+    memory.add_argument("--max-growth", type=float, default=1.25)
+    memory.set_defaults(run=bench_memory)
+
+    blob_memory = commands.add_parser("blob-memory", help=bench_blob_memory.__doc__)
+    blob_memory.add_argument("--size-mb", type=int, default=500)
+    blob_memory.add_argument("--pages", type=int, default=10)
+    blob_memory.set_defaults(run=bench_blob_memory)
+
+    ocr = commands.add_parser("ocr-throughput", help=bench_ocr_throughput.__doc__)
+    ocr.add_argument("--images", type=int, default=200)
+    ocr.add_argument("--images-per-page", type=int, default=2)
+    ocr.add_argument("--batch-size", type=int, default=32)
+    ocr.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    ocr.add_argument("--processes", action="store_true")
+    ocr.set_defaults(run=bench_ocr_throughput)
+
+    pdfminer_pages = commands.add_parser("pdfminer-pages", help=bench_pdfminer_pages.__doc__)
+    pdfminer_pages.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    pdfminer_pages.set_defaults(run=bench_pdfminer_pages)
+
+    import_time = commands.add_parser("import-time", help=bench_import_time.__doc__)
+    import_time.add_argument("--parser", default="PyPDFium2Parser")
+    # Most of it is langchain_core, whose Document and BaseBlobParser the
+    # parsers build on; the backends are what a text-only parser must not load.
+    import_time.add_argument("--max-ms", type=float, default=1000)
+    import_time.add_argument("--repeat", type=int, default=5)
+    import_time.add_argument(
+        "--forbid",
+        nargs="*",
+        default=["numpy", "fitz", "pdfminer", "pdfplumber", "pypdf", "rapidocr_onnxruntime"],
+    )
+    import_time.set_defaults(run=bench_import_time)
+
+    parsers = commands.add_parser("parsers", help=bench_parsers.__doc__)
+    parsers.add_argument("--parsers", nargs="+", default=LOCAL_PARSERS)
+    parsers.add_argument("--kinds", nargs="+", choices=CORPUS_KINDS, default=list(CORPUS_KINDS))
+    parsers.add_argument("--sizes", type=int, nargs="+", default=[5, 50])
+    parsers.add_argument("--seed", type=int, default=0)
+    parsers.add_argument("--repeat", type=int, default=3)
+    parsers.add_argument("--extract-images", action="store_true")
+    parsers.add_argument("--write-baseline", metavar="PATH")
+    parsers.add_argument("--baseline", metavar="PATH")
+    parsers.add_argument("--max-regression", type=float, default=0.2)
+    parsers.set_defaults(run=bench_parsers)
+
+    pdfminer_layout = commands.add_parser("pdfminer-layout", help=bench_pdfminer_layout.__doc__)
+    pdfminer_layout.add_argument("--kinds", nargs="+", choices=CORPUS_KINDS, default=["text", "images", "tables"])
+    pdfminer_layout.add_argument("--sizes", type=int, nargs="+", default=[20])
+    pdfminer_layout.set_defaults(run=bench_pdfminer_layout)
+
+    preview = commands.add_parser("preview", help=bench_preview.__doc__)
+    preview.add_argument("--pages", type=int, default=3000)
+    preview.add_argument("--preview", default="0-4")
+    preview.add_argument("--parsers", nargs="+", default=LOCAL_PARSERS)
+    preview.set_defaults(run=bench_preview)
+
+    incremental = commands.add_parser("incremental", help=bench_incremental.__doc__)
+    incremental.add_argument("--pages", type=int, default=200)
+    incremental.add_argument("--changed", type=int, default=5)
+    incremental.add_argument("--parsers", nargs="+", default=LOCAL_PARSERS)
+    incremental.set_defaults(run=bench_incremental)
+
+    images = commands.add_parser("images", help=bench_images.__doc__)
+    images.add_argument("--width", type=int, default=1275)
+    images.add_argument("--height", type=int, default=1650)
+    images.add_argument("--repeat", type=int, default=5)
+    images.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    images.set_defaults(run=bench_images)
+
+    metadata = commands.add_parser("metadata", help=bench_metadata.__doc__)
+    metadata.add_argument("--pages", type=int, default=1000)
+    metadata.add_argument("--lines", type=int, default=5)
+    metadata.set_defaults(run=bench_metadata)
+
+    textract = commands.add_parser("textract", help=bench_textract.__doc__)
+    textract.add_argument("--documents", type=int, default=100)
+    textract.add_argument("--latency", type=float, default=0.2)
+    textract.add_argument("--max-in-flight", type=int, default=10)
+    textract.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16, 32])
+    textract.set_defaults(run=bench_textract)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Fixtures shared by the tests."""
+
+import pytest
+
+import app
+from PdfCache import PageIndex, ParseCache
+from PdfImageStore import ImageStore
+
+
+@pytest.fixture
+def app_state(tmp_path, monkeypatch):
+    """Point app.py's parse cache, page index and image store at empty
+    directories under ``tmp_path``, for the duration of a test."""
+    store = ImageStore(str(tmp_path / "images"))
+    monkeypatch.setattr(app, "parse_cache", ParseCache(str(tmp_path / "parse_cache")))
+    monkeypatch.setattr(app, "page_index", PageIndex(str(tmp_path / "page_index")))
+    monkeypatch.setattr(app, "image_store", store)
+    monkeypatch.setattr(app, "_PARSER_OPTIONS", {**app._PARSER_OPTIONS, "image_store": store})
+    # The shared parser holds the image store it was built with.
+    app._pdf_parser.cache_clear()
+    yield tmp_path
+    app._pdf_parser.cache_clear()
+
+
+@pytest.fixture
+def client(app_state):
+    return app.app.test_client()
@@ -0,0 +1,31 @@
+"""Production serving mode for app.py:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Every worker process warms its own parser at boot and is replaced after
+``RECYCLE_AFTER_PAGES`` parsed pages (0 disables recycling).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+# Large documents take minutes to parse synchronously.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 600))
+graceful_timeout = timeout
+# Load the app in each worker, not the master, so nothing is warmed before fork.
+preload_app = False
+
+
+def post_worker_init(worker):
+    import app
+
+    app.warm_up()
+    # Let the worker finish its in-flight requests, then exit; the master
+    # starts a fresh one.
+    app.serving_stats.on_recycle = lambda: setattr(worker, "alive", False)
+    worker.log.info(
+        "Worker %s warmed up in %.3fs", worker.pid, app.serving_stats.warm_up_seconds
+    )
@@ -0,0 +1,228 @@
+"""Tests of the Flask endpoints in app.py, run with ``python -m pytest``."""
+
+import io
+import json
+import os
+import threading
+import time
+import uuid
+import zipfile
+
+import pytest
+
+import PdfMetrics
+import app
+from benchmark import make_corpus
+from PdfImageStore import ImageStore
+
+
+def _upload(name: str = "warm-up.pdf") -> dict:
+    return {"file": (io.BytesIO(app._warm_up_pdf()), name)}
+
+
+@pytest.mark.parametrize(
+    "query, headers",
+    [("?stream=1", {}), ("", {"Accept": app.NDJSON_MIMETYPE})],
+)
+def test_parse_pdf_streams_ndjson(client, query, headers):
+    response = client.post(f"/parse_pdf{query}", data=_upload(), headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == app.NDJSON_MIMETYPE
+
+    # The body is only produced now, after the request has been torn down.
+    lines = [json.loads(line) for line in response.iter_encoded() if line.strip()]
+    response.close()
+
+    page, trailer = lines
+    assert "WARM UP" in page["page_content"]
+    assert page["metadata"]["source"] == "warm-up.pdf"
+    assert trailer["total_pages"] == 1
+
+
+def test_parse_pdf_streams_compact_ndjson(client):
+    response = client.post("/parse_pdf?stream=1&compact=1", data=_upload())
+    document, page, trailer = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert document["document"]["source"] == "warm-up.pdf"
+    assert "source" not in page["metadata"]
+    assert trailer["total_pages"] == 1
+
+
+def test_parse_pdf_json(client):
+    response = client.post("/parse_pdf", data=_upload())
+    assert response.status_code == 200
+    (page,) = response.get_json()["results"]
+    assert "WARM UP" in page["page_content"]
+
+
+def test_unread_profiled_stream_releases_the_profiler(client):
+    # The test client starts every body, so call the view directly.
+    with app.app.test_request_context("/parse_pdf?stream=1&profile=1", method="POST", data=_upload()):
+        response = app.parse_pdf()
+    response.close()  # the client went away before the body started
+    assert not PdfMetrics._profile_lock.locked()
+
+    timings = client.post("/parse_pdf?profile=1", data=_upload()).get_json()["timings"]
+    assert not timings["profile"].startswith("not captured")
+
+
+def test_timings_report_cache_hits(client):
+    first = client.post("/parse_pdf?timings=1", data=_upload()).get_json()["timings"]
+    assert first["cache_hit"] is False
+    assert "extract_text" in first["stages"]
+
+    again = client.post("/parse_pdf?timings=1", data=_upload()).get_json()["timings"]
+    assert again["cache_hit"] is True
+    assert "cache_lookup" in again["stages"]
+    assert "extract_text" not in again["stages"]
+
+
+def test_parses_are_cached_in_the_test_directory(client, app_state):
+    client.post("/parse_pdf", data=_upload())
+    assert app.parse_cache.stats()["misses"] == 1
+    assert (app_state / "parse_cache").is_dir()
+
+
+def test_parallel_parse_matches_a_serial_one(tmp_path):
+    (_, path, page_count), = make_corpus(str(tmp_path), [10], ["images"])
+    blob = app.Blob(os.path.basename(path), path=path)
+    store = ImageStore(str(tmp_path / "images"))
+
+    def parse(**options):
+        parser = app.PDFPlumberParser(extract_images=True, image_store=store, **options)
+        return list(parser.lazy_parse(blob))
+
+    def output(documents):
+        # Parses save their images to namespaces of their own.
+        return [
+            (
+                document.page_content,
+                {key: value for key, value in document.metadata.items() if key != "images"},
+                document.headings,
+                [os.path.basename(image) for image in document.metadata["images"]],
+            )
+            for document in documents
+        ]
+
+    serial = parse()
+    assert len(serial) == page_count
+    assert all(len(document.metadata["images"]) == 5 for document in serial)
+    parallel = parse(workers=3, pages_per_task=2)
+    assert output(parallel) == output(serial)
+    assert all(os.path.isfile(image) for document in parallel for image in document.metadata["images"])
+
+
+def test_streamed_parse_errors_end_the_body(client, monkeypatch):
+    stats = app.ServingStats()
+    monkeypatch.setattr(app, "serving_stats", stats)
+    upload = {"file": (io.BytesIO(b"%PDF-1.4\nnot a PDF at all"), "broken.pdf")}
+    response = client.post("/parse_pdf?stream=1&timings=1", data=upload)
+    assert response.status_code == 200
+    (line,) = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert line["error"]
+    assert line["pages"] == 0
+    assert "timings" in line
+    assert stats.as_dict()["first_request_seconds"] is not None
+
+
+def test_parse_pdf_page_selection(client):
+    assert client.post("/parse_pdf?pages=1-x", data=_upload()).status_code == 400
+    assert len(client.post("/parse_pdf?pages=0", data=_upload()).get_json()["results"]) == 1
+    assert client.post("/parse_pdf?pages=5-", data=_upload()).get_json()["results"] == []
+
+
+def _zip(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_batch_reports_broken_members(client, workers):
+    pdf = app._warm_up_pdf()
+    corrupt = pdf.replace(b"WARM UP", b"WARM-UP")  # stored as is, so its CRC no longer matches
+    archive = _zip([
+        ("good.pdf", pdf), ("notes.txt", b"not a PDF"), ("broken.pdf", b"%PDF-1.4 garbage"), ("crc.pdf", pdf),
+    ])
+    offset = archive.rindex(pdf)
+    archive = archive[:offset] + corrupt + archive[offset + len(pdf):]
+
+    response = client.post(
+        f"/parse_batch?workers={workers}",
+        data={"file": [(io.BytesIO(archive), "batch.zip"), (io.BytesIO(pdf), "single.pdf")]},
+    )
+    assert response.status_code == 200
+    *entries, trailer = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    by_source = {entry["source"]: entry for entry in entries}
+    assert sorted(by_source) == ["batch.zip/broken.pdf", "batch.zip/crc.pdf", "batch.zip/good.pdf", "single.pdf"]
+    assert "Bad CRC-32" in by_source["batch.zip/crc.pdf"]["error"]
+    assert "error" in by_source["batch.zip/broken.pdf"]
+    assert by_source["batch.zip/good.pdf"]["total_pages"] == 1
+    assert by_source["single.pdf"]["total_pages"] == 1
+    assert trailer == {"documents": 4, "failed": 2, "total_pages": 2}
+
+
+def test_parse_batch_rejects_unreadable_archives(client):
+    # The end record still says zip, but the central directory is damaged.
+    archive = _zip([("good.pdf", app._warm_up_pdf())]).replace(b"PK\x01\x02", b"XX\x01\x02")
+    response = client.post("/parse_batch", data={"file": (io.BytesIO(archive), "damaged.zip")})
+    assert response.status_code == 400
+    assert "damaged.zip" in response.get_data(as_text=True)
+
+
+class _Job:
+    def __init__(self, release: threading.Event) -> None:
+        self.id = uuid.uuid4().hex
+        self.finished_at = None
+        self._release = release
+
+    def run(self) -> None:
+        self._release.wait(5)
+        self.finished_at = time.time()
+
+
+def test_jobs_are_refused_when_the_queue_is_full(client, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(app, "job_queue", app.JobQueue(workers=1, queue_depth=1, ttl=60))
+
+    def run(job):
+        release.wait(5)
+        os.remove(job.path)
+
+    monkeypatch.setattr(app.ParseJob, "run", run)
+    try:
+        assert [client.post("/jobs", data=_upload()).status_code for _ in range(3)] == [202, 202, 429]
+        response = client.post("/jobs", data=_upload())
+        assert response.headers["Retry-After"] == "30"
+    finally:
+        release.set()
+
+
+def test_finished_jobs_expire_on_lookup():
+    queue = app.JobQueue(workers=1, queue_depth=0, ttl=0.05)
+    release = threading.Event()
+    job = _Job(release)
+    assert queue.submit(job)
+    release.set()
+    while job.finished_at is None:
+        time.sleep(0.01)
+    assert queue.get(job.id) is job
+    time.sleep(0.1)
+    assert queue.get(job.id) is None
+
+
+def test_finished_jobs_expire_without_requests():
+    queue = app.JobQueue(workers=2, queue_depth=0, ttl=0.1)
+    first, second = threading.Event(), threading.Event()
+    jobs = [_Job(first), _Job(second)]
+    for job in jobs:
+        assert queue.submit(job)
+    first.set()
+    time.sleep(0.05)
+    second.set()
+    deadline = time.time() + 5
+    while queue._jobs and time.time() < deadline:
+        time.sleep(0.01)
+    assert not queue._jobs
+    assert queue._timer is None
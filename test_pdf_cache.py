@@ -0,0 +1,103 @@
+"""Tests of the parse cache and the page index in PdfCache.py."""
+
+import os
+
+import pytest
+
+import PdfParser
+import app
+from benchmark import make_corpus, text_page, write_pdf
+from PdfCache import PageIndex, parser_fingerprint
+from PdfImageStore import ImageStore
+from PdfPages import select_pages
+
+
+def _pdf(path, pages) -> app.Blob:
+    write_pdf(str(path), pages)
+    return app.Blob(path.name, path=str(path))
+
+
+def _output(documents):
+    return [(document.page_content, document.metadata["page"]) for document in documents]
+
+
+def test_a_revision_parses_its_changed_pages_only(tmp_path, monkeypatch):
+    index = PageIndex(str(tmp_path / "index"))
+    parser = app.PDFPlumberParser()
+    pages = [text_page(n, lines=5) for n in range(6)]
+    list(index.lazy_parse(parser, _pdf(tmp_path / "v1.pdf", pages)))
+
+    parsed = []
+    parse_pages = app.PDFPlumberParser._lazy_parse_pages
+
+    def spy(self, blob, page_numbers=None, *args):
+        parsed.append(None if page_numbers is None else list(page_numbers))
+        return parse_pages(self, blob, page_numbers, *args)
+
+    monkeypatch.setattr(app.PDFPlumberParser, "_lazy_parse_pages", spy)
+    # Pages 0 and 1 swapped, page 4 edited.
+    revised = [pages[1], pages[0], pages[2], pages[3], text_page(40, lines=5), pages[5]]
+    blob = _pdf(tmp_path / "v2.pdf", revised)
+    documents = list(index.lazy_parse(parser, blob))
+    assert parsed == [[4]]
+    assert [document.metadata["reused"] for document in documents] == [True] * 4 + [False, True]
+
+    assert _output(documents) == _output(parser.lazy_parse(blob))
+    assert documents[0].metadata["source"] == "v2.pdf"
+
+
+class _ShortParser:
+    """Parses four pages, or one fewer than asked for, as when a parser sees
+    fewer pages than the page tree has."""
+
+    def __init__(self) -> None:
+        self.pages = None
+
+    def lazy_parse(self, blob):
+        page_numbers = range(4) if self.pages is None else select_pages(self.pages, 4)[:-1]
+        for page_number in page_numbers:
+            yield app.Document(f"page {page_number}", {"source": blob.source, "page": page_number})
+
+
+def test_a_short_partial_parse_falls_back_to_a_whole_one(tmp_path):
+    index = PageIndex(str(tmp_path / "index"))
+    blob = _pdf(tmp_path / "book.pdf", [text_page(n, lines=1) for n in range(4)])
+    with pytest.warns(UserWarning, match="parsing it whole"):
+        documents = list(index.lazy_parse(_ShortParser(), blob))
+    assert [document.page_content for document in documents] == [f"page {n}" for n in range(4)]
+    assert not any(document.metadata["reused"] for document in documents)
+
+
+def test_pages_whose_images_were_evicted_are_parsed_again(tmp_path):
+    index = PageIndex(str(tmp_path / "index"))
+    store = ImageStore(str(tmp_path / "images"))
+    parser = app.PDFPlumberParser(extract_images=True, image_store=store)
+    (_, path, _), = make_corpus(str(tmp_path), [2], ["images"])
+    blob = app.Blob("images.pdf", path=path)
+    first = list(index.lazy_parse(parser, blob))
+    os.remove(first[1].metadata["images"][-1])
+
+    again = list(index.lazy_parse(parser, blob))
+    assert [document.metadata["reused"] for document in again] == [True, False]
+    assert all(os.path.exists(image) for document in again for image in document.metadata["images"])
+
+
+def test_fingerprints_leave_out_how_the_output_is_produced(tmp_path):
+    def fingerprint(**options):
+        return parser_fingerprint(app.PDFPlumberParser(**options))
+
+    store = ImageStore(str(tmp_path / "images"))
+    same_root = ImageStore(str(tmp_path / "images"), max_bytes=1 << 20, workers=8, evict_interval=1)
+    assert fingerprint(image_store=store) == fingerprint(image_store=same_root, workers=4, pages_per_task=2)
+    assert fingerprint(image_store=store) != fingerprint(image_store=ImageStore(str(tmp_path / "other")))
+    assert fingerprint() != fingerprint(dedupe=True)
+
+    parser = PdfParser.PDFMinerParser(ocr_batcher=PdfParser.OCRBatcher(workers=1))
+    assert parser_fingerprint(parser) == parser_fingerprint(PdfParser.PDFMinerParser())
+    parallel = PdfParser.ParallelPDFParser(PdfParser.PDFMinerParser(), workers=2, pages_per_task=4)
+    assert parser_fingerprint(parallel) == parser_fingerprint(
+        PdfParser.ParallelPDFParser(PdfParser.PDFMinerParser(), workers=8)
+    )
+    assert parser_fingerprint(parallel) != parser_fingerprint(
+        PdfParser.ParallelPDFParser(PdfParser.PDFMinerParser(concatenate_pages=False))
+    )
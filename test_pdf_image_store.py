@@ -0,0 +1,94 @@
+"""Tests of the content-addressed image store in PdfImageStore.py."""
+
+import os
+import pickle
+import time
+
+from PdfImageStore import ImageStore
+
+
+def test_same_content_is_written_once(tmp_path):
+    store = ImageStore(str(tmp_path / "images"))
+    images = store.namespace("doc")
+    encodes = []
+
+    def encode():
+        encodes.append(1)
+        return b"logo"
+
+    first = images.save_lazily("digest", ".png", encode)
+    again = images.save_lazily("digest", ".png", encode)
+    images.wait()
+    assert first == again
+    assert os.path.dirname(first) == str(tmp_path / "images" / "doc")
+    assert open(first, "rb").read() == b"logo"
+    assert len(encodes) == 1
+    assert store.stats()["pending"] == 0
+
+    # Saved again after it is on disk: skipped, not rewritten.
+    assert images.save(b"logo", ".png") != first  # named after the bytes' own digest
+    images.save_lazily("digest", ".png", encode)
+    images.wait()
+    assert len(encodes) == 1
+    assert store.stats()["skipped"] == 1
+    assert store.stats()["files"] == 2
+
+
+def test_eviction_keeps_the_newest_images_under_max_bytes(tmp_path):
+    store = ImageStore(str(tmp_path / "images"), max_bytes=250)
+    images = store.namespace("doc")
+    paths = [images.save(bytes([n]) * 100, ".bin") for n in range(3)]
+    images.wait()
+    for age, path in zip((30, 20, 10), paths):
+        os.utime(path, (time.time() - age, time.time() - age))
+
+    store.evict()
+    assert [os.path.exists(path) for path in paths] == [False, True, True]
+    assert store.stats()["evicted"] == 1
+    assert store.stats()["bytes"] == 200
+
+
+def test_eviction_removes_expired_images_and_empty_namespaces(tmp_path):
+    store = ImageStore(str(tmp_path / "images"), max_age=60)
+    old, new = store.namespace("old"), store.namespace("new")
+    old_path = old.save(b"old", ".bin")
+    new_path = new.save(b"new", ".bin")
+    old.wait()
+    new.wait()
+    an_hour_ago = time.time() - 3600
+    os.utime(old_path, (an_hour_ago, an_hour_ago))
+
+    store.evict()
+    assert not os.path.exists(old_path)
+    assert os.path.exists(new_path)
+    # An empty namespace goes once it has not been written to for a while.
+    assert sorted(os.listdir(store.root)) == ["new", "old"]
+    os.utime(old.directory, (an_hour_ago, an_hour_ago))
+    store.evict()
+    assert sorted(os.listdir(store.root)) == ["new"]
+
+
+def test_pickles_its_configuration_only(tmp_path):
+    store = ImageStore(str(tmp_path / "images"), max_bytes=10 ** 6, max_age=3600, workers=2, evict_interval=30)
+    images = store.namespace("doc")
+    images.save(b"data", ".bin")
+    images.wait()
+
+    copy = pickle.loads(pickle.dumps(store))
+    assert (copy.root, copy.max_bytes, copy.max_age, copy.workers, copy.evict_interval) == (
+        store.root, 10 ** 6, 3600, 2, 30
+    )
+    # With writer threads and counters of its own.
+    assert copy.stats()["written"] == 0
+    assert copy.stats()["files"] == 1
+    images = copy.namespace("doc")
+    path = images.save(b"more", ".bin")
+    images.wait()
+    assert os.path.exists(path)
+
+
+def test_a_new_store_creates_no_directory(tmp_path):
+    store = ImageStore(str(tmp_path / "images"))
+    assert store.stats()["files"] == 0
+    store.evict()
+    assert not (tmp_path / "images").exists()
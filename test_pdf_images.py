@@ -0,0 +1,113 @@
+"""Tests of the image decoding and PNG encoding in PdfImages.py."""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from PdfImages import ColorSpace, RawImage, decode_image, decode_pixels, encode_png, encode_pngs, unpack_samples
+
+GRAY = ColorSpace("DeviceGray", 1)
+RGB = ColorSpace("DeviceRGB", 3)
+
+
+def _raw(width, height, bits, colorspace, data, **fields):
+    return RawImage(width, height, bits, colorspace, ("FlateDecode",), data, **fields)
+
+
+@pytest.mark.parametrize(
+    "shape, mode",
+    [((5, 7), "L"), ((5, 7, 2), "LA"), ((5, 7, 3), "RGB"), ((5, 7, 4), "RGBA"), ((1, 1, 3), "RGB")],
+)
+def test_encode_png_reads_back_with_pil(shape, mode):
+    pixels = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    image = Image.open(io.BytesIO(encode_png(pixels)))
+    assert image.mode == mode
+    assert image.size == (shape[1], shape[0])
+    np.testing.assert_array_equal(np.asarray(image), pixels)
+
+
+def test_encode_pngs_keeps_the_order():
+    images = [np.full((2, 2), value, dtype=np.uint8) for value in range(10)]
+    decoded = [np.asarray(Image.open(io.BytesIO(png))) for png in encode_pngs(images, workers=3)]
+    assert [int(pixels[0, 0]) for pixels in decoded] == list(range(10))
+
+
+@pytest.mark.parametrize(
+    "bits, data, expected",
+    [
+        (1, b"\xa0\xff", [[1, 0, 1], [1, 1, 1]]),  # rows padded to whole bytes
+        (2, b"\x18\xc0", [[0, 1, 2], [3, 0, 0]]),
+        (4, b"\x12\x30\x45\x60", [[1, 2, 3], [4, 5, 6]]),
+        (8, b"\x01\x02\x03\x04\x05\x06", [[1, 2, 3], [4, 5, 6]]),
+        (16, b"\x01\x00\x02\x00\x03\x00\xff\xff\x00\x01\x00\x00", [[256, 512, 768], [65535, 1, 0]]),
+    ],
+)
+def test_unpack_samples(bits, data, expected):
+    samples = unpack_samples(data, 3, 2, bits, 1)
+    assert samples.shape == (2, 3, 1)
+    assert samples[..., 0].tolist() == expected
+
+
+def test_unpack_samples_pads_short_data():
+    samples = unpack_samples(b"\x01\x02", 2, 2, 8, 1)
+    assert samples[..., 0].tolist() == [[1, 2], [0, 0]]
+
+
+def test_unpack_samples_rejects_other_bit_depths():
+    with pytest.raises(ValueError):
+        unpack_samples(b"\x00", 1, 1, 3, 1)
+
+
+def test_one_bit_gray_is_scaled_to_eight_bits():
+    pixels = decode_pixels(_raw(3, 1, 1, GRAY, b"\xa0"))
+    assert pixels.tolist() == [[255, 0, 255]]
+
+
+def test_decode_array_inverts_samples():
+    pixels = decode_pixels(_raw(2, 1, 8, GRAY, b"\x00\xff", decode=(1.0, 0.0)))
+    assert pixels.tolist() == [[255, 0]]
+
+
+def test_stencil_masks_are_gray():
+    pixels = decode_pixels(_raw(2, 1, 8, RGB, b"\x80", image_mask=True))
+    assert pixels.tolist() == [[255, 0]]
+
+
+def test_cmyk_becomes_rgb():
+    cmyk = ColorSpace("DeviceCMYK", 4)
+    pixels = decode_pixels(_raw(3, 1, 8, cmyk, bytes([0, 0, 0, 0, 255, 0, 0, 0, 0, 0, 0, 255])))
+    assert pixels.tolist() == [[[255, 255, 255], [0, 255, 255], [0, 0, 0]]]
+
+
+def test_indexed_images_use_their_palette():
+    palette = ColorSpace("Indexed", 1, base=RGB, hival=1, lookup=b"\xff\x00\x00\x00\x00\xff")
+    # Index 3 is out of range and gets the last color.
+    pixels = decode_pixels(_raw(3, 1, 8, palette, b"\x00\x01\x03"))
+    assert pixels.tolist() == [[[255, 0, 0], [0, 0, 255], [0, 0, 255]]]
+
+
+def test_soft_masks_become_an_alpha_channel():
+    smask = _raw(1, 1, 8, GRAY, b"\x80")
+    image = decode_image(_raw(2, 2, 8, RGB, bytes(range(12)), smask=smask))
+    assert image.extension == ".png"
+    assert image.pixels.shape == (2, 2, 4)
+    assert image.pixels[..., 3].tolist() == [[128, 128], [128, 128]]
+    # Composited onto white for OCR.
+    assert image.for_ocr().shape == (2, 2, 3)
+    assert int(image.for_ocr()[0, 0, 0]) == (0 * 128 + 255 * 127 + 127) // 255
+
+
+def test_encoded_images_are_kept_as_they_are():
+    jpeg = RawImage(1, 1, 8, RGB, ("DCTDecode",), b"\xff\xd8jpeg")
+    image = decode_image(jpeg)
+    assert image.pixels is None
+    assert image.to_bytes() == b"\xff\xd8jpeg"
+    assert image.extension == ".jpg"
+
+
+def test_unsupported_filters_are_skipped_with_a_warning():
+    fax = RawImage(1, 1, 1, GRAY, ("CCITTFaxDecode",), b"")
+    with pytest.warns(UserWarning, match="CCITTFaxDecode"):
+        assert decode_image(fax) is None
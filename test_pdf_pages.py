@@ -0,0 +1,45 @@
+"""Tests of the page selections in PdfPages.py."""
+
+import pytest
+
+from PdfPages import parse_page_selection, select_pages
+
+
+@pytest.mark.parametrize(
+    "selection, ranges",
+    [
+        ("0-4,9,20-", ((0, 4), (9, 9), (20, None))),
+        (" 1 - 3 , 5 ", ((1, 3), (5, 5))),
+        ("2,,3,", ((2, 2), (3, 3))),
+        ("7-7", ((7, 7),)),
+        ([3, 1, 3], ((1, 1), (3, 3))),
+        (range(2, 5), ((2, 4),)),
+        (range(0, 6, 2), ((0, 0), (2, 2), (4, 4))),
+        (range(0), ()),
+        ([], ()),
+    ],
+)
+def test_parse_page_selection(selection, ranges):
+    assert parse_page_selection(selection) == ranges
+
+
+@pytest.mark.parametrize(
+    "selection", ["", " , ", "a", "1-b", "-3", "3-1", "1-2-3", "1.5", [-1, 2], range(-2, 3)]
+)
+def test_parse_page_selection_rejects(selection):
+    with pytest.raises(ValueError):
+        parse_page_selection(selection)
+
+
+@pytest.mark.parametrize(
+    "selection, page_count, pages",
+    [
+        ("0-4,9,20-", 22, [0, 1, 2, 3, 4, 9, 20, 21]),
+        ("0-4,2-6", 10, [0, 1, 2, 3, 4, 5, 6]),  # overlapping ranges
+        ("3-", 3, []),  # past the end
+        ("1-100", 3, [1, 2]),
+        ("0-", 0, []),
+    ],
+)
+def test_select_pages(selection, page_count, pages):
+    assert select_pages(parse_page_selection(selection), page_count) == pages
@@ -0,0 +1,69 @@
+"""Tests of the parsers and stages in PdfParser.py that run without optional backends."""
+
+import importlib.util
+import pickle
+
+import pytest
+from langchain_core.document_loaders.base import BaseBlobParser
+from langchain_core.documents import Document
+from langchain_core.documents.base import Blob
+
+import PdfParser
+import app
+from benchmark import FakeTextractClient
+from PdfParser import OCRBatcher, _DocumentImages, _PageImage
+
+
+class _Page:
+    def __init__(self) -> None:
+        self.page_content = ""
+
+
+def test_ocr_batcher_reuses_one_pool_until_closed(monkeypatch):
+    monkeypatch.setattr(PdfParser, "_recognize_image_text", lambda image: f"<{image}>")
+    def run(batcher):
+        pages = [(_Page(), [_PageImage((n, 0), n)]) for n in range(5)]
+        return [document.page_content for document in batcher.run(iter(pages), _DocumentImages())]
+
+    with OCRBatcher(batch_size=2, workers=2) as batcher:
+        assert run(batcher) == ["<0>", "<1>", "<2>", "<3>", "<4>"]
+        pool = batcher._pool
+        assert run(batcher) == ["<0>", "<1>", "<2>", "<3>", "<4>"]
+        assert batcher._pool is pool
+        # Only the configuration is pickled.
+        copy = pickle.loads(pickle.dumps(batcher))
+        assert copy._pool is None and copy.batch_size == 2
+    assert batcher._pool is None
+
+
+def test_parsers_are_langchain_parsers():
+    parser = PdfParser.PDFMinerParser()
+    assert isinstance(parser, BaseBlobParser)
+    (document,) = parser.parse(Blob.from_data(app._warm_up_pdf(), path="warm-up.pdf"))
+    assert isinstance(document, Document)
+    assert isinstance(document, PdfParser.Document)
+    assert "WARM UP" in document.page_content
+
+
+@pytest.mark.skipif(importlib.util.find_spec("textractor") is not None, reason="textractor is installed")
+def test_textract_linearization_needs_textractor():
+    with pytest.raises(ImportError, match="amazon-textract-textractor"):
+        PdfParser.AmazonTextractPDFParser(client=FakeTextractClient())
+
+
+def test_textract_lines_without_linearization():
+    parser = PdfParser.AmazonTextractPDFParser(client=FakeTextractClient(latency=0), linearize=False)
+    (document,) = parser.parse(Blob.from_data(b"one line", path="scan.png"))
+    assert document.page_content == "one line"
+    assert document.metadata == {"source": "scan.png", "page": 1}
+
+    with pytest.raises(ValueError):
+        PdfParser.AmazonTextractPDFParser(
+            client=FakeTextractClient(), linearize=False, linearization_config=object()
+        )
+
+
+@pytest.mark.skipif(importlib.util.find_spec("textractcaller") is not None, reason="textractcaller is installed")
+def test_textract_features_need_textractcaller():
+    with pytest.raises(ImportError, match="amazon-textract-caller"):
+        PdfParser.AmazonTextractPDFParser([1], client=FakeTextractClient(), linearize=False)
@@ -0,0 +1,73 @@
+"""Tests of the shared page metadata in PdfRecords.py."""
+
+import pickle
+
+import pytest
+
+import app
+from PdfRecords import CompactPages, PageMetadata, share_documents
+
+DOCUMENT = {"source": "book.pdf", "total_pages": 3, "Title": "A Book"}
+
+
+def _pages(count=3):
+    return [PageMetadata(DOCUMENT, {"page": n, "chapter": "One"}) for n in range(count)]
+
+
+def test_reads_fall_back_to_the_document():
+    metadata = PageMetadata(DOCUMENT, {"page": 0, "Title": "Own title"})
+    assert metadata["source"] == "book.pdf"
+    assert metadata["Title"] == "Own title"
+    assert metadata.get("missing") is None
+    assert list(metadata) == ["source", "total_pages", "Title", "page"]
+    assert len(metadata) == 4
+    assert dict(metadata) == {**DOCUMENT, "page": 0, "Title": "Own title"}
+
+
+def test_writes_never_touch_the_document():
+    first, second = _pages(2)
+    first["source"] = "renamed.pdf"
+    del first["Title"]
+    assert first["source"] == "renamed.pdf"
+    assert "Title" not in first
+    assert second["Title"] == "A Book" and second["source"] == "book.pdf"
+    assert DOCUMENT == {"source": "book.pdf", "total_pages": 3, "Title": "A Book"}
+    with pytest.raises(KeyError):
+        del first["missing"]
+
+
+def test_copies_share_the_document():
+    metadata = _pages(1)[0]
+    copy = metadata.copy()
+    copy["page"] = 5
+    assert copy.document is metadata.document
+    assert metadata["page"] == 0
+
+
+def test_pickled_pages_share_the_document_again():
+    pages = [app.Document("text", metadata) for metadata in _pages()]
+    unpickled = [pickle.loads(pickle.dumps(page)) for page in pages]
+    assert unpickled[0].metadata.document is not unpickled[1].metadata.document
+
+    shared = list(share_documents(unpickled))
+    assert shared[0].metadata.document is shared[1].metadata.document is shared[2].metadata.document
+    assert [dict(page.metadata) for page in shared] == [dict(page.metadata) for page in pages]
+
+
+def test_compact_pages_emit_the_document_once():
+    compact = CompactPages()
+    pages = _pages()
+    pages[2]["total_pages"] = 4  # a page that changes a document-level field
+    fields = [compact.fields(metadata) for metadata in pages]
+    assert compact.document == DOCUMENT
+    assert fields[0] == {"page": 0, "chapter": "One"}
+    assert fields[2] == {"page": 2, "chapter": "One", "total_pages": 4}
+    for metadata, own in zip(pages, fields):
+        assert {**compact.document, **own} == dict(metadata)
+
+
+def test_compact_pages_with_plain_metadata_keep_all_of_it():
+    compact = CompactPages()
+    metadata = {"source": "book.pdf", "page": 0}
+    assert compact.fields(metadata) == metadata
+    assert compact.document == {}
@@ -0,0 +1,108 @@
+"""Tests of PdfStructure and of the chapters and subsections app.py finds with it."""
+
+import pytest
+
+import app
+from benchmark import write_pdf
+from PdfCache import PageIndex
+from PdfStructure import CHAPTER, SUBSECTION, FontHeadings, StructureIndex, carry
+
+_BODY = b"BT /F1 10 Tf 72 %d Td (Body text of page %d, revision %d.) Tj ET"
+
+
+def _page(page_number: int, revision: int = 0) -> bytes:
+    if page_number == 8:
+        # A chapter title page: its only text is the heading.
+        return b"BT /F1 18 Tf 72 400 Td (Chapter Two) Tj ET"
+    rows = []
+    if page_number == 0:
+        rows.append(b"BT /F1 18 Tf 72 740 Td (Chapter One) Tj ET")
+    if page_number in (4, 12):
+        rows.append(b"BT /F1 14 Tf 72 716 Td (Section %d) Tj ET" % page_number)
+    rows.extend(_BODY % (696 - row * 15, page_number, revision) for row in range(30))
+    return b"\n".join(rows)
+
+
+def _chaptered_pdf(path, revised_page: int = -1) -> app.Blob:
+    write_pdf(str(path), [_page(n, revision=int(n == revised_page)) for n in range(16)])
+    return app.Blob(path.name, path=str(path))
+
+
+def _structure(documents):
+    return [(d.metadata["page"], d.metadata["chapter"], d.metadata["subsection"]) for d in documents]
+
+
+def test_index_lookup_carries_headings_forward():
+    index = StructureIndex()
+    index.add(0, CHAPTER, "One")
+    index.add(2, SUBSECTION, "One.1")
+    index.add(5, CHAPTER, "Two")
+    assert index.lookup(1) == ("One", "")
+    assert index.lookup(4) == ("One", "One.1")
+    assert index.lookup(5) == ("Two", "")
+    assert len(index) == 3
+
+
+def test_carry_restarts_subsections_at_a_chapter():
+    assert carry(("One", "One.1"), [(SUBSECTION, "One.2")]) == ("One", "One.2")
+    assert carry(("One", "One.1"), [(CHAPTER, "Two")]) == ("Two", "")
+    assert carry(("One", "One.1"), []) == ("One", "One.1")
+
+
+def test_font_headings_use_the_given_body_size():
+    headings = FontHeadings(StructureIndex(), body_size=10.0)
+    # A page of nothing but a heading is still a heading.
+    headings.add_page(0, [("Chapter Two", 18.0, "Helvetica")])
+    headings.add_page(1, [("Bold lead", 10.0, "Helvetica-Bold"), ("Body", 10.0, "Helvetica")])
+    assert headings.index.headings(0) == [(CHAPTER, "Chapter Two")]
+    assert headings.index.headings(1) == [(SUBSECTION, "Bold lead")]
+
+
+def test_body_size_is_that_of_the_document(tmp_path):
+    serial = list(app.PDFPlumberParser().lazy_parse(_chaptered_pdf(tmp_path / "book.pdf")))
+    chapters = [chapter for _, chapter, _ in _structure(serial)]
+    assert chapters == ["Chapter One"] * 8 + ["Chapter Two"] * 8
+
+
+def test_parallel_and_incremental_parses_match_a_serial_one(tmp_path):
+    blob = _chaptered_pdf(tmp_path / "book.pdf")
+    serial = list(app.PDFPlumberParser().lazy_parse(blob))
+
+    parallel = list(app.PDFPlumberParser(workers=2, pages_per_task=4).lazy_parse(blob))
+    assert _structure(parallel) == _structure(serial)
+    assert [d.page_content for d in parallel] == [d.page_content for d in serial]
+
+    # A revision with one page changed reuses the other pages from the index
+    # and parses page 3 alone.
+    index = PageIndex(str(tmp_path / "index"))
+    parser = app.PDFPlumberParser()
+    list(parser._carry_structure(index.lazy_parse(parser, blob)))
+    revised = _chaptered_pdf(tmp_path / "book-2.pdf", revised_page=3)
+    incremental = list(parser._carry_structure(index.lazy_parse(parser, revised)))
+    assert [d.metadata["reused"] for d in incremental].count(False) == 1
+    assert _structure(incremental) == _structure(serial)
+
+
+@pytest.mark.parametrize("pages", [[8, 9], [9, 10]])
+def test_selected_pages_find_the_same_headings(tmp_path, pages):
+    blob = _chaptered_pdf(tmp_path / "book.pdf")
+    serial = list(app.PDFPlumberParser().lazy_parse(blob))
+    selected = list(app.PDFPlumberParser(pages=pages).lazy_parse(blob))
+    assert [d.headings for d in selected] == [serial[n].headings for n in pages]
+
+
+def test_headings_come_from_the_outline(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    path = tmp_path / "outlined.pdf"
+    with fitz.open() as document:
+        for n in range(4):
+            document.new_page().insert_text((72, 72), f"Body text of page {n}", fontsize=10)
+        # Level 3 entries are below the subsections and left out.
+        document.set_toc([[1, "Intro", 1], [2, "Background", 2], [3, "Detail", 2], [1, "Methods", 4]])
+        document.save(str(path))
+
+    documents = list(app.PDFPlumberParser().lazy_parse(app.Blob(path.name, path=str(path))))
+    assert _structure(documents) == [
+        (0, "Intro", ""), (1, "Intro", "Background"), (2, "Intro", "Background"), (3, "Methods", ""),
+    ]
+    assert documents[1].headings == [(SUBSECTION, "Background")]